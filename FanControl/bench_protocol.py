@@ -0,0 +1,103 @@
+import argparse
+import random
+import time
+
+from binary_protocol import LinkDecoder, encode_auto_status, encode_manual_status
+from stm32_protocol import AutoStatus, ManualStatus, ProtocolParser
+
+
+def synthetic_capture(count=100000, seed=1):
+    """Kayıt yoksa gerçek trafiğe benzeyen bir satır dizisi üretir (çoğunluğu STATUS:)."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        r = rng.random()
+        if r < 0.70:
+            lines.append(f"STATUS: AUTO, T={rng.uniform(20, 40):.2f} C, P={rng.randint(0, 100)}")
+        elif r < 0.90:
+            lines.append(f"STATUS: MANUAL, P={rng.randint(0, 100)}")
+        elif r < 0.95:
+            lines.append(f"OK: P={rng.randint(0, 100)}, Duty={rng.randint(0, 999)}")
+        elif r < 0.98:
+            lines.append(rng.choice(["OK: AUTO MODE", "OK: MANUAL MODE", "OK: Motor Direction -> CW"]))
+        elif r < 0.99:
+            lines.append("ERROR: Invalid command")
+        else:
+            lines.append("STATUS: AUTO, T=?? C")  # Bozuk satır
+    return lines
+
+
+def load_capture(path):
+    """Her satırı bir MCU mesajı olan metin kaydını okur."""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run(lines, repeat=5):
+    best = None
+    for _ in range(repeat):
+        parser = ProtocolParser()
+        parse = parser.parse
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) / best, parser.stats
+
+
+def run_link(lines, binary, repeat=5, chunk=64):
+    """Ham baytlardan mesaja kadar tüm okuma yolunu ölçer (mesaj/sn).
+
+    `binary` ise STATUS satırları ikili çerçeve olarak, diğerleri metin olarak
+    kodlanır; akış seri porttan okunur gibi `chunk` baytlık parçalarla verilir.
+    """
+    parser = ProtocolParser()
+    stream = bytearray()
+    for line in lines:
+        message = parser.parse(line) if binary else None
+        if isinstance(message, AutoStatus):
+            stream += encode_auto_status(message.temperature, message.pwm)
+        elif isinstance(message, ManualStatus):
+            stream += encode_manual_status(message.pwm)
+        else:
+            stream += line.encode('utf-8') + b'\r\n'
+    chunks = [bytes(stream[i:i + chunk]) for i in range(0, len(stream), chunk)]
+
+    best = None
+    for _ in range(repeat):
+        decoder = LinkDecoder()
+        parse = ProtocolParser().parse
+        feed = decoder.feed
+        count = 0
+        start = time.perf_counter()
+        for data in chunks:
+            for line, message in feed(data):
+                if line is not None:
+                    message = parse(line)
+                count += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best, len(stream)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="STM32 protokol ayrıştırıcısı hız ölçümü (satır/sn)")
+    arg_parser.add_argument('capture', nargs='?', help="Satır satır MCU mesajlarından oluşan kayıt dosyası")
+    arg_parser.add_argument('--lines', type=int, default=100000, help="Kayıt verilmezse üretilecek satır sayısı")
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    lines = load_capture(args.capture) if args.capture else synthetic_capture(args.lines)
+    rate, stats = run(lines, args.repeat)
+    print(f"{len(lines)} satır, en iyi tur: {rate:,.0f} satır/sn")
+    for kind, count in stats.most_common():
+        print(f"  {kind:<14} {count}")
+
+    for binary, caption in ((False, "metin"), (True, "ikili STATUS")):
+        rate, size = run_link(lines, binary, args.repeat)
+        print(f"bayttan mesaja ({caption}): {rate:,.0f} mesaj/sn, {size / len(lines):.1f} bayt/mesaj")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import os
+import queue
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+from controller_manager import ControllerManager
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def start_simulator(count, status_hz):
+    """Sahte STM32'leri ayrı bir süreçte başlatır ve pty port adlarını döndürür."""
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, 'sim_stm32.py'), '--count', str(count),
+                             '--status-hz', str(status_hz)], stdout=subprocess.PIPE, text=True)
+    ports = []
+    for line in proc.stdout:
+        line = line.strip()
+        if line == "HAZIR":
+            return proc, ports
+        ports.append(line)
+    proc.kill()
+    raise RuntimeError("Simülatör başlatılamadı")
+
+
+def bench(count, rounds, status_hz, binary=False):
+    proc, ports = start_simulator(count, status_hz)
+    manager = ControllerManager(binary=binary)
+    try:
+        for port in ports:
+            manager.open(port)
+        if binary:
+            time.sleep(0.5)  # B komutunun onayı; ölçüm ikili akışla başlar
+
+        latencies, lines, timeouts = [], 0, 0
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for n in range(rounds):
+            # Her turda tüm cihazlara PWM komutu; onayların gelişine kadar geçen süre ölçülür
+            command = f"P={n % 101}"
+            sent_at = time.perf_counter()
+            manager.broadcast(command)
+            pending = set(ports)
+            deadline = sent_at + 2.0
+            while pending and time.perf_counter() < deadline:
+                try:
+                    port, kind, data = manager.inbox.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if kind == 'line':
+                    lines += 1
+                elif kind == 'writer' and data[0] in ('ack', 'nack') and data[1] == command:
+                    latencies.append(time.perf_counter() - sent_at)
+                    pending.discard(port)
+            timeouts += len(pending)
+            time.sleep(0.1)  # CommandWriter'ın port başına gönderim aralığı
+        while True:  # Kalan satırları da say
+            try:
+                if manager.inbox.get_nowait()[1] == 'line':
+                    lines += 1
+            except queue.Empty:
+                break
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+    finally:
+        manager.close_all()
+        proc.terminate()
+        proc.wait()
+
+    return {
+        'devices': count,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'lines_per_s': lines / wall,
+        'timeouts': timeouts,
+        'cpu_ms_per_line': cpu / max(1, lines) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fan kontrolcüsü seri hattı performans ölçümü (sahte STM32'lerle)")
+    parser.add_argument('--devices', default='1,10,50', help="Virgülle ayrılmış cihaz sayıları")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--status-hz', type=float, default=10.0, help="Cihaz başına saniyedeki STATUS: satırı")
+    parser.add_argument('--binary', action='store_true', help="STATUS mesajlarını ikili çerçeveyle al")
+    args = parser.parse_args()
+
+    print(f"{'cihaz':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'satır/sn':>10} {'zaman aşımı':>12} "
+          f"{'CPU ms/satır':>13}")
+    for count in (int(c) for c in args.devices.split(',')):
+        r = bench(count, args.rounds, args.status_hz, args.binary)
+        print(f"{r['devices']:>6} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['lines_per_s']:>10.0f} {r['timeouts']:>12} {r['cpu_ms_per_line']:>13.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
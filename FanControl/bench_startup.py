@@ -0,0 +1,94 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def child(port, timeout_ms):
+    """Arayüzü açar; import, ilk pencere, port listesi ve ilk okuma anlarını (time.time()) yazdırır."""
+    import tkinter as tk
+    import fan_controller
+    from stm32_protocol import AutoStatus, ManualStatus
+    print(f"import {time.time()}", flush=True)
+
+    root = tk.Tk()
+    marks = set()
+
+    def mark(name):
+        if name not in marks:
+            marks.add(name)
+            print(f"{name} {time.time()}", flush=True)
+
+    root.bind('<Map>', lambda e: mark('window') if e.widget is root else None)
+    app = fan_controller.FanControlGUI(root)
+    on_ports_scanned = app.on_ports_scanned
+    process_incoming_message = app.process_incoming_message
+
+    def ports_scanned(port_names):
+        on_ports_scanned(port_names)
+        mark('ports')
+        # pty portları comports() listesinde görünmez; sahte cihaza doğrudan bağlanılır
+        app.port_combobox.set(port)
+        app.connect_serial()
+
+    def first_reading(message):
+        process_incoming_message(message)
+        if isinstance(message, (AutoStatus, ManualStatus)):
+            mark('reading')
+            root.after(0, root.quit)
+
+    app.port_scanner.callback = ports_scanned
+    app.process_incoming_message = first_reading
+    root.after(timeout_ms, root.quit)
+    root.mainloop()
+    app.disconnect_serial()
+    os._exit(0)
+
+
+def run_once(port, timeout_ms):
+    started = time.time()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', port, str(timeout_ms)],
+                            cwd=HERE, stdout=subprocess.PIPE, text=True)
+    out, _ = proc.communicate(timeout=timeout_ms / 1000 + 30)
+    marks = {}
+    for line in out.splitlines():
+        name, _, ts = line.partition(' ')
+        marks[name] = (float(ts) - started) * 1000
+    return marks
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description="fan_controller açılış süresi ölçümü (sahte STM32 ile)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--status-hz', type=float, default=2.0)
+    parser.add_argument('--timeout-ms', type=int, default=15000)
+    args = parser.parse_args()
+
+    from bench_serial import start_simulator
+    sim, ports = start_simulator(1, args.status_hz)
+    try:
+        runs = [run_once(ports[0], args.timeout_ms) for _ in range(args.runs)]
+    finally:
+        sim.terminate()
+        sim.wait()
+
+    print(f"{'aşama':<16} {'medyan ms':>10} {'en kötü ms':>11}")
+    for name, caption in (('import', "import"), ('window', "ilk pencere"), ('ports', "port listesi"),
+                          ('reading', "ilk okuma")):
+        values = [r[name] for r in runs if name in r]
+        if len(values) < len(runs):
+            print(f"{caption:<16} {len(runs) - len(values)} çalıştırmada ölçülemedi")
+        if values:
+            print(f"{caption:<16} {statistics.median(values):>10.0f} {max(values):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
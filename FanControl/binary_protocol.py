@@ -0,0 +1,125 @@
+import binascii
+import struct
+from collections import Counter
+
+from stm32_protocol import AutoStatus, ManualStatus
+
+# --- STM32 İkili Çerçeve Biçimi ---
+# Host "B" komutunu metin olarak gönderir. Destekleyen firmware "OK: BINARY MODE" ile
+# cevap verir ve bundan sonra STATUS mesajlarını çerçeveyle gönderir; komut cevapları
+# (OK:/ERROR) metin satırı olarak kalır. Cevap gelmezse veya ERROR dönerse host metin
+# protokolüyle devam eder. Firmware yeniden başlayınca metin moduna döner.
+#
+#   SYNC (0xA5) | LEN (1) | TYPE (1) | PAYLOAD (LEN bayt) | CRC16 (2, little-endian)
+#
+# CRC-16/CCITT-FALSE (poly 0x1021, başlangıç 0xFFFF) LEN, TYPE ve PAYLOAD üzerinden.
+# SYNC baytı ASCII değildir; aynı akışta metin satırları ve çerçeveler ayırt edilebilir.
+#
+#   TYPE 0x01 AUTO_STATUS:   int16 sıcaklık (0.01 °C), uint8 PWM yüzdesi
+#   TYPE 0x02 MANUAL_STATUS: uint8 PWM yüzdesi
+
+BINARY_COMMAND = 'B'
+SYNC = 0xA5
+FRAME_AUTO_STATUS = 0x01
+FRAME_MANUAL_STATUS = 0x02
+
+_HEADER_SIZE = 3  # SYNC, LEN, TYPE
+_CRC_SIZE = 2
+MAX_LINE = 512    # Satır sonu gelmeden bu kadar bayt birikirse tampon atılır
+
+_CRC = struct.Struct('<H')
+_AUTO_STATUS = struct.Struct('<hB')
+_MANUAL_STATUS = struct.Struct('<B')
+
+
+def crc16(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(frame_type, payload):
+    body = bytes((len(payload), frame_type)) + payload
+    return bytes((SYNC,)) + body + _CRC.pack(crc16(body))
+
+
+def encode_auto_status(temperature, pwm):
+    return encode_frame(FRAME_AUTO_STATUS, _AUTO_STATUS.pack(round(temperature * 100), pwm))
+
+
+def encode_manual_status(pwm):
+    return encode_frame(FRAME_MANUAL_STATUS, _MANUAL_STATUS.pack(pwm))
+
+
+class LinkDecoder:
+    """Seri porttan gelen baytları metin satırlarına ve ikili çerçevelere ayırır.
+
+    `feed()` her çağrıda tamamlanan mesajları `(satır, mesaj)` olarak döndürür:
+    metin satırlarında `satır` str, `mesaj` None'dır (ayrıştırma eskisi gibi
+    ProtocolParser'a kalır); çerçevelerde `satır` None, `mesaj` çözülmüş nesnedir.
+    Çerçeveler tampondan `struct.unpack_from` ile yerinde okunur, CRC bir
+    memoryview dilimi üzerinden hesaplanır; bayt kopyası veya metin çözümü yapılmaz.
+    CRC'si tutmayan veya bozuk çerçeve atlanır ve sonraki SYNC'ten devam edilir.
+    """
+
+    def __init__(self):
+        self.stats = Counter()
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        end = len(buffer)
+        pos = 0
+        view = memoryview(buffer)
+        try:
+            while pos < end:
+                if buffer[pos] == SYNC:
+                    if end - pos < _HEADER_SIZE + _CRC_SIZE:
+                        break
+                    length = buffer[pos + 1]
+                    crc_at = pos + _HEADER_SIZE + length
+                    if crc_at + _CRC_SIZE > end:
+                        break
+                    if _CRC.unpack_from(buffer, crc_at)[0] != crc16(view[pos + 1:crc_at]):
+                        # Uzunluk baytı bozulmuş olabilir: çerçevenin içinde başka bir SYNC varsa ondan devam edilir
+                        self.stats['crc_error'] += 1
+                        sync = buffer.find(SYNC, pos + 1, crc_at + _CRC_SIZE)
+                        pos = sync if sync >= 0 else crc_at + _CRC_SIZE
+                        continue
+                    message = self._decode(buffer[pos + 2], buffer, pos + _HEADER_SIZE, length)
+                    if message is not None:
+                        messages.append((None, message))
+                    pos = crc_at + _CRC_SIZE
+                    continue
+
+                newline = buffer.find(b'\n', pos)
+                sync = buffer.find(SYNC, pos, end if newline < 0 else newline)
+                if sync >= 0:
+                    # Satırın ortasında çerçeve başı: önceki baytlar bozuk çerçeve artığıdır
+                    self.stats['resync'] += 1
+                    pos = sync
+                    continue
+                if newline < 0:
+                    if end - pos > MAX_LINE:
+                        self.stats['overflow'] += 1
+                        pos = end
+                    break
+                line = buffer[pos:newline].decode('utf-8', errors='replace').strip()
+                if line:
+                    messages.append((line, None))
+                pos = newline + 1
+        finally:
+            view.release()
+        del buffer[:pos]
+        return messages
+
+    def _decode(self, frame_type, buffer, offset, length):
+        if frame_type == FRAME_AUTO_STATUS and length == _AUTO_STATUS.size:
+            centi, pwm = _AUTO_STATUS.unpack_from(buffer, offset)
+            self.stats['AutoStatus'] += 1
+            return AutoStatus(centi / 100, pwm)  # Metin karşılığı yalnızca loglanırken üretilir
+        if frame_type == FRAME_MANUAL_STATUS and length == _MANUAL_STATUS.size:
+            self.stats['ManualStatus'] += 1
+            return ManualStatus(_MANUAL_STATUS.unpack_from(buffer, offset)[0])
+        self.stats['unknown_frame'] += 1  # Yeni firmware'in bu sürümün bilmediği çerçevesi
+        return None
\ No newline at end of file
@@ -0,0 +1,199 @@
+import queue
+import threading
+
+from binary_protocol import BINARY_COMMAND, LinkDecoder
+from serial_writer import CommandWriter, LINES_READ
+from stm32_protocol import (ProtocolParser, ModeAck, PwmAck, AutoStatus, ManualStatus, Error, Malformed,
+                            MODE_AUTO, MODE_MANUAL)
+
+BAUD_RATE = 115200
+
+
+class FanController:
+    """Tek bir STM32 fan kontrolcüsü: seri port, okuma thread'i, gönderim hattı ve son durum.
+
+    Arayüz nesnesi tutmaz; gelen her satır ve gönderim olayı ortak `inbox`
+    kuyruğuna (port, tür, veri) olarak konur ve `notify` çağrılır. `binary` True ise
+    bağlanınca MCU'dan STATUS mesajlarını ikili çerçeveyle göndermesi istenir.
+    """
+
+    def __init__(self, port, inbox, notify=None, baudrate=BAUD_RATE, capture=None, binary=False):
+        self.port = port
+        self.inbox = inbox
+        self.notify = notify
+        self.capture = capture
+        self.binary = binary
+        self.baudrate = baudrate
+        self.parser = ProtocolParser()
+
+        self.serial_port = None
+        self.writer = None
+        self.running = False
+        self._thread = None
+
+        # Son bilinen durum
+        self.mode = None
+        self.temperature = None
+        self.pwm = None
+        self.last_error = ''
+
+    @property
+    def connected(self):
+        return bool(self.serial_port and self.serial_port.is_open and self.running)
+
+    def open(self):
+        import serial  # pyserial ilk bağlantıda yüklenir
+        self.serial_port = serial.Serial(self.port, self.baudrate, timeout=1)
+        self.writer = CommandWriter(self.serial_port, _TaggedQueue(self.port, self.inbox), notify=self.notify,
+                                    capture=self.capture)
+        self.writer.start()
+        self.running = True
+        self._thread = threading.Thread(target=self._read_loop, name=f'serial-read-{self.port}', daemon=True)
+        self._thread.start()
+        if self.binary:
+            self.writer.send(BINARY_COMMAND)
+
+    def close(self):
+        """Thread'lere durmalarını bildirir ve portu kapatır; thread'leri beklemez.
+
+        Okuma thread'i o an Tk thread'ini bekliyor olabilir (notify -> event_generate);
+        Tk thread'inde join, thread'lerin zaman aşımı kadar arayüzü dondururdu. Bitişleri
+        `finished` ile izlenir.
+        """
+        self.running = False
+        if self.writer:
+            self.writer.stop()
+        if self.serial_port and self.serial_port.is_open:
+            cancel_read = getattr(self.serial_port, 'cancel_read', None)
+            if cancel_read:
+                cancel_read()  # Bekleyen read() hemen döner
+            self.serial_port.close()
+
+    @property
+    def finished(self):
+        """close() sonrası okuma ve gönderim thread'leri bitti mi?"""
+        reader_alive = self._thread is not None and self._thread.is_alive()
+        return not reader_alive and not (self.writer and self.writer.alive)
+
+    def send(self, command):
+        if self.writer:
+            self.writer.send(command)
+
+    def _read_loop(self):
+        import serial
+        lines_read = LINES_READ.labels(self.port)
+        decoder = LinkDecoder()
+        while self.running and self.serial_port and self.serial_port.is_open:
+            try:
+                received = decoder.feed(self.serial_port.read(self.serial_port.in_waiting or 1))
+                for line, message in received:
+                    lines_read.inc()
+                    writer = self.writer
+                    if line is None:
+                        if writer:
+                            writer.handle_frame(message)
+                        self.inbox.put((self.port, 'line', (None, message)))
+                        continue
+                    if writer and writer.handle_line(line):
+                        continue  # Müzakere cevabı (ör. B'ye ERROR); sonucu gönderim olayıyla gelir
+                    # Ayrıştırma okuma thread'inde yapılır; Tk thread'i yalnızca sonucu uygular
+                    self.inbox.put((self.port, 'line', (line, self.parser.parse(line))))
+                if received and self.notify:
+                    self.notify()
+            except serial.SerialTimeoutException:
+                pass
+            except Exception as e:
+                if self.running:
+                    self._post('read_error', str(e))
+                self.running = False
+                break
+
+    def _post(self, kind, data):
+        self.inbox.put((self.port, kind, data))
+        if self.notify:
+            self.notify()
+
+    def apply(self, message):
+        """Ayrıştırılmış mesajı son duruma işler; durum değiştiyse True döner."""
+        before = (self.mode, self.temperature, self.pwm, self.last_error)
+        if isinstance(message, ModeAck):
+            self.mode = message.mode
+        elif isinstance(message, PwmAck):
+            self.pwm = message.pwm
+        elif isinstance(message, AutoStatus):
+            self.mode, self.temperature, self.pwm = MODE_AUTO, message.temperature, message.pwm
+        elif isinstance(message, ManualStatus):
+            self.mode, self.pwm = MODE_MANUAL, message.pwm
+        elif isinstance(message, (Error, Malformed)):
+            self.last_error = message.text
+        return before != (self.mode, self.temperature, self.pwm, self.last_error)
+
+
+class _TaggedQueue:
+    """CommandWriter olaylarını port adıyla etiketleyip ortak kuyruğa aktarır."""
+
+    def __init__(self, port, inbox):
+        self.port = port
+        self.inbox = inbox
+
+    def put(self, event):
+        self.inbox.put((self.port, 'writer', event))
+
+
+class ControllerManager:
+    """Birden fazla fan kontrolcüsünü tek süreçten yönetir.
+
+    Tüm kontrolcüler tek bir `inbox` kuyruğunu paylaşır; arayüz bu kuyruğu tek
+    noktadan boşaltır. Grup komutları (`broadcast`) her kontrolcünün kendi gönderim
+    hattına bırakılır, böylece yavaş bir port diğerlerini bekletmez.
+    `capture` (CaptureWriter) verilirse tüm portların trafiği aynı kayda yazılır.
+    `binary` True ise her kontrolcüyle ikili STATUS çerçeveleri müzakere edilir.
+    """
+
+    def __init__(self, notify=None, capture=None, binary=False):
+        self.notify = notify
+        self.capture = capture
+        self.binary = binary
+        self.inbox = queue.Queue()
+        self.controllers = {}
+        self.closing = []  # Kapatılmış, thread'leri henüz bitmemiş kontrolcüler (bkz. reap)
+
+    def open(self, port):
+        if port in self.controllers:
+            if self.controllers[port].connected:
+                return self.controllers[port]
+            self.close(port)  # Okuma hatasıyla düşmüş eski bağlantı
+        controller = FanController(port, self.inbox, self.notify, capture=self.capture, binary=self.binary)
+        controller.open()
+        self.controllers[port] = controller
+        return controller
+
+    def close(self, port):
+        """Kontrolcüyü kapatır ve beklemeden döner; thread'leri bitene kadar `closing` listesinde kalır."""
+        controller = self.controllers.pop(port, None)
+        if controller:
+            controller.close()
+            self.closing.append(controller)
+
+    def close_all(self):
+        for port in list(self.controllers):
+            self.close(port)
+
+    def reap(self):
+        """Thread'leri biten kontrolcüleri `closing` listesinden çıkarır; kalan sayısını döndürür.
+
+        Arayüzler kapatmadan sonra bunu Tk döngüsünden (after) çağırır; böylece
+        bitmeyi bekleyen thread'ler Tk thread'ini bekletmez, Tk thread'i de onları.
+        """
+        self.closing = [controller for controller in self.closing if not controller.finished]
+        return len(self.closing)
+
+    def send(self, port, command):
+        controller = self.controllers.get(port)
+        if controller:
+            controller.send(command)
+
+    def broadcast(self, command, ports=None):
+        """Komutu verilen (veya tüm bağlı) kontrolcülere gönderir."""
+        for port in ports or list(self.controllers):
+            self.send(port, command)
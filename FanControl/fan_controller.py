@@ -1,24 +1,65 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import serial
-import serial.tools.list_ports
-import threading
-import queue
-import time
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+from common import metrics
+from common.alarm_bar import AlarmBar
+from common.alarms import AlarmEngine, load_alarm_rules
+from common.capture import CaptureReplayer, CaptureWriter, DIRECTION_RX, SOURCE_SERIAL, read_capture
+from common.view_model import ViewModel
+from binary_protocol import BINARY_COMMAND
+from controller_manager import ControllerManager
+from log_view import LogView
+from port_scan import PortScanner
+from stm32_protocol import (ProtocolParser, ModeAck, PwmAck, AutoStatus, ManualStatus, Error, Malformed,
+                            MODE_AUTO, MODE_MANUAL, format_message)
+from ui_dispatch import InboxDispatcher, reap_closed
+
+DRAIN_MAX_MESSAGES = 200         # Bir karede işlenecek en fazla mesaj
+DRAIN_BUDGET_S = 0.008           # Bir karede kuyruk boşaltmaya ayrılan süre
+STALE_CHECK_INTERVAL_MS = 1000  # Veri gelmeyen kanalların kontrol edilme aralığı
+NO_PORT_TEXT = "Port Yok"
+SCANNING_TEXT = "Taranıyor..."
 
 
 class FanControlGUI:
-    def __init__(self, master):
+    def __init__(self, master, log_file=None, log_max_lines=1000, alarm_rules='alarms.ini', capture=None,
+                 binary=False):
         self.master = master
         self.master.title("STM32 Fan Kontrol Arayüzü")
-        self.master.geometry("500x550")
-        self.serial_port = None
-        self.serial_thread = None
-        self.read_queue = queue.Queue()
-        self.running = False
+        self.master.geometry("500x580")
+        self.capture = capture  # Seri trafiğin yazıldığı CaptureWriter (--capture)
+        # Seri port, okuma thread'i ve gönderim hattı çoklu arayüzle aynı FanController'da; burada tek kontrolcü
+        # kullanılır. `binary` True ise bağlanınca ikili STATUS çerçeveleri istenir (--binary).
+        self.manager = ControllerManager(capture=capture, binary=binary)
+        self.controller = None
+        self.replayer = None
+        self.replay_port = None
         self.pwm_value = 0  # Manuel mod için PWM değerini saklar
+        self.log_file = log_file
+        self.log_max_lines = log_max_lines
+        self.parser = ProtocolParser()  # Yalnızca kayıt oynatmada; canlı satırlar okuma thread'inde ayrıştırılır
+        # DirectionAck, FramingAck ve Unknown mesajları için arayüzde bir işlem yapılmaz
+        self.message_handlers = {
+            ModeAck: self.on_mode_ack,
+            PwmAck: self.on_pwm_ack,
+            AutoStatus: self.on_auto_status,
+            ManualStatus: self.on_manual_status,
+            Error: self.on_mcu_error,
+            Malformed: self.on_malformed,
+        }
+        # Sıcaklık eşikleri ve MCU hataları modal pencere yerine alarm şeridinde gösterilir
+        self.alarms = AlarmEngine(*load_alarm_rules(alarm_rules))
+        # Mod/PWM/sıcaklık göstergeleri yalnızca değiştiklerinde yeniden çizilir
+        self.view = ViewModel(master, name='fan_controller')
+        self.ui_update_seconds = metrics.UI_UPDATE_SECONDS.labels('fan_controller')
+        metrics.UI_QUEUE_DEPTH.labels('fan_controller').set_function(self.manager.inbox.qsize)
 
         self.setup_ui()
+        self.check_stale_channels()
 
     def setup_ui(self):
         style = ttk.Style()
@@ -44,12 +85,16 @@ class FanControlGUI:
                         borderwidth=1,
                         relief="flat")
 
+        self.alarm_bar = AlarmBar(self.master, log=self.log_message)
+        self.alarm_bar.pack(side=tk.TOP, fill="x")
+
         port_frame = ttk.LabelFrame(self.master, text="Seri Port Ayarları", padding=10)
         port_frame.pack(pady=10, padx=20, fill="x")
 
         ttk.Label(port_frame, text="Port Seçin:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
         self.port_combobox = ttk.Combobox(port_frame, width=30)
         self.port_combobox.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        self.port_scanner = PortScanner(self.master, self.on_ports_scanned)
         self.refresh_ports()
 
         self.connect_button = ttk.Button(port_frame, text="Bağlan", command=self.connect_serial)
@@ -92,28 +137,37 @@ class FanControlGUI:
         log_frame.pack(pady=10, padx=20, fill="both", expand=True)
         self.log_text = tk.Text(log_frame, height=10, width=50, state='disabled', font=('Consolas', 9))
         self.log_text.pack(fill="both", expand=True)
+        self.log_view = LogView(self.log_text, max_lines=self.log_max_lines, log_file=self.log_file)
 
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
-        self.master.after(100, self.process_serial_queue)
+        # Kuyruk periyodik olarak yoklanmaz; veri geldiğinde thread'ler Tk döngüsünü uyandırır
+        self.dispatcher = InboxDispatcher(self.master, self.manager.inbox, self.handle_inbox_item,
+                                          DRAIN_MAX_MESSAGES, DRAIN_BUDGET_S, self.ui_update_seconds.observe)
+        self.manager.notify = self.dispatcher.notify
 
     def refresh_ports(self):
-        ports = serial.tools.list_ports.comports()
-        port_names = [port.device for port in ports]
+        # Port listesi arka planda çıkarılır; pencere taramayı beklemeden açılır
+        self.port_combobox.set(SCANNING_TEXT)
+        self.port_scanner.scan()
+
+    def on_ports_scanned(self, port_names):
         self.port_combobox['values'] = port_names
+        if self.port_combobox.get() != SCANNING_TEXT:
+            return  # Tarama sürerken kullanıcı port adını kendisi yazdı
         if port_names:
             self.port_combobox.set(port_names[0])
         else:
-            self.port_combobox.set("Port Yok")
+            self.port_combobox.set(NO_PORT_TEXT)
 
     def connect_serial(self):
+        import serial  # pyserial ilk bağlantıda yüklenir
         port_name = self.port_combobox.get()
-        if port_name and port_name != "Port Yok":
+        if port_name and port_name not in (NO_PORT_TEXT, SCANNING_TEXT):
             try:
-                self.serial_port = serial.Serial(port_name, 115200, timeout=1)
+                self.controller = self.manager.open(port_name)
                 self.log_message(f"Seri porta başarıyla bağlandı: {port_name}")
                 self.update_ui_on_connect(True)
-                self.current_mode_label.config(text="Mevcut Mod: Manuel Mod Başlatılıyor...")
-                self.start_serial_read_thread()
+                self.view.set(self.current_mode_label, text="Mevcut Mod: Manuel Mod Başlatılıyor...")
                 self.send_command_to_mcu("M")
             except serial.SerialException as e:
                 messagebox.showerror("Bağlantı Hatası", f"Seri porta bağlanılamadı: {e}")
@@ -121,125 +175,153 @@ class FanControlGUI:
         else:
             messagebox.showwarning("Uyarı", "Lütfen geçerli bir port seçin.")
 
-    def disconnect_serial(self):
-        if self.serial_port and self.serial_port.is_open:
-            self.running = False
-            if self.serial_thread:
-                self.serial_thread.join(timeout=1)
-            self.serial_port.close()
-            self.log_message("Seri port bağlantısı kesildi.")
-            self.update_ui_on_connect(False)
+    def disconnect_serial(self, reason="Seri port bağlantısı kesildi."):
+        if self.controller is None:
+            return
+        self.alarm_bar.handle(self.alarms.forget(self.current_device()))
+        self.manager.close(self.controller.port)
+        reap_closed(self.master, self.manager)
+        self.controller = None
+        self.log_message(reason)
+        self.update_ui_on_connect(False)
 
     def update_ui_on_connect(self, connected):
         self.port_combobox.config(state=tk.DISABLED if connected else 'readonly')
         self.connect_button.config(state=tk.DISABLED if connected else tk.NORMAL)
         self.disconnect_button.config(state=tk.NORMAL if connected else tk.DISABLED)
-        self.auto_button.config(state=tk.NORMAL if connected else tk.DISABLED)
-        self.manual_button.config(state=tk.NORMAL if connected else tk.DISABLED)
+        self.view.set(self.auto_button, state=tk.NORMAL if connected else tk.DISABLED)
+        self.view.set(self.manual_button, state=tk.NORMAL if connected else tk.DISABLED)
         if not connected:
-            self.current_mode_label.config(text="Mevcut Mod: Bağlantı Yok")
-            self.temp_label.config(text="Sıcaklık: -- °C")
-            self.pwm_progressbar.config(value=0)  # Sadece değeri sıfırla
-            self.pwm_progressbar.unbind("<Button-1>")  # Bağlantı kesildiğinde tıklama olayını kaldır
-            self.pwm_value_label.config(text="PWM Değeri: 0 %")
-            self.auto_button.config(style='Inactive.TButton')
-            self.manual_button.config(style='Inactive.TButton')
-
-    def start_serial_read_thread(self):
-        self.running = True
-        self.serial_thread = threading.Thread(target=self.read_from_serial, daemon=True)
-        self.serial_thread.start()
-
-    def read_from_serial(self):
-        while self.running and self.serial_port and self.serial_port.is_open:
-            try:
-                line = self.serial_port.readline().decode('utf-8').strip()
-                if line:
-                    self.read_queue.put(line)
-            except serial.SerialTimeoutException:
-                pass
-            except Exception as e:
-                if self.running:
-                    self.read_queue.put(f"Hata (Seri Okuma): {e}")
-                self.running = False
-                break
-
-    def process_serial_queue(self):
-        while not self.read_queue.empty():
-            message = self.read_queue.get_nowait()
-            self.log_message(f"MCU: {message}")
+            self.view.set(self.current_mode_label, text="Mevcut Mod: Bağlantı Yok")
+            self.view.set(self.temp_label, text="Sıcaklık: -- °C")
+            self.view.set(self.pwm_progressbar, value=0)  # Sadece değeri sıfırla
+            self.view.bind(self.pwm_progressbar, "<Button-1>", None)  # Bağlantı kesildiğinde tıklama olayını kaldır
+            self.view.set(self.pwm_value_label, text="PWM Değeri: 0 %")
+            self.view.set(self.auto_button, style='Inactive.TButton')
+            self.view.set(self.manual_button, style='Inactive.TButton')
+
+    def handle_inbox_item(self, port, kind, data):
+        if port != self.current_device():
+            return  # Bağlantısı kesilmiş bir porttan kalan mesaj
+        if kind == 'line':
+            line, message = data
+            # İkili çerçevelerin metni yalnızca loglanırken üretilir
+            self.log_message(f"MCU: {line or format_message(message)}")
             self.process_incoming_message(message)
-        self.master.after(100, self.process_serial_queue)
+        elif kind == 'writer':
+            self.handle_writer_event(*data)
+        elif kind == 'read_error':
+            self.disconnect_serial(f"Hata (Seri Okuma): {data}")
+
+    def handle_writer_event(self, kind, command, detail):
+        if command == BINARY_COMMAND and kind in ('ack', 'nack', 'timeout'):
+            self.log_message("İkili STATUS çerçeveleri etkin." if kind == 'ack' else
+                             "MCU ikili çerçeveleri desteklemiyor; metin protokolüyle devam ediliyor.")
+        elif kind == 'sent':
+            self.log_message(f"GUI -> MCU: {command}")
+        elif kind == 'timeout':
+            self.log_message(f"Uyarı: '{command}' komutu için MCU onayı gelmedi.")
+        elif kind == 'error':
+            self.disconnect_serial(f"Hata: Komut gönderilemedi: {detail}")
+        elif kind == 'replay':
+            self.log_message(detail)
 
     def process_incoming_message(self, message):
-        if "OK: AUTO MODE" in message:
-            self.current_mode_label.config(text="Mevcut Mod: Otomatik")
-            self.pwm_progressbar.unbind("<Button-1>")  # Otomatik modda tıklama olayını kaldır
-            self.auto_button.config(style='Active.TButton')
-            self.manual_button.config(style='Inactive.TButton')
-        elif "OK: MANUAL MODE" in message:
-            self.current_mode_label.config(text="Mevcut Mod: Manuel")
-            self.pwm_progressbar.bind("<Button-1>", self.on_progressbar_click)  # Manuel modda tıklama olayını bağla
-            self.auto_button.config(style='Inactive.TButton')
-            self.manual_button.config(style='Active.TButton')
-        elif "OK: P=" in message:
-            try:
-                percentage_str = message.split("OK: P=")[1].split(",")[0]
-                percentage_value = int(percentage_str)
-                self.pwm_progressbar['value'] = percentage_value
-                self.pwm_value = percentage_value
-                self.pwm_value_label.config(text=f"PWM Değeri: {percentage_value} %")
-            except (ValueError, IndexError):
-                self.log_message(f"Hata: Geçersiz yüzdelik değeri alındı: {message}")
-        elif message.startswith("STATUS: AUTO"):
-            try:
-                parts = message.split(", ")
-                temp_part = parts[1].split("=")[1].replace(" C", "")
-                percentage_part = parts[2].split("=")[1]
-
-                self.current_mode_label.config(text="Mevcut Mod: Otomatik")
-                self.temp_label.config(text=f"Sıcaklık: {temp_part} °C")
-                self.pwm_progressbar['value'] = int(percentage_part)
-                self.pwm_value = int(percentage_part)
-                self.pwm_value_label.config(text=f"PWM Değeri: {percentage_part} %")
-                self.pwm_progressbar.unbind("<Button-1>")  # Otomatik modda tıklama olayını kaldır
-                self.auto_button.config(style='Active.TButton')
-                self.manual_button.config(style='Inactive.TButton')
-            except (ValueError, IndexError):
-                self.log_message("Hata: Geçersiz STATUS: AUTO mesajı alındı.")
-        elif message.startswith("STATUS: MANUAL"):
-            try:
-                parts = message.split(", ")
-                percentage_part = parts[1].split("=")[1]
-                self.current_mode_label.config(text="Mevcut Mod: Manuel")
-                self.pwm_progressbar['value'] = int(percentage_part)
-                self.pwm_value = int(percentage_part)
-                self.pwm_value_label.config(text=f"PWM Değeri: {percentage_part} %")
-                self.pwm_progressbar.bind("<Button-1>", self.on_progressbar_click)  # Manuel modda tıklama olayını bağla
-                self.auto_button.config(style='Inactive.TButton')
-                self.manual_button.config(style='Active.TButton')
-            except (ValueError, IndexError):
-                self.log_message("Hata: Geçersiz STATUS: MANUAL mesajı alındı.")
-        elif "ERROR" in message:
-            messagebox.showerror("STM32 Hatası", message)
-        elif "OK: Motor Direction ->" in message:
-            pass
+        """Ayrıştırılmış mesajı (okuma thread'inde veya oynatmada çözülmüş) ilgili işleyiciye verir."""
+        handler = self.message_handlers.get(type(message))
+        if handler:
+            handler(message)
+
+    def show_mode(self, mode):
+        # Her STATUS: satırında çağrılır; ViewModel stil ve bağlamayı yalnızca mod değişince uygular
+        if mode == MODE_AUTO:
+            self.view.set(self.current_mode_label, text="Mevcut Mod: Otomatik")
+            self.view.bind(self.pwm_progressbar, "<Button-1>", None)  # Otomatik modda tıklama olayını kaldır
+            self.view.set(self.auto_button, style='Active.TButton')
+            self.view.set(self.manual_button, style='Inactive.TButton')
+        else:
+            self.view.set(self.current_mode_label, text="Mevcut Mod: Manuel")
+            # Manuel modda tıklama olayını bağla
+            self.view.bind(self.pwm_progressbar, "<Button-1>", self.on_progressbar_click)
+            self.view.set(self.auto_button, style='Inactive.TButton')
+            self.view.set(self.manual_button, style='Active.TButton')
+
+    def show_pwm(self, percentage_value):
+        self.pwm_value = percentage_value
+        self.view.set(self.pwm_progressbar, value=percentage_value)
+        self.view.set(self.pwm_value_label, text=f"PWM Değeri: {percentage_value} %")
+
+    def on_mode_ack(self, message):
+        self.show_mode(message.mode)
+
+    def on_pwm_ack(self, message):
+        self.show_pwm(message.pwm)
+
+    def on_auto_status(self, message):
+        self.alarm_bar.handle(self.alarms.observe(self.current_device(), True,
+                                                  {'temperature': message.temperature, 'pwm': message.pwm}))
+        self.view.set(self.temp_label, text=f"Sıcaklık: {message.temperature_text} °C")
+        self.show_pwm(message.pwm)
+        self.show_mode(MODE_AUTO)
+
+    def on_manual_status(self, message):
+        self.alarm_bar.handle(self.alarms.observe(self.current_device(), True, {'pwm': message.pwm}))
+        self.show_pwm(message.pwm)
+        self.show_mode(MODE_MANUAL)
+
+    def on_mcu_error(self, message):
+        # Modal messagebox Tk döngüsünü bloklardı; hata şeritte gösterilip loglanır
+        self.alarm_bar.handle([self.alarms.device_error(self.current_device(), message.text)])
+
+    def on_malformed(self, message):
+        if message.kind == 'PwmAck':
+            self.log_message(f"Hata: Geçersiz yüzdelik değeri alındı: {message.text}")
+        else:
+            self.log_message(f"Hata: Geçersiz {message.kind} mesajı alındı: {message.text}")
+
+    def current_device(self):
+        if self.controller:
+            return self.controller.port
+        return self.replay_port or 'unknown'
+
+    def start_replay(self, path, speed=1.0, port=None):
+        """Kaydedilmiş seri trafiği porta bağlanmadan, canlı porttan gelmiş gibi işler.
+
+        Gelen satırlar ayrıştırılıp, kayıttaki komutlar gönderim olayı olarak canlı
+        bağlantının kuyruğuna verilir; böylece çizim canlıdaki yoldan geçer. Kayıtta birden
+        fazla port varsa `port` verilmezse ilk port oynatılır.
+        """
+        if port is None:
+            port = next((record.device for record in read_capture(path, SOURCE_SERIAL)), None)
+        self.replay_port = port
+
+        def deliver(record):
+            if record.direction == DIRECTION_RX:
+                self.manager.inbox.put((port, 'line', (record.data, self.parser.parse(record.data))))
+            else:
+                self.manager.inbox.put((port, 'writer', ('sent', record.data, '')))
+            self.dispatcher.notify()
+
+        def finished(count, elapsed):
+            self.manager.inbox.put((port, 'writer', ('replay', None,
+                                                     f"Kayıt oynatma bitti: {count} olay, {elapsed:.2f} sn")))
+            self.dispatcher.notify()
+
+        self.log_message(f"Kayıt oynatılıyor: {path} ({port}, {speed:g}x)")
+        self.replayer = CaptureReplayer(read_capture(path, SOURCE_SERIAL, port), deliver, speed, finished)
+        self.replayer.start()
+
+    def check_stale_channels(self):
+        self.alarm_bar.handle(self.alarms.check_stale())
+        self.master.after(STALE_CHECK_INTERVAL_MS, self.check_stale_channels)
 
     def log_message(self, message):
-        self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, message + '\n')
-        self.log_text.see(tk.END)
-        self.log_text.config(state='disabled')
+        self.log_view.append(message)
 
     def send_command_to_mcu(self, command):
-        if self.serial_port and self.serial_port.is_open:
-            try:
-                self.log_message(f"GUI -> MCU: {command}")
-                self.serial_port.write(f"{command}\n".encode('utf-8'))
-                time.sleep(0.1)
-            except Exception as e:
-                self.log_message(f"Hata: Komut gönderilemedi: {e}")
-                self.disconnect_serial()
+        # Yazma işlemi gönderim thread'inde yapılır; arayüz seri port için beklemez
+        if self.controller and self.controller.connected:
+            self.controller.send(command)
         else:
             messagebox.showerror("Bağlantı Yok", "Lütfen önce seri porta bağlanın.")
 
@@ -268,17 +350,41 @@ class FanControlGUI:
         if new_percentage > 100: new_percentage = 100
 
         # UI'ı ve MCU'ya komutu gönder
-        self.pwm_progressbar['value'] = new_percentage
         self.pwm_value = new_percentage
-        self.pwm_value_label.config(text=f"PWM Değeri: {new_percentage} %")
+        self.view.set(self.pwm_progressbar, value=new_percentage)
+        self.view.set(self.pwm_value_label, text=f"PWM Değeri: {new_percentage} %")
         self.send_command_to_mcu(f"P={new_percentage}")
 
     def on_closing(self):
         self.disconnect_serial()
+        if self.replayer:
+            self.replayer.stop()
+        if self.capture:
+            self.capture.close()
+        self.view.cancel()
+        self.log_view.close()
         self.master.destroy()
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="STM32 Fan Kontrol Arayüzü")
+    arg_parser.add_argument('--log-file', help="Seri port logunun tamamını bu dosyaya da yaz (dönen dosya)")
+    arg_parser.add_argument('--log-lines', type=int, default=1000, help="Log penceresinde tutulacak satır sayısı")
+    arg_parser.add_argument('--alarms', default='alarms.ini', help="Alarm kuralları dosyası (varsayılan: alarms.ini)")
+    arg_parser.add_argument('--capture', help="Seri trafiği (komutlar ve gelen satırlar) bu dosyaya kaydet")
+    arg_parser.add_argument('--binary', action='store_true',
+                            help="MCU destekliyorsa STATUS mesajlarını ikili çerçeveyle al (yoksa metin protokolü)")
+    arg_parser.add_argument('--replay', help="Porta bağlanmak yerine kayıt dosyasını oynat")
+    arg_parser.add_argument('--replay-port', help="Kayıtta birden fazla port varsa oynatılacak port")
+    arg_parser.add_argument('--speed', type=float, default=1.0,
+                            help="Oynatma hızı: 1 gerçek zaman, 10 on kat hızlı, 0 beklemeden (varsayılan: 1)")
+    metrics.add_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    metrics.start_exporters(args)
+
     root = tk.Tk()
-    app = FanControlGUI(root)
+    app = FanControlGUI(root, log_file=args.log_file, log_max_lines=args.log_lines, alarm_rules=args.alarms,
+                        capture=CaptureWriter(args.capture) if args.capture else None, binary=args.binary)
+    if args.replay:
+        app.start_replay(args.replay, args.speed, args.replay_port)
     root.mainloop()
\ No newline at end of file
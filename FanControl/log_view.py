@@ -0,0 +1,69 @@
+import logging
+import logging.handlers
+import tkinter as tk
+from collections import deque
+
+
+class LogView:
+    """tk.Text için satır sınırlı, toplu güncellenen log modeli.
+
+    `append` yalnızca satırı bekleyen listeye ekler; widget en fazla
+    `flush_interval_ms`'de bir, tek bir insert ile güncellenir ve `max_lines`'ı
+    aşan eski satırlar silinir. `log_file` verilirse tüm log ayrıca dönen
+    (rotating) bir dosyaya yazılır.
+    """
+
+    def __init__(self, text_widget, max_lines=1000, flush_interval_ms=50, log_file=None,
+                 max_bytes=5 * 1024 * 1024, backup_count=3):
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.flush_interval_ms = flush_interval_ms
+        self.lines = deque(maxlen=max_lines)  # Widget'ta görünen satırların modeli
+        self._pending = []
+        self._flush_scheduled = False
+
+        self._file_logger = None
+        if log_file:
+            handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                                           backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._file_logger = logging.getLogger(f'serial_log.{id(self)}')
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.propagate = False
+            self._file_logger.addHandler(handler)
+
+    def append(self, message):
+        """Satırı ekler; widget bir sonraki karede güncellenir (Tk thread'inden çağrılmalı)."""
+        self._pending.append(message)
+        self.lines.append(message)
+        if self._file_logger:
+            self._file_logger.info(message)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.text.after(self.flush_interval_ms, self.flush)
+
+    def flush(self):
+        """Bekleyen satırları tek seferde widget'a yazar ve fazla satırları kırpar."""
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        # Sınırı aşan bir patlamada zaten silinecek satırlar hiç yazılmaz
+        lines = self._pending[-self.max_lines:]
+        self._pending.clear()
+
+        at_bottom = self.text.yview()[1] >= 0.999
+        self.text.config(state='normal')
+        self.text.insert(tk.END, '\n'.join(lines) + '\n')
+        line_count = int(self.text.index('end-1c').split('.')[0]) - 1
+        if line_count > self.max_lines:
+            self.text.delete('1.0', f'{line_count - self.max_lines + 1}.0')
+        self.text.config(state='disabled')
+        # Kullanıcı yukarı kaydırdıysa görünümü zorla en alta çekme
+        if at_bottom:
+            self.text.see(tk.END)
+
+    def close(self):
+        if self._file_logger:
+            for handler in list(self._file_logger.handlers):
+                handler.close()
+                self._file_logger.removeHandler(handler)
@@ -0,0 +1,249 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+from common import metrics
+from common.alarm_bar import AlarmBar
+from common.alarms import AlarmEngine, load_alarm_rules
+from common.capture import CaptureWriter
+from common.view_model import ViewModel
+from binary_protocol import BINARY_COMMAND
+from controller_manager import ControllerManager
+from log_view import LogView
+from port_scan import PortScanner
+from stm32_protocol import AutoStatus, ManualStatus, Error, Malformed, MODE_AUTO, MODE_MANUAL, format_message
+from ui_dispatch import InboxDispatcher, reap_closed
+
+DRAIN_MAX_MESSAGES = 500         # Bir karede işlenecek en fazla mesaj (tüm portlar için)
+DRAIN_BUDGET_S = 0.010           # Bir karede kuyruk boşaltmaya ayrılan süre
+STALE_CHECK_INTERVAL_MS = 1000   # Veri gelmeyen kanalların kontrol edilme aralığı
+
+MODE_TEXT = {MODE_AUTO: "Otomatik", MODE_MANUAL: "Manuel", None: "--"}
+
+
+class MultiFanControlGUI:
+    """Birden fazla STM32 fan kontrolcüsünü tek pencereden yöneten arayüz."""
+
+    def __init__(self, master, log_file=None, log_max_lines=2000, alarm_rules='alarms.ini', capture=None,
+                 binary=False):
+        self.master = master
+        self.master.title("STM32 Çoklu Fan Kontrol Arayüzü")
+        self.master.geometry("760x670")
+        self.capture = capture
+        self.manager = ControllerManager(capture=capture, binary=binary)
+        self.log_file = log_file
+        self.log_max_lines = log_max_lines
+        self.alarms = AlarmEngine(*load_alarm_rules(alarm_rules))
+        # Tablo satırları yalnızca değiştiklerinde ve kare başına en fazla bir kez yeniden çizilir
+        self.view = ViewModel(master, name='multi_fan_controller')
+        self.ui_update_seconds = metrics.UI_UPDATE_SECONDS.labels('multi_fan_controller')
+        metrics.UI_QUEUE_DEPTH.labels('multi_fan_controller').set_function(self.manager.inbox.qsize)
+
+        self.setup_ui()
+        self.check_stale_channels()
+
+    def setup_ui(self):
+        style = ttk.Style()
+        style.theme_use('clam')
+        style.configure('TButton', font=('Helvetica', 10), padding=6)
+        style.configure('TLabel', font=('Helvetica', 10))
+
+        self.alarm_bar = AlarmBar(self.master, log=self.log_message)
+        self.alarm_bar.pack(side=tk.TOP, fill="x")
+
+        port_frame = ttk.LabelFrame(self.master, text="Seri Portlar", padding=10)
+        port_frame.pack(pady=5, padx=20, fill="x")
+
+        self.port_listbox = tk.Listbox(port_frame, selectmode=tk.MULTIPLE, height=4, exportselection=False)
+        self.port_listbox.grid(row=0, column=0, rowspan=3, padx=5, pady=2, sticky="nsew")
+        port_frame.columnconfigure(0, weight=1)
+        ttk.Button(port_frame, text="Yenile", command=self.refresh_ports).grid(row=0, column=1, padx=5, pady=2,
+                                                                                 sticky="ew")
+        ttk.Button(port_frame, text="Seçilenlere Bağlan", command=self.connect_selected).grid(
+            row=1, column=1, padx=5, pady=2, sticky="ew")
+        ttk.Button(port_frame, text="Seçili Cihazları Ayır", command=self.disconnect_selected).grid(
+            row=2, column=1, padx=5, pady=2, sticky="ew")
+        self.port_scanner = PortScanner(self.master, self.on_ports_scanned)
+        self.refresh_ports()
+
+        table_frame = ttk.LabelFrame(self.master, text="Fan Kontrolcüleri", padding=10)
+        table_frame.pack(pady=5, padx=20, fill="both", expand=True)
+        columns = ('mode', 'temperature', 'pwm', 'status')
+        self.device_table = ttk.Treeview(table_frame, columns=columns, height=6)
+        self.device_table.heading('#0', text="Port")
+        self.device_table.heading('mode', text="Mod")
+        self.device_table.heading('temperature', text="Sıcaklık (°C)")
+        self.device_table.heading('pwm', text="PWM (%)")
+        self.device_table.heading('status', text="Durum")
+        self.device_table.column('#0', width=120)
+        for column, width in zip(columns, (90, 100, 70, 260)):
+            self.device_table.column(column, width=width, anchor='center' if column != 'status' else 'w')
+        self.device_table.pack(fill="both", expand=True)
+
+        group_frame = ttk.LabelFrame(self.master, text="Komutlar (tabloda seçim yoksa tüm cihazlara)", padding=10)
+        group_frame.pack(pady=5, padx=20, fill="x")
+        ttk.Button(group_frame, text="Otomatik Mod", command=lambda: self.send_to_targets("A")).pack(
+            side=tk.LEFT, padx=5)
+        ttk.Button(group_frame, text="Manuel Mod", command=lambda: self.send_to_targets("M")).pack(
+            side=tk.LEFT, padx=5)
+        ttk.Label(group_frame, text="PWM (%):").pack(side=tk.LEFT, padx=(20, 5))
+        self.pwm_spinbox = ttk.Spinbox(group_frame, from_=0, to=100, width=5)
+        self.pwm_spinbox.set(50)
+        self.pwm_spinbox.pack(side=tk.LEFT)
+        ttk.Button(group_frame, text="PWM Uygula", command=self.apply_pwm).pack(side=tk.LEFT, padx=5)
+
+        log_frame = ttk.LabelFrame(self.master, text="Seri Port Logu", padding=10)
+        log_frame.pack(pady=5, padx=20, fill="both", expand=True)
+        self.log_text = tk.Text(log_frame, height=10, width=80, state='disabled', font=('Consolas', 9))
+        self.log_text.pack(fill="both", expand=True)
+        self.log_view = LogView(self.log_text, max_lines=self.log_max_lines, log_file=self.log_file)
+
+        self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.dispatcher = InboxDispatcher(self.master, self.manager.inbox, self.handle_inbox_item,
+                                          DRAIN_MAX_MESSAGES, DRAIN_BUDGET_S, self.ui_update_seconds.observe)
+        self.manager.notify = self.dispatcher.notify
+
+    def refresh_ports(self):
+        # Port listesi arka planda çıkarılır; pencere taramayı beklemeden açılır
+        self.port_scanner.scan()
+
+    def on_ports_scanned(self, port_names):
+        self.port_listbox.delete(0, tk.END)
+        for port in port_names:
+            self.port_listbox.insert(tk.END, port)
+
+    def connect_selected(self):
+        ports = [self.port_listbox.get(i) for i in self.port_listbox.curselection()]
+        if not ports:
+            messagebox.showwarning("Uyarı", "Lütfen en az bir port seçin.")
+            return
+        self.connect_ports(ports)
+
+    def connect_ports(self, ports):
+        import serial  # pyserial ilk bağlantıda yüklenir
+        for port in ports:
+            try:
+                self.manager.open(port)
+            except serial.SerialException as e:
+                self.log_message(f"{port}: Seri porta bağlanılamadı: {e}")
+                continue
+            if not self.device_table.exists(port):
+                self.device_table.insert('', tk.END, iid=port, text=port)
+            self.update_row(port, "Bağlı, Manuel Mod Başlatılıyor...")
+            self.log_message(f"{port}: Seri porta başarıyla bağlandı")
+            self.manager.send(port, "M")
+
+    def disconnect_selected(self):
+        for port in self.target_ports():
+            self.disconnect_port(port, "Bağlantı kesildi.")
+
+    def disconnect_port(self, port, reason):
+        self.manager.close(port)
+        reap_closed(self.master, self.manager)
+        self.view.forget((self.device_table, port))
+        self.alarm_bar.handle(self.alarms.forget(port))
+        if self.device_table.exists(port):
+            self.device_table.delete(port)
+        self.log_message(f"{port}: {reason}")
+
+    def target_ports(self):
+        """Tabloda seçili portlar; seçim yoksa tüm bağlı portlar."""
+        selected = list(self.device_table.selection())
+        return selected or list(self.manager.controllers)
+
+    def send_to_targets(self, command):
+        ports = self.target_ports()
+        if not ports:
+            messagebox.showerror("Bağlantı Yok", "Lütfen önce en az bir seri porta bağlanın.")
+            return
+        self.manager.broadcast(command, ports)
+
+    def apply_pwm(self):
+        try:
+            value = max(0, min(100, int(self.pwm_spinbox.get())))
+        except ValueError:
+            messagebox.showwarning("Uyarı", "PWM değeri 0-100 arasında bir tam sayı olmalı.")
+            return
+        self.send_to_targets(f"P={value}")
+
+    def handle_inbox_item(self, port, kind, data):
+        controller = self.manager.controllers.get(port)
+        if controller is None:
+            return  # Bağlantısı kesilmiş bir porttan kalan mesaj
+        if kind == 'line':
+            line, message = data
+            # İkili çerçevelerin metni yalnızca loglanırken üretilir
+            self.log_message(f"{port}: {line or format_message(message)}")
+            if controller.apply(message):
+                self.update_row(port, "Hata" if isinstance(message, (Error, Malformed)) else "Veri OK")
+            if isinstance(message, (AutoStatus, ManualStatus)):
+                values = {'pwm': message.pwm}
+                if isinstance(message, AutoStatus):
+                    values['temperature'] = message.temperature
+                self.alarm_bar.handle(self.alarms.observe(port, True, values))
+            elif isinstance(message, Error):
+                self.alarm_bar.handle([self.alarms.device_error(port, message.text)])
+        elif kind == 'writer':
+            event_kind, command, detail = data
+            if command == BINARY_COMMAND and event_kind in ('ack', 'nack', 'timeout'):
+                self.log_message(f"{port}: İkili STATUS çerçeveleri etkin." if event_kind == 'ack' else
+                                 f"{port}: MCU ikili çerçeveleri desteklemiyor; metin protokolüyle devam ediliyor.")
+            elif event_kind == 'sent':
+                self.log_message(f"GUI -> {port}: {command}")
+            elif event_kind == 'timeout':
+                self.log_message(f"{port}: Uyarı: '{command}' komutu için MCU onayı gelmedi.")
+            elif event_kind == 'error':
+                self.disconnect_port(port, f"Hata: Komut gönderilemedi: {detail}")
+        elif kind == 'read_error':
+            self.disconnect_port(port, f"Hata (Seri Okuma): {data}")
+
+    def update_row(self, port, status):
+        controller = self.manager.controllers.get(port)
+        if controller is None or not self.device_table.exists(port):
+            return
+        if controller.last_error and status == "Hata":
+            status = f"Hata: {controller.last_error}"
+        self.view.set_item(self.device_table, port, values=(
+            MODE_TEXT.get(controller.mode, "--"),
+            f"{controller.temperature:.2f}" if controller.temperature is not None else "--",
+            controller.pwm if controller.pwm is not None else "--",
+            status,
+        ))
+
+    def check_stale_channels(self):
+        self.alarm_bar.handle(self.alarms.check_stale())
+        self.master.after(STALE_CHECK_INTERVAL_MS, self.check_stale_channels)
+
+    def log_message(self, message):
+        self.log_view.append(message)
+
+    def on_closing(self):
+        self.manager.close_all()
+        if self.capture:
+            self.capture.close()
+        self.view.cancel()
+        self.log_view.close()
+        self.master.destroy()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="STM32 Çoklu Fan Kontrol Arayüzü")
+    arg_parser.add_argument('--log-file', help="Seri port logunun tamamını bu dosyaya da yaz (dönen dosya)")
+    arg_parser.add_argument('--log-lines', type=int, default=2000, help="Log penceresinde tutulacak satır sayısı")
+    arg_parser.add_argument('--connect', nargs='*', default=[], help="Açılışta bağlanılacak portlar")
+    arg_parser.add_argument('--alarms', default='alarms.ini', help="Alarm kuralları dosyası (varsayılan: alarms.ini)")
+    arg_parser.add_argument('--capture', help="Tüm portların seri trafiğini bu dosyaya kaydet")
+    arg_parser.add_argument('--binary', action='store_true',
+                            help="MCU destekliyorsa STATUS mesajlarını ikili çerçeveyle al (yoksa metin protokolü)")
+    metrics.add_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    metrics.start_exporters(args)
+
+    root = tk.Tk()
+    app = MultiFanControlGUI(root, log_file=args.log_file, log_max_lines=args.log_lines, alarm_rules=args.alarms,
+                             capture=CaptureWriter(args.capture) if args.capture else None, binary=args.binary)
+    app.connect_ports(args.connect)
+    root.mainloop()
@@ -0,0 +1,47 @@
+import threading
+
+
+def list_port_names():
+    """Sistemdeki seri portların adlarını döndürür."""
+    from serial.tools import list_ports  # Yalnızca tarama sırasında yüklenir
+    return [port.device for port in list_ports.comports()]
+
+
+class PortScanner:
+    """Seri port listesini arka plan thread'inde çıkarır ve sonucu Tk thread'inde `callback`'e verir.
+
+    Windows'ta comports() sürücü sayısına göre uzun sürebilir; pencere bu sırada
+    açılır ve tepki vermeye devam eder.
+    """
+
+    def __init__(self, master, callback, poll_ms=50):
+        self.master = master
+        self.callback = callback
+        self.poll_ms = poll_ms
+        self._result = None
+        self._thread = None
+
+    @property
+    def scanning(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def scan(self):
+        if self.scanning:
+            return  # Devam eden tarama bitince sonuç zaten verilecek
+        self._result = None
+        self._thread = threading.Thread(target=self._run, name='port-scan', daemon=True)
+        self._thread.start()
+        self.master.after(self.poll_ms, self._check)
+
+    def _run(self):
+        try:
+            self._result = list_port_names()
+        except Exception as e:
+            print(f"Seri portlar listelenemedi: {e}")
+            self._result = []
+
+    def _check(self):
+        if self.scanning:
+            self.master.after(self.poll_ms, self._check)
+            return
+        self.callback(self._result)
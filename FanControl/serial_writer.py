@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict
+
+from common.capture import DIRECTION_RX, DIRECTION_TX, SOURCE_SERIAL
+from binary_protocol import BINARY_COMMAND
+from common.metrics import REGISTRY
+from stm32_protocol import format_message
+
+# Komut -> MCU'nun onay satırının başlangıcı
+ACK_PREFIXES = {
+    'A': 'OK: AUTO MODE',
+    'M': 'OK: MANUAL MODE',
+    'P=': 'OK: P=',
+    'B': 'OK: BINARY MODE',
+}
+# Cevabı (OK: veya ERROR) yalnızca gönderim hattını ilgilendiren komutlar; eski firmware'in
+# B'ye verdiği ERROR bir cihaz hatası değildir, satır arayüze iletilmez
+NEGOTIATION_COMMANDS = (BINARY_COMMAND,)
+
+# --- Ölçümler ---
+QUEUE_SECONDS = REGISTRY.histogram('serial_command_queue_seconds', "Komutun send() ile porta yazılması arası süre",
+                                   ('port',))
+ROUNDTRIP_SECONDS = REGISTRY.histogram('serial_roundtrip_seconds', "Komutun yazılmasından MCU cevabına kadar süre",
+                                       ('port',))
+COMMAND_EVENTS = REGISTRY.counter('serial_command_events_total', "Gönderim hattı olayları (sent, ack, nack, timeout, error)",
+                                  ('port', 'event'))
+PENDING_COMMANDS = REGISTRY.gauge('serial_pending_commands', "Gönderilmeyi bekleyen komut sayısı", ('port',))
+LINES_READ = REGISTRY.counter('serial_lines_total', "Seri porttan okunan satır ve ikili çerçeve sayısı", ('port',))
+
+
+def command_slot(command):
+    """Birbirinin yerine geçen komutlar aynı yuvayı paylaşır (ör. tüm P= komutları)."""
+    if command.startswith('P='):
+        return 'pwm'
+    if command in ('A', 'M'):
+        return 'mode'
+    return command
+
+
+def expected_ack(command):
+    for prefix, ack in ACK_PREFIXES.items():
+        if command == prefix or (prefix.endswith('=') and command.startswith(prefix)):
+            return ack
+    return None
+
+
+class CommandWriter:
+    """Seri porta komutları ayrı bir thread'den yazan gönderim hattı.
+
+    - Henüz gönderilmemiş, yerine yenisi gelen komutlar birleştirilir; ilerleme
+      çubuğunda sürüklerken yalnızca son P= değeri gider.
+    - İki yazma arasında en az `min_interval` saniye beklenir.
+    - Onay bekleyen komut için MCU'nun `OK:` satırı `ack_timeout` süresince beklenir.
+
+    Olaylar `events` kuyruğuna (tür, komut, ayrıntı) olarak konur:
+    'sent', 'ack', 'nack', 'timeout', 'error'. Her olaydan sonra varsa `notify`
+    çağrılır. `capture` (CaptureWriter) verilirse porta yazılan her komut ve
+    okunan her satır kayda geçer.
+    """
+
+    def __init__(self, serial_port, events, min_interval=0.1, ack_timeout=1.0, notify=None, capture=None):
+        self.serial_port = serial_port
+        self.events = events
+        self.notify = notify
+        self.capture = capture
+        self.min_interval = min_interval
+        self.ack_timeout = ack_timeout
+
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._awaiting = None  # Onayı beklenen satır başlangıcı
+        self._awaiting_command = None
+        self._reply = None
+        self._running = False
+        self._last_write = 0.0
+        self._thread = None
+        self.port_name = getattr(serial_port, 'port', None) or 'unknown'
+
+    def start(self):
+        PENDING_COMMANDS.labels(self.port_name).set_function(lambda: len(self._pending))
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='serial-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Thread'e durmasını bildirir, beklemez; Tk thread'inden çağrılabilir (bkz. `alive`)."""
+        with self._cond:
+            self._running = False
+            self._pending.clear()
+            self._cond.notify_all()
+        PENDING_COMMANDS.remove(self.port_name)
+
+    @property
+    def alive(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def send(self, command):
+        """Komutu kuyruğa ekler, hemen döner; aynı yuvadaki bekleyen komutun yerini alır."""
+        with self._cond:
+            slot = command_slot(command)
+            self._pending.pop(slot, None)
+            self._pending[slot] = (command, time.perf_counter())
+            self._cond.notify_all()
+
+    def handle_line(self, line):
+        """Okuma thread'i her satırı buraya da iletir; bekleyen komutun onayı aranır.
+
+        Satır bir müzakere komutunun (NEGOTIATION_COMMANDS) cevabıysa True döner; okuma
+        thread'i bu satırı arayüze iletmez, sonucu 'ack'/'nack' olayıyla bildirilir.
+        """
+        if self.capture:
+            self.capture.record(SOURCE_SERIAL, self.port_name, DIRECTION_RX, line)
+        with self._cond:
+            if self._awaiting and (line.startswith(self._awaiting) or "ERROR" in line):
+                self._reply = line
+                self._cond.notify_all()
+                return self._awaiting_command in NEGOTIATION_COMMANDS
+        return False
+
+    def handle_frame(self, message):
+        """İkili çerçeveden çözülen mesaj; onay taşımaz, kayıt açıksa metin karşılığıyla kaydedilir."""
+        if self.capture:
+            self.capture.record(SOURCE_SERIAL, self.port_name, DIRECTION_RX, format_message(message))
+
+    def _emit(self, event):
+        COMMAND_EVENTS.labels(self.port_name, event[0]).inc()
+        self.events.put(event)
+        if self.notify:
+            self.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or not self._running)
+                if not self._running:
+                    return
+                _slot, (command, queued_at) = self._pending.popitem(last=False)
+
+            delay = self._last_write + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            ack = expected_ack(command)
+            with self._cond:
+                self._awaiting, self._awaiting_command = ack, command
+                self._reply = None
+            try:
+                self.serial_port.write(f"{command}\n".encode('utf-8'))
+            except Exception as e:
+                if self._running:  # stop() sonrası kapatılan porta yazma hatası değildir
+                    self._emit(('error', command, str(e)))
+                with self._cond:
+                    self._running = False
+                return
+            self._last_write = time.monotonic()
+            written_at = time.perf_counter()
+            if self.capture:
+                self.capture.record(SOURCE_SERIAL, self.port_name, DIRECTION_TX, command)
+            QUEUE_SECONDS.labels(self.port_name).observe(written_at - queued_at)
+            self._emit(('sent', command, ''))
+
+            if ack is None:
+                continue
+            with self._cond:
+                got_reply = self._cond.wait_for(lambda: self._reply is not None or not self._running,
+                                                timeout=self.ack_timeout)
+                reply, self._awaiting = self._reply, None
+            if not self._running:
+                return
+            if not got_reply:
+                self._emit(('timeout', command, ''))
+                continue
+            ROUNDTRIP_SECONDS.labels(self.port_name).observe(time.perf_counter() - written_at)
+            if "ERROR" in reply:
+                self._emit(('nack', command, reply))
+            else:
+                self._emit(('ack', command, reply))
@@ -0,0 +1,145 @@
+import argparse
+import os
+import pty
+import random
+import select
+import threading
+import time
+import tty
+
+from binary_protocol import BINARY_COMMAND, encode_auto_status, encode_manual_status
+
+
+class FakeStm32:
+    """Sahte bir seri port (pty) üzerinden STM32 fan kontrolcüsü protokolünü konuşur.
+
+    `port_name` fan_controller.py'de normal bir seri port gibi açılabilir. A/M/P=
+    komutlarına firmware gibi OK:/ERROR cevabı verir ve `status_interval` saniyede
+    bir STATUS: satırı gönderir. `binary_capable` ise B komutundan sonra STATUS
+    mesajlarını ikili çerçeveyle gönderir; değilse eski firmware gibi ERROR döner.
+    Yalnızca POSIX sistemlerde çalışır.
+    """
+
+    def __init__(self, status_interval=1.0, ack_delay=0.0, seed=None, binary_capable=True):
+        self.status_interval = status_interval
+        self.ack_delay = ack_delay
+        self.binary_capable = binary_capable
+        self.binary = False
+        self.rng = random.Random(seed)
+        self.mode = 'MANUAL'
+        self.pwm = 0
+        self.temperature = 25.0
+        self.commands = 0
+        self.lines_sent = 0
+
+        self._master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._slave_fd)
+        self.port_name = os.ttyname(self._slave_fd)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f'fake-stm32-{self.port_name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+        os.close(self._master_fd)
+        os.close(self._slave_fd)
+
+    def _send(self, line):
+        os.write(self._master_fd, (line + '\r\n').encode('utf-8'))
+        self.lines_sent += 1
+
+    def _send_status(self):
+        self.temperature = max(15.0, min(45.0, self.temperature + self.rng.uniform(-0.2, 0.2)))
+        if self.mode == 'AUTO':
+            self.pwm = max(0, min(100, int((self.temperature - 25.0) * 10)))
+        if self.binary:
+            frame = (encode_auto_status(self.temperature, self.pwm) if self.mode == 'AUTO'
+                     else encode_manual_status(self.pwm))
+            os.write(self._master_fd, frame)
+            self.lines_sent += 1
+        elif self.mode == 'AUTO':
+            self._send(f"STATUS: AUTO, T={self.temperature:.2f} C, P={self.pwm}")
+        else:
+            self._send(f"STATUS: MANUAL, P={self.pwm}")
+
+    def handle_command(self, command):
+        self.commands += 1
+        if self.ack_delay:
+            time.sleep(self.ack_delay)
+        if command == 'A':
+            self.mode = 'AUTO'
+            return "OK: AUTO MODE"
+        if command == 'M':
+            self.mode = 'MANUAL'
+            return "OK: MANUAL MODE"
+        if command.startswith('P='):
+            try:
+                value = int(command[2:])
+            except ValueError:
+                return f"ERROR: Invalid PWM value: {command}"
+            if self.mode != 'MANUAL':
+                return "ERROR: PWM only in MANUAL mode"
+            self.pwm = max(0, min(100, value))
+            return f"OK: P={self.pwm}, Duty={self.pwm * 10}"
+        if command == BINARY_COMMAND and self.binary_capable:
+            self.binary = True
+            return "OK: BINARY MODE"
+        return f"ERROR: Unknown command: {command}"
+
+    def _run(self):
+        buffer = b''
+        next_status = time.monotonic() + self.status_interval
+        while self._running:
+            timeout = max(0.0, next_status - time.monotonic()) if self.status_interval else 0.1
+            readable, _, _ = select.select([self._master_fd], [], [], min(timeout, 0.1))
+            if readable:
+                try:
+                    buffer += os.read(self._master_fd, 4096)
+                except OSError:
+                    return
+                while b'\n' in buffer:
+                    raw, buffer = buffer.split(b'\n', 1)
+                    command = raw.decode('utf-8', errors='replace').strip()
+                    if command:
+                        self._send(self.handle_command(command))
+            if self.status_interval and time.monotonic() >= next_status:
+                self._send_status()
+                next_status += self.status_interval
+                if next_status < time.monotonic():  # Geride kaldıysak biriktirme
+                    next_status = time.monotonic() + self.status_interval
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte STM32 fan kontrolcüsü (pty)")
+    parser.add_argument('--count', type=int, default=1, help="Açılacak sahte kontrolcü sayısı")
+    parser.add_argument('--status-hz', type=float, default=1.0, help="Saniyedeki STATUS: satırı sayısı (0: kapalı)")
+    parser.add_argument('--ack-delay', type=float, default=0.0, help="Komut cevabından önceki gecikme (sn)")
+    parser.add_argument('--text-only', action='store_true', help="İkili çerçeveleri desteklemeyen eski firmware gibi davran")
+    args = parser.parse_args()
+
+    interval = 1.0 / args.status_hz if args.status_hz else 0
+    devices = [FakeStm32(interval, args.ack_delay, seed=i, binary_capable=not args.text_only).start()
+               for i in range(args.count)]
+    # İlk satırlar port adlarıdır; bench_serial.py bunları okur
+    for device in devices:
+        print(device.port_name, flush=True)
+    print("HAZIR", flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for device in devices:
+            device.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+# --- STM32 Seri Protokolü ---
+# Host -> MCU:  A (otomatik mod), M (manuel mod), P=<0-100> (manuel PWM yüzdesi),
+#               B (STATUS mesajlarını ikili çerçeveyle gönder, bkz. binary_protocol.py)
+# MCU -> Host:  OK: AUTO MODE | OK: MANUAL MODE | OK: P=<yüzde>[,...] | OK: Motor Direction -> <yön>
+#               OK: BINARY MODE | STATUS: AUTO, T=<sıcaklık> C, P=<yüzde> | STATUS: MANUAL, P=<yüzde>
+#               ... ERROR ...
+
+MODE_AUTO = 'auto'
+MODE_MANUAL = 'manual'
+
+
+@dataclass(frozen=True)
+class ModeAck:
+    mode: str
+
+
+@dataclass(frozen=True)
+class PwmAck:
+    pwm: int
+
+
+@dataclass(frozen=True)
+class DirectionAck:
+    direction: str
+
+
+@dataclass(frozen=True)
+class FramingAck:
+    """MCU'nun STATUS mesajlarını ikili çerçeveyle göndermeye geçtiğinin onayı."""
+
+
+@dataclass(frozen=True)
+class AutoStatus:
+    temperature: float
+    pwm: int
+    raw_text: str = None  # Metin satırında MCU'nun gönderdiği biçim (ör. "27.50"); ikili çerçevede None
+
+    @property
+    def temperature_text(self):
+        """Gösterilecek sıcaklık metni; ikili çerçevelerde yalnızca istendiğinde üretilir."""
+        return self.raw_text if self.raw_text is not None else f"{self.temperature:.2f}"
+
+
+@dataclass(frozen=True)
+class ManualStatus:
+    pwm: int
+
+
+@dataclass(frozen=True)
+class Error:
+    text: str
+
+
+@dataclass(frozen=True)
+class Malformed:
+    """Bilinen bir önekle başlayan ama alanları çözülemeyen satır."""
+    kind: str
+    text: str
+
+
+@dataclass(frozen=True)
+class Unknown:
+    text: str
+
+
+_PWM_ACK = re.compile(r'OK: P=\s*(-?\d+)')
+_AUTO_STATUS = re.compile(r'STATUS: AUTO, T=\s*(-?\d+(?:\.\d+)?)\s*C, P=\s*(-?\d+)')
+_MANUAL_STATUS = re.compile(r'STATUS: MANUAL, P=\s*(-?\d+)')
+_DIRECTION_ACK = 'OK: Motor Direction ->'
+
+
+def format_message(message):
+    """Mesajı MCU'nun metin protokolündeki satır biçimine çevirir (ikili çerçeveleri loglamak için)."""
+    if isinstance(message, AutoStatus):
+        return f"STATUS: AUTO, T={message.temperature_text} C, P={message.pwm}"
+    if isinstance(message, ManualStatus):
+        return f"STATUS: MANUAL, P={message.pwm}"
+    if isinstance(message, ModeAck):
+        return "OK: AUTO MODE" if message.mode == MODE_AUTO else "OK: MANUAL MODE"
+    if isinstance(message, PwmAck):
+        return f"OK: P={message.pwm}"
+    if isinstance(message, FramingAck):
+        return "OK: BINARY MODE"
+    if isinstance(message, DirectionAck):
+        return f"{_DIRECTION_ACK} {message.direction}"
+    return message.text
+
+
+class ProtocolParser:
+    """STM32'den gelen satırları tipli mesaj nesnelerine çeviren, önek tabanlı ayrıştırıcı.
+
+    Satır ilk iki karakterine göre tek bir işleyiciye yönlendirilir; düzenli ifadeler
+    modül yüklenirken derlenir. `stats` mesaj tiplerini ve hata sayaçlarını tutar.
+    """
+
+    def __init__(self):
+        self.stats = Counter()
+        self._dispatch = {
+            'OK': self._parse_ok,
+            'ST': self._parse_status,
+            'ER': self._parse_error,
+        }
+
+    def parse(self, line):
+        handler = self._dispatch.get(line[:2])
+        message = handler(line) if handler else None
+        if message is None:
+            # Başında gürültü olan hata satırları da yakalanır (eski davranış: "ERROR" in mesaj)
+            message = Error(line) if "ERROR" in line else Unknown(line)
+        self.stats[type(message).__name__] += 1
+        return message
+
+    def _parse_ok(self, line):
+        if line.startswith('OK: P='):
+            match = _PWM_ACK.match(line)
+            return PwmAck(int(match.group(1))) if match else Malformed('PwmAck', line)
+        if line.startswith('OK: AUTO MODE'):
+            return ModeAck(MODE_AUTO)
+        if line.startswith('OK: MANUAL MODE'):
+            return ModeAck(MODE_MANUAL)
+        if line.startswith('OK: BINARY MODE'):
+            return FramingAck()
+        if line.startswith(_DIRECTION_ACK):
+            return DirectionAck(line[len(_DIRECTION_ACK):].strip())
+        return None
+
+    def _parse_status(self, line):
+        if line.startswith('STATUS: AUTO'):
+            match = _AUTO_STATUS.match(line)
+            if not match:
+                return Malformed('AutoStatus', line)
+            return AutoStatus(float(match.group(1)), int(match.group(2)), match.group(1))
+        if line.startswith('STATUS: MANUAL'):
+            match = _MANUAL_STATUS.match(line)
+            return ManualStatus(int(match.group(1))) if match else Malformed('ManualStatus', line)
+        return None
+
+    def _parse_error(self, line):
+        return Error(line) if line.startswith('ERROR') else None
+
+    @property
+    def error_count(self):
+        return self.stats['Malformed'] + self.stats['Unknown']
@@ -0,0 +1,98 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from binary_protocol import (LinkDecoder, MAX_LINE, SYNC, encode_auto_status, encode_frame,
+                             encode_manual_status)
+from stm32_protocol import AutoStatus, ManualStatus, ProtocolParser, format_message
+
+
+class LinkDecoderTest(unittest.TestCase):
+    def setUp(self):
+        self.decoder = LinkDecoder()
+
+    def feed_bytewise(self, data):
+        messages = []
+        for i in range(len(data)):
+            messages += self.decoder.feed(data[i:i + 1])
+        return messages
+
+    def test_text_lines_and_frames_interleaved(self):
+        data = b"OK: AUTO MODE\r\n" + encode_auto_status(23.5, 40) + b"OK: P=10\n"
+        self.assertEqual(self.decoder.feed(data), [
+            ("OK: AUTO MODE", None),
+            (None, AutoStatus(23.5, 40)),
+            ("OK: P=10", None),
+        ])
+
+    def test_frame_split_across_reads(self):
+        frame = encode_auto_status(-5.25, 75)
+        messages = self.feed_bytewise(frame)
+        self.assertEqual(messages, [(None, AutoStatus(-5.25, 75))])
+
+        # Satır ve çerçeve sınırının ortasından bölünmüş okuma
+        data = b"OK: MANUAL MODE\n" + encode_manual_status(30)
+        self.assertEqual(self.decoder.feed(data[:10]), [])
+        self.assertEqual(self.decoder.feed(data[10:-1]), [("OK: MANUAL MODE", None)])
+        self.assertEqual(self.decoder.feed(data[-1:]), [(None, ManualStatus(30))])
+
+    def test_payload_containing_newline(self):
+        # PWM 10 = 0x0A; çerçeve içindeki bayt satır sonu sayılmamalı
+        frame = encode_manual_status(10)
+        self.assertIn(b'\n', frame)
+        self.assertEqual(self.decoder.feed(frame + b"OK: P=10\n"),
+                         [(None, ManualStatus(10)), ("OK: P=10", None)])
+        self.assertEqual(self.feed_bytewise(encode_auto_status(0.10, 10)),
+                         [(None, AutoStatus(0.1, 10))])
+
+    def test_crc_error_resyncs_on_next_frame(self):
+        bad = bytearray(encode_auto_status(25.0, 50))
+        bad[-1] ^= 0xFF
+        good = encode_manual_status(20)
+        self.assertEqual(self.decoder.feed(bytes(bad) + good), [(None, ManualStatus(20))])
+        self.assertEqual(self.decoder.stats['crc_error'], 1)
+
+    def test_corrupt_length_resyncs_inside_frame(self):
+        # Uzunluk baytı bozulunca CRC alanı sonraki çerçevenin içine düşer; iç SYNC'ten devam edilir
+        bad = bytes((SYNC, 200)) + encode_manual_status(20)
+        messages = self.decoder.feed(bad + bytes(200) + b"OK: P=20\n")
+        self.assertIn((None, ManualStatus(20)), messages)
+        self.assertGreaterEqual(self.decoder.stats['crc_error'], 1)
+
+    def test_garbage_before_frame_is_dropped(self):
+        self.assertEqual(self.decoder.feed(b"STA" + encode_manual_status(5)), [(None, ManualStatus(5))])
+        self.assertEqual(self.decoder.stats['resync'], 1)
+
+    def test_unknown_frame_type_is_skipped(self):
+        data = encode_frame(0x7F, b"\x01\x02") + encode_manual_status(1)
+        self.assertEqual(self.decoder.feed(data), [(None, ManualStatus(1))])
+        self.assertEqual(self.decoder.stats['unknown_frame'], 1)
+
+    def test_frames_decode_without_text(self):
+        # Sıcaklık metni çözümde üretilmez; yalnızca loglanırken/gösterilirken biçimlenir
+        (_, message), = self.decoder.feed(encode_auto_status(27.5, 40))
+        self.assertIsNone(message.raw_text)
+        self.assertNotIn('temperature_text', vars(message))
+        self.assertEqual(format_message(message), "STATUS: AUTO, T=27.50 C, P=40")
+        self.assertIsNone(message.raw_text)
+
+    def test_text_status_keeps_mcu_formatting(self):
+        message = ProtocolParser().parse("STATUS: AUTO, T=27.5 C, P=40")
+        self.assertEqual(message, AutoStatus(27.5, 40, "27.5"))
+        self.assertEqual(format_message(message), "STATUS: AUTO, T=27.5 C, P=40")
+
+    def test_line_overflow_discards_buffer(self):
+        self.assertEqual(self.decoder.feed(b"x" * (MAX_LINE + 1)), [])
+        self.assertEqual(self.decoder.stats['overflow'], 1)
+        self.assertEqual(self.decoder.feed(b"xx\nOK: P=5\n"), [("xx", None), ("OK: P=5", None)])
+
+    def test_incomplete_line_is_kept(self):
+        self.assertEqual(self.decoder.feed(b"x" * MAX_LINE), [])
+        self.assertEqual(self.decoder.stats['overflow'], 0)
+        self.assertEqual(self.decoder.feed(b"\n"), [("x" * MAX_LINE, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import queue
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+
+from binary_protocol import BINARY_COMMAND
+from serial_writer import CommandWriter
+from stm32_protocol import AutoStatus, Error, ManualStatus
+
+
+class FakePort:
+    """Yazılan baytları saklayan sahte seri port."""
+
+    def __init__(self):
+        self.port = 'FAKE'
+        self.written = []
+        self.wrote = threading.Event()
+
+    def write(self, data):
+        self.written.append(data)
+        self.wrote.set()
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class CommandWriterNegotiationTest(unittest.TestCase):
+    def setUp(self):
+        self.port = FakePort()
+        self.events = queue.Queue()
+        self.writer = CommandWriter(self.port, self.events, min_interval=0, ack_timeout=1.0)
+        self.writer.start()
+
+    def tearDown(self):
+        self.writer.stop()
+
+    def send_and_reply(self, command, reply):
+        self.writer.send(command)
+        self.assertTrue(self.port.wrote.wait(1.0))
+        self.port.wrote.clear()
+        return self.writer.handle_line(reply)
+
+    def next_event(self, kind):
+        while True:
+            event = self.events.get(timeout=2.0)
+            if event[0] == kind:
+                return event
+
+    def test_error_reply_to_binary_command_is_consumed(self):
+        self.assertTrue(self.send_and_reply(BINARY_COMMAND, "ERROR: Unknown command: B"))
+        self.assertEqual(self.next_event('nack'), ('nack', BINARY_COMMAND, "ERROR: Unknown command: B"))
+
+    def test_ok_reply_to_binary_command_is_consumed(self):
+        self.assertTrue(self.send_and_reply(BINARY_COMMAND, "OK: BINARY MODE"))
+        self.assertEqual(self.next_event('ack'), ('ack', BINARY_COMMAND, "OK: BINARY MODE"))
+
+    def test_replies_to_other_commands_are_passed_on(self):
+        self.assertFalse(self.send_and_reply('M', "OK: MANUAL MODE"))
+        self.assertEqual(self.next_event('ack')[1], 'M')
+        self.assertFalse(self.send_and_reply('P=200', "ERROR: Invalid PWM value: P=200"))
+        self.assertEqual(self.next_event('nack')[1], 'P=200')
+
+    def test_lines_without_pending_command_are_passed_on(self):
+        self.assertFalse(self.writer.handle_line("ERROR: Sensor fault"))
+        self.assertFalse(self.writer.handle_line("STATUS: MANUAL, P=10"))
+
+
+def collect(inbox, done, timeout=3.0):
+    """Kuyruktaki öğeleri `done(öğeler)` True olana veya süre dolana kadar toplar."""
+    items = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        while True:
+            try:
+                items.append(inbox.get_nowait())
+            except queue.Empty:
+                break
+        if done(items):
+            break
+        time.sleep(0.01)
+    return items
+
+
+def negotiated(items):
+    """B'nin sonucu geldi ve ardından en az üç STATUS mesajı okundu mu?"""
+    for i, (_, kind, data) in enumerate(items):
+        if kind == 'writer' and data[1] == BINARY_COMMAND and data[0] in ('ack', 'nack', 'timeout'):
+            statuses = [data for _, kind, data in items[i:]
+                        if kind == 'line' and isinstance(data[1], (AutoStatus, ManualStatus))]
+            return len(statuses) >= 3
+    return False
+
+
+@unittest.skipUnless(os.name == 'posix', "sahte STM32 pty gerektirir")
+class FanControllerNegotiationTest(unittest.TestCase):
+    def run_controller(self, binary_capable):
+        from controller_manager import FanController
+        from sim_stm32 import FakeStm32
+
+        sim = FakeStm32(status_interval=0.05, binary_capable=binary_capable).start()
+        controller = FanController(sim.port_name, queue.Queue(), binary=True)
+        controller.open()
+        try:
+            items = collect(controller.inbox, negotiated)
+        finally:
+            controller.close()
+            sim.stop()
+        self.assertTrue(wait_for(lambda: controller.finished))
+        self.assertTrue(negotiated(items))
+        return ([data for _, kind, data in items if kind == 'writer'],
+                [data for _, kind, data in items if kind == 'line'])
+
+    def test_old_firmware_error_reply_is_not_a_device_error(self):
+        writer_events, lines = self.run_controller(binary_capable=False)
+        self.assertIn(('nack', BINARY_COMMAND, "ERROR: Unknown command: B"), writer_events)
+        self.assertEqual([message for _, message in lines if isinstance(message, Error)], [])
+
+    def test_binary_firmware_switches_to_frames(self):
+        writer_events, lines = self.run_controller(binary_capable=True)
+        self.assertIn(('ack', BINARY_COMMAND, "OK: BINARY MODE"), writer_events)
+        self.assertNotIn("OK: BINARY MODE", [line for line, _ in lines])
+        self.assertTrue([message for line, message in lines if line is None])
+
+
+if __name__ == '__main__':
+    unittest.main()
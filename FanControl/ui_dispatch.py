@@ -0,0 +1,65 @@
+import queue
+import threading
+import time
+import tkinter as tk
+
+SERIAL_EVENT = '<<SerialData>>'  # Okuma/gönderim thread'lerinin Tk döngüsünü uyandırdığı sanal olay
+REAP_INTERVAL_MS = 100           # Kapatılan kontrolcülerin thread'lerinin bitip bitmediğinin kontrol aralığı
+
+
+class InboxDispatcher:
+    """ControllerManager'ın ortak kuyruğunu Tk thread'inde, kare başına sınırlı bütçeyle boşaltır.
+
+    Kuyruk periyodik olarak yoklanmaz; arka plan thread'leri `notify()` çağırır ve
+    bekleyen bir uyandırma yoksa Tk döngüsüne SERIAL_EVENT gönderilir. Her karede en
+    fazla `max_items` öğe `handle(port, tür, veri)` ile işlenir veya `budget_s` dolunca
+    durulur; kalanlar arayüz çizildikten sonraki karede işlenir.
+    """
+
+    def __init__(self, master, inbox, handle, max_items, budget_s, observe=None):
+        self.master = master
+        self.inbox = inbox
+        self.handle = handle
+        self.max_items = max_items
+        self.budget_s = budget_s
+        self.observe = observe  # Kare başına boşaltma süresini alan ölçüm fonksiyonu
+        self._pending = threading.Event()  # Tk döngüsüne gönderilmiş, henüz işlenmemiş uyandırma var mı
+        master.bind(SERIAL_EVENT, self.drain)
+
+    def notify(self):
+        """Arka plan thread'lerinden çağrılır; bekleyen uyandırma yoksa Tk döngüsüne olay gönderir."""
+        if self._pending.is_set():
+            return
+        self._pending.set()
+        try:
+            self.master.event_generate(SERIAL_EVENT, when='tail')
+        except (tk.TclError, RuntimeError):
+            pass  # Pencere kapatılıyor
+
+    def drain(self, event=None):
+        # Bayrak boşaltmadan önce temizlenir; bu sırada gelen veri yeni bir olay üretir
+        self._pending.clear()
+        started = time.perf_counter()
+        deadline = started + self.budget_s
+        try:
+            for _ in range(self.max_items):
+                try:
+                    port, kind, data = self.inbox.get_nowait()
+                except queue.Empty:
+                    return
+                self.handle(port, kind, data)
+                if time.perf_counter() > deadline:
+                    break
+        finally:
+            if self.observe:
+                self.observe(time.perf_counter() - started)
+
+        # Bütçe doldu: kalan mesajlar, arayüz çizildikten sonra bir sonraki karede işlenir
+        if not self.inbox.empty():
+            self.master.after(1, self.drain)
+
+
+def reap_closed(master, manager):
+    """Kapatılan kontrolcülerin thread'leri bitene kadar Tk döngüsünden periyodik olarak temizler."""
+    if manager.reap():
+        master.after(REAP_INTERVAL_MS, reap_closed, master, manager)
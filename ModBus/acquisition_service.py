@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+from common import metrics
+from common.alarms import AlarmEngine, load_alarm_rules
+from common.capture import CaptureReplayer, CaptureWriter, DIRECTION_RX, SOURCE_MODBUS, read_capture
+from modbus_config import build_schedule, load_settings
+from modbus_poller import LastGoodCache, ModbusPoller, SlaveResult
+from sample_sinks import STREAM_HOST, STREAM_PORT, create_sink
+
+PUBLISH_SECONDS = metrics.REGISTRY.histogram('acquisition_publish_seconds', "Bir sonucu sink'e yayınlama süresi",
+                                             ('sink',))
+PUBLISH_ERRORS = metrics.REGISTRY.counter('acquisition_publish_errors_total', "Sink yayınlama hataları", ('sink',))
+
+
+class AcquisitionService:
+    """Arayüz olmadan çalışan veri toplama servisi.
+
+    ModbusPoller'ın ürettiği her sonucu sırayla tüm sink'lere iletir. Tkinter
+    arayüzü ve web sayfası aynı akıştan beslendiği için ESP32'lere tek bir Modbus
+    oturumu açılır. `alarms` (AlarmEngine) verilirse her sonuç yayınlandıktan sonra
+    alarm kurallarından geçirilir; olaylar konsola ve `publish_alarm` destekleyen
+    sink'lere yazılır.
+    """
+
+    STALE_CHECK_INTERVAL_S = 1.0
+
+    def __init__(self, poller, sinks, alarms=None):
+        self.poller = poller
+        self.sinks = list(sinks)
+        self.alarms = alarms
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Servisi `stop()` çağrılana kadar çalıştırır (bloklar)."""
+        self.poller.start()
+        next_stale_check = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                if self.alarms and time.monotonic() >= next_stale_check:
+                    self.publish_alarms(self.alarms.check_stale())
+                    next_stale_check = time.monotonic() + self.STALE_CHECK_INTERVAL_S
+                try:
+                    result = self.poller.results.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                self.publish(result)
+                if self.alarms:
+                    self.publish_alarms(self.alarms.observe(result.ip, result.ok, result.values, result.timestamp,
+                                                            result.message))
+        finally:
+            self.poller.stop()
+            for sink in self.sinks:
+                sink.close()
+
+    def publish(self, result):
+        for sink in self.sinks:
+            started = time.perf_counter()
+            try:
+                sink.publish(result)
+            except Exception as e:
+                PUBLISH_ERRORS.labels(type(sink).__name__).inc()
+                print(f"Hata: {type(sink).__name__} örneği yayınlayamadı: {e}")
+            PUBLISH_SECONDS.labels(type(sink).__name__).observe(time.perf_counter() - started)
+
+    def publish_alarms(self, events):
+        for event in events:
+            print(f"ALARM: {event.describe()}", flush=True)
+            for sink in self.sinks:
+                if hasattr(sink, 'publish_alarm'):
+                    try:
+                        sink.publish_alarm(event)
+                    except Exception as e:
+                        print(f"Hata: {type(sink).__name__} alarmı yayınlayamadı: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def index_by_ip(devices):
+    """Cihaz IP'sinden bu listedeki sıraya eşleme; `devices` None ise None."""
+    return {device.ip: i for i, device in enumerate(devices)} if devices is not None else None
+
+
+class StreamSubscriber:
+    """Servisin TCP akışını okuyup sonuçları `results` kuyruğuna koyar.
+
+    ModbusPoller ile aynı arayüze (`results`, `start`, `stop`) sahiptir; böylece
+    arayüz doğrudan sorgulama yerine servisin akışını kullanabilir. Sonuçlardaki
+    `index` servisin cihaz sırasıdır; `devices` verilirse ReplaySource'taki gibi
+    IP'ye göre bu listedeki sıraya eşlenir, listede olmayan slave'ler atlanır.
+    """
+
+    def __init__(self, host=STREAM_HOST, port=STREAM_PORT, reconnect_delay=2, devices=None):
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self.results = queue.Queue()
+        self._index_of = index_by_ip(devices)
+        self._stop_event = threading.Event()
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='stream-subscriber', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._sock:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._sock = socket.create_connection((self.host, self.port), timeout=5)
+                self._sock.settimeout(None)
+                with self._sock.makefile('r', encoding='utf-8') as stream:
+                    for line in stream:
+                        if not line.strip():
+                            continue
+                        result = SlaveResult.from_dict(json.loads(line))
+                        if self._index_of is not None:
+                            if result.ip not in self._index_of:
+                                continue
+                            result.index = self._index_of[result.ip]
+                        self.results.put(result)
+            except (OSError, ValueError) as e:
+                if not self._stop_event.is_set():
+                    print(f"Servis akışına bağlanılamadı ({self.host}:{self.port}): {e}")
+            self._stop_event.wait(self.reconnect_delay)
+
+
+class ReplaySource:
+    """Kayıt dosyasındaki Modbus sorgu sonuçlarını `results` kuyruğuna koyar.
+
+    ModbusPoller ile aynı arayüze sahiptir; arayüz sahadan alınmış bir kaydı canlı
+    veri gibi gösterir. Sonuçların zamanı oynatma anına çekilir, böylece veri
+    yaşı ve veri gelmiyor alarmları ekrandaki akışla tutarlı kalır. `devices`
+    verilirse sonuçlar IP'ye göre bu listedeki sıraya eşlenir, listede olmayan
+    slave'ler atlanır.
+    """
+
+    def __init__(self, path, speed=1.0, devices=None):
+        self.path = path
+        self.results = queue.Queue()
+        self.last_good = LastGoodCache()
+        self._index_of = index_by_ip(devices)
+        self._replayer = CaptureReplayer(read_capture(path, SOURCE_MODBUS), self._deliver, speed, self._finished)
+
+    def start(self):
+        if not self._replayer.running:
+            self._replayer.start()
+
+    def stop(self):
+        self._replayer.stop()
+
+    def _deliver(self, record):
+        if record.direction != DIRECTION_RX:
+            return
+        result = SlaveResult.from_dict(record.data)
+        if self._index_of is not None:
+            if result.ip not in self._index_of:
+                return
+            result.index = self._index_of[result.ip]
+        result.timestamp = time.time()
+        self.results.put(self.last_good.fill(result))
+
+    def _finished(self, count, elapsed):
+        print(f"Kayıt oynatma bitti: {self.path} ({count} olay, {elapsed:.2f} sn)", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trafo odası Modbus veri toplama servisi (arayüzsüz)")
+    parser.add_argument('--config', default='config.ini', help="Ayar dosyası (varsayılan: config.ini)")
+    parser.add_argument('--sink', action='append', dest='sinks',
+                        help="Çıkış: jsonl[:dosya], tcp[:host:port], store[:klasör], mqtt. Birden fazla verilebilir. "
+                             "(varsayılan: tcp)")
+    parser.add_argument('--interval-ms', type=int, help="config.ini'deki polling_interval_ms yerine kullanılır")
+    parser.add_argument('--capture', help="Modbus istek ve sonuçlarını bu dosyaya kaydet")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    settings = load_settings(args.config)
+    interval_ms = args.interval_ms or settings.polling_interval_ms
+    sinks = [create_sink(spec, settings.parser) for spec in (args.sinks or ['tcp'])]
+
+    schedule = build_schedule(settings, interval_ms)
+    capture = CaptureWriter(args.capture) if args.capture else None
+    poller = ModbusPoller(settings.devices, settings.modbus_port, settings.secret_key, interval_ms, schedule=schedule,
+                          capture=capture, pipelined=settings.pipelining)
+    service = AcquisitionService(poller, sinks, AlarmEngine(*load_alarm_rules(settings.alarm_rules)))
+    exporters = metrics.start_exporters(args)
+
+    signal.signal(signal.SIGINT, lambda *_: service.stop())
+    signal.signal(signal.SIGTERM, lambda *_: service.stop())
+
+    mode = "uyarlamalı aralık, temel" if schedule else "sabit aralık"
+    print(f"{len(settings.devices)} cihaz sorgulanıyor ({mode} {interval_ms} ms) "
+          f"({time.strftime('%Y-%m-%d %H:%M:%S')})", flush=True)
+    try:
+        service.run()
+    finally:
+        for exporter in exporters:
+            exporter.shutdown()
+        if capture:
+            capture.close()
+
+
+if __name__ == "__main__":
+    main()
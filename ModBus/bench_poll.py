@@ -0,0 +1,128 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+from modbus_batch import BatchReader, ReadRequest
+from modbus_poller import ModbusPoller
+from register_map import build_devices, load_device_types
+from sim_slave import simulated_ip
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def start_simulator(count, port, extra_args):
+    """Slave simülatörünü ayrı bir süreçte başlatır; ölçülen CPU yalnızca master'a ait olsun."""
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, 'sim_slave.py'), '--count', str(count),
+                             '--port', str(port)] + extra_args,
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()  # "... slave dinleniyor" satırı hazır olunca gelir
+    if not line:
+        proc.kill()
+        raise RuntimeError("Simülatör başlatılamadı")
+    return proc
+
+
+def stop_simulator(proc):
+    """Simülatörü durdurur ve çıkışta yazdığı istatistik satırını sözlük olarak döndürür."""
+    proc.terminate()
+    output = proc.communicate()[0]
+    for line in output.splitlines():
+        if line.startswith('istatistik '):
+            return {k: int(v) for k, v in (item.split('=') for item in line.split()[1:])}
+    return {}
+
+
+def batch_poll(reader, devices):
+    """Tüm slave'lerin tüm bloklarını tek bir BatchReader çağrısıyla okur; başarılı slave sayısını döndürür."""
+    owners, requests = [], []
+    for i, device in enumerate(devices):
+        for block in device.blocks:
+            owners.append(i)
+            requests.append(ReadRequest(device.ip, block.address, block.count))
+    failed = {owner for owner, response in zip(owners, reader.read(requests)) if not response.ok}
+    return len(devices) - len(failed)
+
+
+def bench(count, cycles, port, slave_types, extra_args, mode='pool', interval=0.0):
+    proc = start_simulator(count, port, extra_args)
+    try:
+        ips = [simulated_ip(i) for i in range(count)]
+        devices = build_devices(ips, [slave_types[i % len(slave_types)] for i in range(count)],
+                                load_device_types(os.path.join(HERE, 'devices.ini')))
+        if mode == 'batch':
+            reader = BatchReader(port, 12345, timeout=5)
+            poll, close = (lambda: batch_poll(reader, devices)), reader.close_all
+        else:
+            poller = ModbusPoller(devices, port, 12345, interval_ms=0, slave_timeout=5,
+                                  pipelined=mode == 'pipelined')
+            poll, close = (lambda: sum(1 for r in poller.poll_once() if r.ok)), poller.stop
+        poll()  # Isınma: bağlantılar açılır, anahtar yazılır
+
+        latencies, ok = [], 0
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(cycles):
+            start = time.perf_counter()
+            ok += poll()
+            latencies.append(time.perf_counter() - start)
+            if interval:
+                time.sleep(interval)  # Erişim süresini (20 sn) aşan çalıştırmalarda donmuş okumalar görünür
+        wall = time.perf_counter() - wall_start - interval * cycles
+        cpu = time.process_time() - cpu_start
+        close()
+    finally:
+        stats = stop_simulator(proc)
+
+    return {
+        'slaves': count,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'reads_per_s': ok / wall,
+        'ok_ratio': ok / (count * cycles),
+        'cpu_ms_per_slave_cycle': cpu / (count * cycles) * 1000,
+        # Slave'in erişim izni yokken cevapladığı okumalar: "Veri OK" görünen donmuş değerler
+        'stale_ratio': stats['erisimsiz'] / stats['okuma'] if stats.get('okuma') else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modbus sorgu döngüsü performans ölçümü (simüle slave'lerle)")
+    parser.add_argument('--slaves', default='1,10,100,500', help="Virgülle ayrılmış slave sayıları")
+    parser.add_argument('--cycles', type=int, default=20)
+    parser.add_argument('--port', type=int, default=1502)
+    parser.add_argument('--types', default='dht11,ds18b20', help="Slave'lere sırayla atanacak cihaz tipleri")
+    parser.add_argument('--interval', type=float, default=0.0,
+                        help="Döngüler arası bekleme (sn); anahtar yenilemeyi sınamak için süre 20 sn'yi aşmalı")
+    parser.add_argument('--mode', choices=('pool', 'pipelined', 'batch'), default='pool',
+                        help="pool: pymodbus bağlantı havuzu, pipelined: slave başına boru hattı, "
+                             "batch: tüm slave'ler tek BatchReader çağrısında")
+    parser.add_argument('sim_args', nargs=argparse.REMAINDER,
+                        help="-- sonrasındaki argümanlar sim_slave.py'ye aktarılır (ör. -- --latency 0.02)")
+    args = parser.parse_args()
+    extra = [a for a in args.sim_args if a != '--']
+
+    print(f"{'slave':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'okuma/sn':>10} {'başarı':>7} {'CPU ms/okuma':>13} "
+          f"{'donmuş':>7}")
+    for count in (int(c) for c in args.slaves.split(',')):
+        r = bench(count, args.cycles, args.port, args.types.split(','), extra, args.mode, args.interval)
+        stale = '-' if r['stale_ratio'] is None else f"{r['stale_ratio']:.1%}"
+        print(f"{r['slaves']:>6} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['reads_per_s']:>10.0f} {r['ok_ratio']:>7.1%} {r['cpu_ms_per_slave_cycle']:>13.3f} "
+              f"{stale:>7}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIM_PORT = 1502
+
+
+def child(config_path, timeout_ms):
+    """Arayüzü açar; import, ilk pencere ve ilk okuma anlarını (time.time()) yazdırır."""
+    import tkinter as tk
+    import master_reader
+    from modbus_config import load_settings
+    print(f"import {time.time()}", flush=True)
+
+    root = tk.Tk()
+    marks = set()
+
+    def mark(name):
+        if name not in marks:
+            marks.add(name)
+            print(f"{name} {time.time()}", flush=True)
+
+    root.bind('<Map>', lambda e: mark('window') if e.widget is root else None)
+    app = master_reader.ModbusMonitorApp(root, load_settings(config_path))
+    apply_result = app.apply_result
+
+    def first_reading(result):
+        apply_result(result)
+        if result.ok:
+            mark('reading')
+            root.after(0, root.quit)
+
+    app.apply_result = first_reading
+    root.after(timeout_ms, root.quit)
+    root.mainloop()
+    app.poller.stop()
+    os._exit(0)
+
+
+def run_once(config_path, timeout_ms):
+    started = time.time()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', config_path, str(timeout_ms)],
+                            cwd=HERE, stdout=subprocess.PIPE, text=True)
+    out, _ = proc.communicate(timeout=timeout_ms / 1000 + 30)
+    marks = {}
+    for line in out.splitlines():
+        name, _, ts = line.partition(' ')
+        marks[name] = (float(ts) - started) * 1000
+    return marks
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description="master_reader açılış süresi ölçümü (simüle slave'lerle)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--slaves', type=int, default=10)
+    parser.add_argument('--timeout-ms', type=int, default=15000)
+    args = parser.parse_args()
+
+    from bench_poll import start_simulator
+    from sim_slave import simulated_ip
+    sim = start_simulator(args.slaves, SIM_PORT, [])
+    with tempfile.NamedTemporaryFile('w', suffix='.ini', delete=False, encoding='utf-8') as f:
+        f.write("[Modbus]\n"
+                f"slave_ips = {', '.join(simulated_ip(i) for i in range(args.slaves))}\n"
+                f"modbus_port = {SIM_PORT}\n"
+                "polling_interval_ms = 1000\n"
+                "[Security]\n"
+                "secret_key = 12345\n")
+        config_path = f.name
+    try:
+        runs = [run_once(config_path, args.timeout_ms) for _ in range(args.runs)]
+    finally:
+        sim.terminate()
+        sim.wait()
+        os.unlink(config_path)
+
+    print(f"{'aşama':<16} {'medyan ms':>10} {'en kötü ms':>11}")
+    for name, caption in (('import', "import"), ('window', "ilk pencere"), ('reading', "ilk okuma")):
+        values = [r[name] for r in runs if name in r]
+        if len(values) < len(runs):
+            print(f"{caption:<16} {len(runs) - len(values)} çalıştırmada ölçülemedi")
+        if values:
+            print(f"{caption:<16} {statistics.median(values):>10.0f} {max(values):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
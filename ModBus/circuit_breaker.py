@@ -0,0 +1,135 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common.metrics import REGISTRY
+
+# --- Devre Durumları ---
+STATE_CLOSED = 'closed'        # Normal: sorgular yapılır
+STATE_OPEN = 'open'            # Slave ölü sayılır: sorgular ağa çıkmadan reddedilir
+STATE_HALF_OPEN = 'half_open'  # Yoklama başarılı: bir sonraki sorgu gerçek bağlantıyı dener
+
+BREAKER_OPEN = REGISTRY.gauge('modbus_breaker_open', "Devresi açık (ölü sayılan) slave, 1: açık", ('ip',))
+
+
+class _Circuit:
+    __slots__ = ('state', 'failures', 'probe_delay', 'next_probe', 'probing')
+
+    def __init__(self):
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.probe_delay = 0.0
+        self.next_probe = 0.0
+        self.probing = False
+
+
+class CircuitBreaker:
+    """Art arda `failure_threshold` kez bağlanılamayan slave'leri sorgu yolundan çıkarır.
+
+    Devresi açık bir slave için sorgu thread'i bağlantı zaman aşımını beklemez.
+    Arka plandaki yoklama thread'i bu slave'lere yalnızca TCP bağlantısı açmayı
+    dener (aralık her başarısız yoklamada iki katına çıkar, en çok
+    `probe_max_interval`). Yoklama başarılı olunca devre yarı açılır ve
+    `on_recovered(ip)` çağrılır; ilk başarılı sorgu devreyi kapatır.
+    """
+
+    def __init__(self, port, failure_threshold=2, probe_interval=2.0, probe_max_interval=60.0, probe_timeout=1.0,
+                 on_recovered=None, max_probes=8):
+        self.port = port
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.probe_max_interval = probe_max_interval
+        self.probe_timeout = probe_timeout
+        self.on_recovered = on_recovered
+        self._circuits = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_probes, thread_name_prefix='modbus-probe')
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='modbus-breaker', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _circuit(self, ip):
+        circuit = self._circuits.get(ip)
+        if circuit is None:
+            circuit = self._circuits[ip] = _Circuit()
+        return circuit
+
+    def state(self, ip):
+        with self._lock:
+            return self._circuit(ip).state
+
+    def allow(self, ip):
+        """Slave'e bağlantı denenebilir mi? Devre açıksa False."""
+        with self._lock:
+            return self._circuit(ip).state != STATE_OPEN
+
+    def record_success(self, ip):
+        with self._lock:
+            circuit = self._circuit(ip)
+            circuit.failures = 0
+            if circuit.state != STATE_CLOSED:
+                circuit.state = STATE_CLOSED
+                BREAKER_OPEN.labels(ip).set(0)
+
+    def record_failure(self, ip):
+        with self._lock:
+            circuit = self._circuit(ip)
+            circuit.failures += 1
+            if circuit.state == STATE_HALF_OPEN or (circuit.state == STATE_CLOSED and
+                                                    circuit.failures >= self.failure_threshold):
+                circuit.state = STATE_OPEN
+                circuit.probe_delay = self.probe_interval
+                circuit.next_probe = time.monotonic() + circuit.probe_delay
+                BREAKER_OPEN.labels(ip).set(1)
+                self._wakeup.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.clear()  # Tarama sırasında açılan devre döngüyü tekrar uyandırır
+            now = time.monotonic()
+            next_wake = now + self.probe_max_interval
+            with self._lock:
+                for ip, circuit in self._circuits.items():
+                    if circuit.state != STATE_OPEN or circuit.probing:
+                        continue
+                    if circuit.next_probe <= now:
+                        circuit.probing = True
+                        self._executor.submit(self._probe, ip)
+                    else:
+                        next_wake = min(next_wake, circuit.next_probe)
+            self._wakeup.wait(max(0.0, next_wake - time.monotonic()))
+
+    def _probe(self, ip):
+        try:
+            with socket.create_connection((ip, self.port), timeout=self.probe_timeout):
+                alive = True
+        except OSError:
+            alive = False
+        with self._lock:
+            circuit = self._circuit(ip)
+            circuit.probing = False
+            if circuit.state != STATE_OPEN:
+                return
+            if not alive:
+                circuit.probe_delay = min(self.probe_max_interval, circuit.probe_delay * 2)
+                circuit.next_probe = time.monotonic() + circuit.probe_delay
+                self._wakeup.set()
+                return
+            circuit.state = STATE_HALF_OPEN
+        if self.on_recovered:
+            self.on_recovered(ip)
@@ -1,57 +1,63 @@
 import tkinter as tk
 from tkinter import ttk
-from pymodbus.client import ModbusTcpClient
-import time
-import configparser
+import argparse
+import os
+import queue
 import sys
+import time
 
-# --- Yapılandırma Dosyasından Ayarları Oku ---
-config = configparser.ConfigParser()
-try:
-    config.read('config.ini')
-
-    # Modbus Ayarları
-    SLAVE_IPS = [ip.strip() for ip in config['Modbus']['slave_ips'].split(',')]
-    MODBUS_PORT = int(config['Modbus']['modbus_port'])
-    POLLING_INTERVAL_MS = int(config['Modbus']['polling_interval_ms'])
-
-    # Güvenlik Ayarları
-    SECRET_KEY = int(config['Security']['secret_key'])
-
-except KeyError as ke:
-    print(f"Hata: config.ini dosyasında eksik veya hatalı bölüm/anahtar: {ke}")
-    print("Lütfen config.ini dosyasının doğru formatta olduğundan ve tüm gerekli anahtarları içerdiğinden emin olun.")
-    SLAVE_IPS = ['192.168.220.179']  # Varsayılan olarak sadece bir IP
-    MODBUS_PORT = 502
-    POLLING_INTERVAL_MS = 2000
-    SECRET_KEY = 12345
-    print("Varsayılan ayarlar kullanılıyor. Lütfen config.ini dosyanızı kontrol edin.")
-except Exception as ex:
-    print(f"config.ini dosyasını okurken beklenmeyen bir hata oluştu: {ex}")
-    SLAVE_IPS = ['192.168.220.179']  # Varsayılan olarak sadece bir IP
-    MODBUS_PORT = 502
-    POLLING_INTERVAL_MS = 2000
-    SECRET_KEY = 12345
-    print("Varsayılan ayarlar kullanılıyor. Lütfen config.ini dosyanızı kontrol edin.")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+
+from acquisition_service import ReplaySource, StreamSubscriber
+from common import metrics
+from common.alarm_bar import AlarmBar
+from common.alarms import AlarmEngine, load_alarm_rules
+from common.capture import CaptureWriter
+from common.view_model import ViewModel
+from modbus_config import build_schedule, load_settings
+from modbus_pool import STATUS_OK, STATUS_OFFLINE, STATUS_KEY_ERROR, STATUS_READ_ERROR, STATUS_NETWORK_ERROR
+from modbus_poller import ModbusPoller
+from sample_sinks import STREAM_HOST, STREAM_PORT
+
+RESULT_CHECK_INTERVAL_MS = 100  # Sonuç kuyruğunun kontrol edilme aralığı
+STALE_CHECK_INTERVAL_MS = 1000  # Veri gelmeyen kanalların kontrol edilme aralığı
+LAST_GOOD_MAX_AGE_S = 15 * 60   # Cevap vermeyen slave'in son değerleri bu süreye kadar gösterilir
+STALE_COLOR = 'gray'
+
+FAILURE_TEXT = {
+    STATUS_OFFLINE: ("KESİNTİ", "Bağlantı Kesintisi"),
+    STATUS_KEY_ERROR: ("HATA", "Anahtar Yazma Hatası"),
+    STATUS_READ_ERROR: ("HATA", "Okuma Hatası"),
+    STATUS_NETWORK_ERROR: ("AĞ HATASI", "Ağ Hatası"),
+}
+
+
+def format_age(seconds):
+    """Veri yaşını kısa metne çevirir: 45 sn, 3 dk, 2 sa."""
+    if seconds < 60:
+        return f"{max(0, int(seconds))} sn"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} dk"
+    return f"{int(seconds // 3600)} sa"
 
 
 # --- Tkinter Arayüzü Oluşturma ---
 class ModbusMonitorApp:
-    def __init__(self, master):
+    def __init__(self, master, settings, source=None, capture=None):
         self.master = master
         master.title("Trafo Odası Nem/Sıcaklık Monitörü")
 
-        self.num_slaves = len(SLAVE_IPS)
-        # Pencere boyutunu slave_ips sayısına ve her cihazın veri tipine göre ayarla
-        # İlk cihaz 2 veri (Nem, Sıcaklık), İkinci cihaz 1 veri (Sıcaklık)
-        total_height = 100  # Başlık ve boşluklar için
-        for i, ip in enumerate(SLAVE_IPS):
-            if i == 0:  # İlk ESP (DHT11) için
-                total_height += 120  # Nem ve Sıcaklık etiketi için
-            elif i == 1:  # İkinci ESP (DS18B20) için
-                total_height += 90  # Sadece Sıcaklık etiketi için
-            else:  # Eğer gelecekte daha fazla cihaz eklenirse
-                total_height += 100
+        # Ayarlar (config.ini) modül yüklenirken değil, giriş noktasında okunup buraya verilir
+        self.settings = settings
+        self.devices = settings.devices
+        self.capture = capture  # Modbus trafiğinin yazıldığı CaptureWriter (--capture)
+        self.num_slaves = len(self.devices)
+        # Pencere yüksekliği register haritasındaki kanal sayısından hesaplanır;
+        # ekrana sığmayan cihaz listesi kaydırılabilir bir alanda gösterilir
+        total_height = 130  # Başlık, alarm şeridi ve boşluklar için
+        for device in self.devices:
+            total_height += 60 + 30 * len(device.channels)
+        total_height = min(total_height, master.winfo_screenheight() - 100)
 
         master.geometry(f"600x{total_height}")
         master.resizable(False, False)
@@ -69,155 +75,171 @@ class ModbusMonitorApp:
 
         self.slave_frames = []
         self.data_labels = {}
+        self.stale_results = {}  # Son iyi değerleri gösterilen cihazlar: indeks -> başarısız sonuç
         self.is_running = True
+        # Etiketler yalnızca değiştiklerinde ve kare başına en fazla bir kez yeniden çizilir
+        self.view = ViewModel(master, name='master_reader')
+
+        # Alarmlar her sonuçta Tk thread'inde değerlendirilir; sorgu thread'leri beklemez
+        self.alarms = AlarmEngine(*load_alarm_rules(settings.alarm_rules))
+        self.alarm_bar = AlarmBar(master)
+        self.alarm_bar.pack(side='top', fill='x')
+
+        container = self.create_scroll_area(master)
 
-        for i, ip in enumerate(SLAVE_IPS):
-            frame = ttk.LabelFrame(master, text=f"Trafo Odası Cihaz {i + 1} ({ip})", padding=10)
+        for i, device in enumerate(self.devices):
+            title = f"Trafo Odası Cihaz {i + 1} ({device.ip})"
+            if device.title:
+                title += f" - {device.title}"
+            frame = ttk.LabelFrame(container, text=title, padding=10)
             frame.pack(padx=10, pady=5, fill='x', expand=True)
+            frame.columnconfigure(1, weight=1)
             self.slave_frames.append(frame)
 
-            # Bu kısım dinamik olarak oluşturulmalı
+            # Etiketler register haritasındaki kanallardan oluşturulur
             labels_for_this_slave = {}
-            if i == 0:  # İlk cihaz (DHT11): Nem ve Sıcaklık
-                ttk.Label(frame, text="Nem (%RH):", style='TLabel').grid(row=0, column=0, padx=5, pady=2, sticky='w')
-                labels_for_this_slave['humidity'] = ttk.Label(frame, text="Yükleniyor...", style='Data.TLabel')
-                labels_for_this_slave['humidity'].grid(row=0, column=1, padx=5, pady=2, sticky='ew')
-
-                ttk.Label(frame, text="Sıcaklık (°C):", style='TLabel').grid(row=1, column=0, padx=5, pady=2,
-                                                                             sticky='w')
-                labels_for_this_slave['temperature'] = ttk.Label(frame, text="Yükleniyor...", style='Data.TLabel')
-                labels_for_this_slave['temperature'].grid(row=1, column=1, padx=5, pady=2, sticky='ew')
-
-                # DS18B20 etiketi bu cihazda olmayacak
-                labels_for_this_slave['ds18b20_temperature'] = None
-                status_row = 2
-
-            elif i == 1:  # İkinci cihaz (DS18B20): Sadece Sıcaklık
-                ttk.Label(frame, text="Sıcaklık (DS18B20 °C):", style='TLabel').grid(row=0, column=0, padx=5, pady=2,
-                                                                                     sticky='w')
-                labels_for_this_slave['ds18b20_temperature'] = ttk.Label(frame, text="Yükleniyor...",
-                                                                         style='Data.TLabel')
-                labels_for_this_slave['ds18b20_temperature'].grid(row=0, column=1, padx=5, pady=2, sticky='ew')
-
-                # DHT etiketleri bu cihazda olmayacak
-                labels_for_this_slave['humidity'] = None
-                labels_for_this_slave['temperature'] = None
-                status_row = 1
+            for row, channel in enumerate(device.channels):
+                caption = f"{channel.label} ({channel.unit}):" if channel.unit else f"{channel.label}:"
+                ttk.Label(frame, text=caption, style='TLabel').grid(row=row, column=0, padx=5, pady=2, sticky='w')
+                labels_for_this_slave[channel.key] = ttk.Label(frame, text="Yükleniyor...", style='Data.TLabel')
+                labels_for_this_slave[channel.key].grid(row=row, column=1, padx=5, pady=2, sticky='ew')
 
             # Durum etiketi her zaman en altta
             labels_for_this_slave['status'] = ttk.Label(frame, text="Durum: Bekleniyor...", style='Status.TLabel')
-            labels_for_this_slave['status'].grid(row=status_row, column=0, columnspan=2, padx=5, pady=2, sticky='w')
+            labels_for_this_slave['status'].grid(row=len(device.channels), column=0, columnspan=2, padx=5, pady=2,
+                                                 sticky='w')
+
+            self.data_labels[i] = labels_for_this_slave
+
+        # Slave'ler arka planda paralel sorgulanır, sonuçlar kuyruk üzerinden gelir.
+        # acquisition_service çalışıyorsa ESP32'lere ikinci bir oturum açmak yerine onun akışı okunur.
+        self.poller = source or ModbusPoller(self.devices, settings.modbus_port, settings.secret_key,
+                                             settings.polling_interval_ms, schedule=build_schedule(settings),
+                                             capture=capture, pipelined=settings.pipelining)
+        self.poller.start()
+        self.ui_update_seconds = metrics.UI_UPDATE_SECONDS.labels('master_reader')
+        metrics.UI_QUEUE_DEPTH.labels('master_reader').set_function(self.poller.results.qsize)
+        self.update_data()
+        self.check_stale_channels()
 
-            self.data_labels[ip] = labels_for_this_slave
+    @staticmethod
+    def create_scroll_area(master):
+        """Cihaz çerçevelerini taşıyan, dikey kaydırılabilir bir alan oluşturur."""
+        canvas = tk.Canvas(master, background='#e0e0e0', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(master, orient='vertical', command=canvas.yview)
+        inner = ttk.Frame(canvas)
+        window = canvas.create_window((0, 0), window=inner, anchor='nw')
 
-        self.update_data()
+        inner.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox('all')))
+        canvas.bind('<Configure>', lambda e: canvas.itemconfigure(window, width=e.width))
+        canvas.configure(yscrollcommand=scrollbar.set)
+
+        scrollbar.pack(side='right', fill='y')
+        canvas.pack(side='left', fill='both', expand=True)
+        return inner
 
     def update_data(self):
-        """Her bir slave'den veri okur ve arayüzü günceller."""
+        """Poller'dan gelen sonuçları kuyruktan alır ve arayüzü günceller."""
         if not self.is_running:
             return
 
-        for i, ip in enumerate(SLAVE_IPS):
-            # İlgili etiketleri dictionary'den al
-            labels = self.data_labels[ip]
-            humidity_label = labels.get('humidity')
-            dht_temp_label = labels.get('temperature')  # DHT sıcaklık etiketi için 'temperature' kullanıldı
-            ds18b20_temp_label = labels.get('ds18b20_temperature')
-            status_label = labels['status']
-
-            client = ModbusTcpClient(ip, port=MODBUS_PORT, timeout=5)
-
-            max_connection_attempts_time = 10
-            start_time = time.time()
-            connected = False
-
-            while time.time() - start_time < max_connection_attempts_time and not connected:
-                try:
-                    if client.connect():
-                        connected = True
-                        break
-                    else:
-                        status_label.config(text=f"Durum: Bağlanılıyor ({ip})...", foreground="orange")
-                        time.sleep(0.2)
-                except Exception as e:
-                    status_label.config(text=f"Durum: Bağlantı Hatası ({ip}) - {e}", foreground="red")
-                    time.sleep(0.2)
-
-            if not connected:
-                # KESİNTİ durumunda ilgili etiketleri güncelle
-                if humidity_label: humidity_label.config(text="KESİNTİ", foreground='red')
-                if dht_temp_label: dht_temp_label.config(text="KESİNTİ", foreground='red')
-                if ds18b20_temp_label: ds18b20_temp_label.config(text="KESİNTİ", foreground='red')
-                status_label.config(text=f"Durum: Bağlantı Kesintisi ({ip})", foreground="red")
-                try:
-                    client.close()
-                except Exception:
-                    pass
-                continue  # Bir sonraki IP'ye geç
-
-            # Bağlantı kurulduysa devam et
+        started = time.perf_counter()
+        while True:
             try:
-                write_result = client.write_register(address=99, value=SECRET_KEY)
-
-                if write_result.isError():
-                    status_label.config(text=f"Durum: Anahtar Yazma Hatası ({write_result})", foreground="red")
-                    client.close()
-                    continue
-
-                status_label.config(text="Durum: Bağlı, Veri Okuyor...", foreground="blue")
-
-                if i == 0:  # İlk cihaz (DHT11 - Nem ve Sıcaklık)
-                    result = client.read_holding_registers(address=0, count=2)  # Nem(0), DHT Sıcaklık(1)
-                    if not result.isError():
-                        humidity = result.registers[0]
-                        dht_temperature = result.registers[1]
-
-                        humidity_label.config(text=f"{humidity} %RH", foreground='#000080')
-                        dht_temp_label.config(text=f"{dht_temperature} °C", foreground='#000080')
-                        status_label.config(text="Durum: Veri OK", foreground="green")
-                    else:
-                        # DHT etiketleri varsa güncelle
-                        if humidity_label: humidity_label.config(text="HATA", foreground='red')
-                        if dht_temp_label: dht_temp_label.config(text="HATA", foreground='red')
-                        status_label.config(text=f"Durum: Okuma Hatası ({result})", foreground="red")
-
-                elif i == 1:  # İkinci cihaz (DS18B20 - Sadece Sıcaklık)
-                    result = client.read_holding_registers(address=0, count=1)  # DS18B20 Sıcaklık(0)
-                    if not result.isError():
-                        ds18b20_temperature = result.registers[0]
-
-                        ds18b20_temp_label.config(text=f"{ds18b20_temperature} °C", foreground='#000080')
-                        status_label.config(text="Durum: Veri OK", foreground="green")
-                    else:
-                        # DS18B20 etiketi varsa güncelle
-                        if ds18b20_temp_label: ds18b20_temp_label.config(text="HATA", foreground='red')
-                        status_label.config(text=f"Durum: Okuma Hatası ({result})", foreground="red")
-
-                # Diğer cihaz tipleri için buraya ek if/elif blokları gelebilir
-
-            except Exception as ex:
-                if humidity_label: humidity_label.config(text="AĞ HATASI", foreground='red')
-                if dht_temp_label: dht_temp_label.config(text="AĞ HATASI", foreground='red')
-                if ds18b20_temp_label: ds18b20_temp_label.config(text="AĞ HATASI", foreground='red')
-                status_label.config(text=f"Durum: Ağ Hatası ({ex})", foreground="red")
-            finally:
-                try:
-                    client.close()
-                except Exception:
-                    pass
+                result = self.poller.results.get_nowait()
+            except queue.Empty:
+                break
+            self.apply_result(result)
+        self.ui_update_seconds.observe(time.perf_counter() - started)
 
         if self.is_running:
-            self.master.after(POLLING_INTERVAL_MS, self.update_data)
+            self.master.after(RESULT_CHECK_INTERVAL_MS, self.update_data)
+
+    def check_stale_channels(self):
+        if not self.is_running:
+            return
+        self.alarm_bar.handle(self.alarms.check_stale())
+        # Cevap vermeyen cihazların veri yaşı yeni sonuç beklenmeden ilerletilir
+        for result in list(self.stale_results.values()):
+            self.apply_failure(result)
+        self.master.after(STALE_CHECK_INTERVAL_MS, self.check_stale_channels)
+
+    def apply_result(self, result):
+        """Tek bir slave sonucunu ilgili etiketlere yansıtır."""
+        self.alarm_bar.handle(self.alarms.observe(result.ip, result.ok, result.values, result.timestamp,
+                                                  result.message))
+        labels = self.data_labels[result.index]
+        value_labels = {key: label for key, label in labels.items() if key != 'status'}
+        status_label = labels['status']
+
+        if result.status == STATUS_OK:
+            self.stale_results.pop(result.index, None)
+            for channel in self.devices[result.index].channels:
+                if channel.key in result.values:
+                    self.view.set(value_labels[channel.key], text=channel.format(result.values[channel.key]),
+                                  foreground='#000080')
+            self.view.set(status_label, text="Durum: Veri OK", foreground="green")
+        else:
+            self.apply_failure(result)
+
+    def apply_failure(self, result):
+        """Cevap alınamayan slave'i gösterir: yeterince yeni son iyi değerler varsa yaşlarıyla, yoksa hata metni."""
+        labels = self.data_labels[result.index]
+        status_label = labels['status']
+        value_text, reason = FAILURE_TEXT.get(result.status, FAILURE_TEXT[STATUS_NETWORK_ERROR])
+        detail = result.ip if result.status == STATUS_OFFLINE else result.message
+        age = result.last_good_age()
+
+        if age is None or age > LAST_GOOD_MAX_AGE_S:
+            self.stale_results.pop(result.index, None)
+            for key, label in labels.items():
+                if key != 'status':
+                    self.view.set(label, text=value_text, foreground='red')
+            self.view.set(status_label, text=f"Durum: {reason} ({detail})", foreground="red")
+            return
+
+        self.stale_results[result.index] = result
+        age_text = format_age(age)
+        for channel in self.devices[result.index].channels:
+            if channel.key in result.last_good:
+                self.view.set(labels[channel.key], text=f"{channel.format(result.last_good[channel.key])} "
+                                                        f"({age_text} önce)", foreground=STALE_COLOR)
+        self.view.set(status_label, text=f"Durum: {reason} ({detail}) - son veri {age_text} önce",
+                      foreground="red")
 
     def clean_up(self):
         """Uygulama kapatılırken çalışan görevleri durdur."""
         print("Uygulama kapatılıyor. Arka plan görevleri sonlandırılıyor...")
         self.is_running = False
+        self.view.cancel()
+        self.poller.stop()
+        if self.capture:
+            self.capture.close()
         self.master.destroy()
         sys.exit()
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Trafo Odası Nem/Sıcaklık Monitörü")
+    arg_parser.add_argument('--config', default='config.ini', help="Ayar dosyası (varsayılan: config.ini)")
+    arg_parser.add_argument('--service', nargs='?', const=f"{STREAM_HOST}:{STREAM_PORT}",
+                            help="Doğrudan sorgulamak yerine acquisition_service akışını oku (host:port)")
+    arg_parser.add_argument('--capture', help="Modbus istek ve sonuçlarını bu dosyaya kaydet")
+    arg_parser.add_argument('--replay', help="Slave'leri sorgulamak yerine kayıt dosyasını oynat")
+    arg_parser.add_argument('--speed', type=float, default=1.0,
+                            help="Oynatma hızı: 1 gerçek zaman, 10 on kat hızlı, 0 beklemeden (varsayılan: 1)")
+    metrics.add_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    metrics.start_exporters(args)
+    settings = load_settings(args.config)
+
+    source = None
+    if args.replay:
+        source = ReplaySource(args.replay, args.speed, settings.devices)
+    elif args.service:
+        host, _, port = args.service.rpartition(':')
+        source = StreamSubscriber(host or STREAM_HOST, int(port), devices=settings.devices)
+
     root = tk.Tk()
-    app = ModbusMonitorApp(root)
+    app = ModbusMonitorApp(root, settings, source, CaptureWriter(args.capture) if args.capture else None)
     root.mainloop()
\ No newline at end of file
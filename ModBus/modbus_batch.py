@@ -0,0 +1,390 @@
+import errno
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+
+from common.metrics import REGISTRY
+from modbus_pool import (CONNECT_SECONDS, POOL_ERRORS, SECRET_KEY_REGISTER, STATUS_OK, STATUS_OFFLINE,
+                         STATUS_KEY_ERROR, STATUS_READ_ERROR, STATUS_NETWORK_ERROR)
+
+FC_READ_HOLDING = 0x03
+FC_WRITE_SINGLE = 0x06
+
+_MBAP = struct.Struct('>HHHB')     # işlem no, protokol no, uzunluk, birim no
+_MAX_LENGTH = 254                  # MBAP uzunluğu: birim no + en çok 253 baytlık PDU
+_REQUEST = struct.Struct('>BHH')   # fonksiyon, adres, adet (okuma) veya değer (yazma)
+_KEY = -1                          # Bekleyen işlemler tablosunda anahtar yazma isteği
+_REVOKE = -2                       # Anahtardan önce register 99'a yazılan 0 (bkz. BatchReader._start)
+
+BATCH_SECONDS = REGISTRY.histogram('modbus_batch_seconds', "Bir toplu (boru hatlı) okumanın toplam süresi")
+PIPELINE_DEPTH = REGISTRY.histogram('modbus_pipeline_depth', "Bir bağlantıda aynı anda cevap bekleyen istek sayısı",
+                                    buckets=(1, 2, 4, 8, 16, 32))
+
+
+class FramingError(OSError):
+    """Slave'den gelen MBAP başlığı geçersiz; akış yeniden eşlenemez, bağlantı kapatılır."""
+
+
+@dataclass(frozen=True)
+class ReadRequest:
+    """Bir slave'den okunacak holding register aralığı."""
+    ip: str
+    address: int
+    count: int
+    unit: int = 1
+
+
+@dataclass
+class ReadResponse:
+    """Bir ReadRequest'in sonucu; `status` modbus_pool'daki durum kodlarından biridir."""
+    request: ReadRequest
+    status: str
+    registers: list = None
+    message: str = ''
+
+    @property
+    def ok(self):
+        return self.status == STATUS_OK
+
+
+class _Link:
+    """Tek bir slave'e açık, engellemeyen soket ve işlem numarası sayacı."""
+
+    def __init__(self, ip):
+        self.ip = ip
+        self.lock = threading.Lock()
+        self.sock = None
+        self.next_tid = 0
+        self.key_written_at = 0.0
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.key_written_at = 0.0
+
+
+class _Exchange:
+    """Bir `read()` çağrısında tek bir bağlantı üzerindeki işlemlerin durumu."""
+
+    def __init__(self, link, indices):
+        self.link = link
+        self.indices = indices
+        self.queue = []      # Gönderilecek (işlem türü, birim no, PDU); tür, istek indeksi, _REVOKE veya _KEY
+        self.pending = {}    # işlem no -> işlem türü
+        self.barrier = False  # _REVOKE cevabı gelene kadar sıradaki istekler gönderilmez
+        self.outbox = bytearray()
+        self.inbox = bytearray()
+        self.connecting = False
+        self.connect_started = 0.0
+        self.reused = False
+        self.retried = False
+        self.answered = False
+        self.key_error = None
+        self.done = False
+
+
+class BatchReader:
+    """Birden fazla slave'den birden fazla register aralığını tek çağrıda okur.
+
+    İstekler slave başına tek bir Modbus TCP bağlantısında işlem numaralarıyla
+    boru hattına (pipelining) alınır: anahtar yazma ve tüm okumalar cevap
+    beklenmeden art arda gönderilir (bağlantı başına en çok `max_in_flight`),
+    cevaplar işlem numarasına göre eşleştirilir. Tüm slave'ler tek bir thread'de,
+    engellemeyen soketlerle aynı anda konuşulur; böylece bir sorgunun süresi istek
+    sayısına değil, en yavaş slave'in bir gidiş-dönüşüne bağlı kalır.
+
+    Bağlantılar çağrılar arasında açık tutulur; erişim yalnızca `key_refresh_s`
+    dolunca, SlaveConnectionPool'daki gibi önce 0 sonra anahtar yazılarak yenilenir.
+    `breaker` (CircuitBreaker) verilirse devresi açık slave'e bağlanılmaz.
+    """
+
+    def __init__(self, port, secret_key, timeout=5, key_refresh_s=15, max_in_flight=16, breaker=None):
+        self.port = port
+        self.secret_key = secret_key
+        self.timeout = timeout
+        # Yenileme ACCESS_TIMEOUT_S dolmadan yapılmalı; aksi halde aradaki sürede register'lar donar
+        self.key_refresh_s = key_refresh_s
+        self.max_in_flight = max_in_flight
+        self.breaker = breaker
+        self._links = {}
+        self._lock = threading.Lock()
+
+    def read(self, requests, deadline=None):
+        """İstekleri okur; sonuçları aynı sırada bir ReadResponse listesi olarak döndürür.
+
+        `deadline` time.monotonic() cinsinden mutlak son andır (varsayılan: şimdi + timeout).
+        Aynı anda farklı thread'lerden çağrılabilir; ortak slave'ler sırayla kullanılır.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout if deadline is None else deadline
+        requests = list(requests)
+        responses = [None] * len(requests)
+        by_ip = {}
+        for index, request in enumerate(requests):
+            by_ip.setdefault(request.ip, []).append(index)
+
+        links = [self._link(ip) for ip in sorted(by_ip)]  # Sıralı kilit: iki çağrı birbirini kilitlemez
+        for link in links:
+            link.lock.acquire()
+        try:
+            self._run(requests, responses, by_ip, deadline)
+        finally:
+            for link in links:
+                link.lock.release()
+        BATCH_SECONDS.observe(time.monotonic() - started)
+        return responses
+
+    def close_all(self):
+        with self._lock:
+            links = list(self._links.values())
+        for link in links:
+            with link.lock:
+                link.close()
+
+    def _link(self, ip):
+        with self._lock:
+            link = self._links.get(ip)
+            if link is None:
+                link = self._links[ip] = _Link(ip)
+            return link
+
+    def _run(self, requests, responses, by_ip, deadline):
+        selector = selectors.DefaultSelector()
+        exchanges = []
+        try:
+            for ip, indices in by_ip.items():
+                if self.breaker is not None and not self.breaker.allow(ip):
+                    POOL_ERRORS.labels(ip, 'breaker').inc()
+                    self._resolve(requests, responses, indices, STATUS_OFFLINE,
+                                  "Devre açık, slave yoklamada bekleniyor")
+                    continue
+                exchange = _Exchange(self._links[ip], indices)
+                exchanges.append(exchange)
+                self._start(exchange, requests, responses, selector)
+
+            while any(not exchange.done for exchange in exchanges):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, events in selector.select(remaining):
+                    exchange = key.data
+                    try:
+                        if exchange.connecting:
+                            self._connected(exchange)
+                        if events & selectors.EVENT_READ:
+                            self._receive(exchange, requests, responses)
+                        self._send(exchange)
+                    except OSError as e:
+                        self._failed(exchange, requests, responses, selector, e)
+                        continue
+                    self._watch(exchange, selector)
+
+            for exchange in exchanges:
+                if not exchange.done:
+                    # Cevabı gelmeyen işlemler bağlantıda kalır; eşleşme karışmasın diye bağlantı kapatılır
+                    status = STATUS_OFFLINE if exchange.connecting else STATUS_NETWORK_ERROR
+                    POOL_ERRORS.labels(exchange.link.ip, 'timeout').inc()
+                    if self.breaker is not None and not exchange.answered:
+                        # Bağlanamayan veya hiç cevap vermeyen slave; devre bir sonraki sorgularda açılır
+                        self.breaker.record_failure(exchange.link.ip)
+                    self._close(exchange, selector)
+                    self._finish(exchange, requests, responses, status, "Zaman aşımı")
+        finally:
+            selector.close()
+
+    def _start(self, exchange, requests, responses, selector):
+        """Bağlantıyı (gerekirse) açar ve anahtar yazma + okuma isteklerini sıraya koyar."""
+        link = exchange.link
+        exchange.queue = []
+        exchange.barrier = False
+        if time.monotonic() - link.key_written_at >= self.key_refresh_s:
+            # Firmware erişim süresini yalnızca izin yokken anahtarı görünce başlatır (bkz.
+            # SlaveConnectionPool._renew_access). 0'ın cevabı gelmeden anahtar gönderilmez; böylece
+            # firmware'in loop()'u 0'ı anahtardan önce görür. Yenileme başına bir gidiş-dönüş ekler.
+            unit = requests[exchange.indices[0]].unit
+            exchange.queue.append((_REVOKE, unit, _REQUEST.pack(FC_WRITE_SINGLE, SECRET_KEY_REGISTER, 0)))
+            exchange.queue.append((_KEY, unit, _REQUEST.pack(FC_WRITE_SINGLE, SECRET_KEY_REGISTER, self.secret_key)))
+        for index in exchange.indices:
+            if responses[index] is None:
+                request = requests[index]
+                exchange.queue.append((index, request.unit,
+                                       _REQUEST.pack(FC_READ_HOLDING, request.address, request.count)))
+        exchange.queue.reverse()  # pop() ile baştan alınır
+
+        exchange.reused = link.sock is not None
+        if not exchange.reused:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            link.sock = sock
+            exchange.connecting = True
+            exchange.connect_started = time.perf_counter()
+            error = sock.connect_ex((link.ip, self.port))
+            if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                self._failed(exchange, requests, responses, selector, OSError(error, os.strerror(error)))
+                return
+        selector.register(link.sock, selectors.EVENT_WRITE if exchange.connecting else selectors.EVENT_READ,
+                          exchange)
+        if not exchange.connecting:
+            try:
+                self._send(exchange)
+            except OSError as e:
+                self._failed(exchange, requests, responses, selector, e)
+                return
+            self._watch(exchange, selector)
+
+    def _connected(self, exchange):
+        error = exchange.link.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            raise OSError(error, os.strerror(error))
+        exchange.connecting = False
+        CONNECT_SECONDS.labels(exchange.link.ip).observe(time.perf_counter() - exchange.connect_started)
+
+    def _send(self, exchange):
+        if exchange.connecting:
+            return
+        link = exchange.link
+        queued = False
+        while exchange.queue and not exchange.barrier and len(exchange.pending) < self.max_in_flight:
+            kind, unit, pdu = exchange.queue.pop()
+            link.next_tid = (link.next_tid + 1) & 0xFFFF
+            exchange.pending[link.next_tid] = kind
+            exchange.barrier = kind == _REVOKE
+            exchange.outbox += _MBAP.pack(link.next_tid, 0, len(pdu) + 1, unit) + pdu
+            queued = True
+        if queued:
+            PIPELINE_DEPTH.observe(len(exchange.pending))
+        if exchange.outbox:
+            try:
+                sent = link.sock.send(exchange.outbox)
+            except BlockingIOError:
+                return  # Gönderim tamponu dolu; soket yazılabilir olunca devam edilir
+            del exchange.outbox[:sent]
+
+    def _receive(self, exchange, requests, responses):
+        data = exchange.link.sock.recv(65536)
+        if not data:
+            raise ConnectionResetError(errno.ECONNRESET, "Bağlantı slave tarafından kapatıldı")
+        inbox = exchange.inbox
+        inbox += data
+        pos = 0
+        while len(inbox) - pos >= _MBAP.size + 1:
+            tid, protocol, length, _unit = _MBAP.unpack_from(inbox, pos)
+            if protocol != 0 or not 2 <= length <= _MAX_LENGTH:
+                # Başlığa güvenilemez: sonraki çerçevenin nerede başladığı bilinmiyor
+                raise FramingError(errno.EPROTO, f"Geçersiz MBAP başlığı (protokol {protocol}, uzunluk {length})")
+            end = pos + 6 + length
+            if end > len(inbox):
+                break
+            kind = exchange.pending.pop(tid, None)
+            if kind is not None:
+                self._handle(exchange, kind, inbox, pos + _MBAP.size, end, requests, responses)
+            pos = end
+        del inbox[:pos]
+
+        if not exchange.queue and not exchange.pending:
+            self._finish(exchange, requests, responses)
+
+    def _handle(self, exchange, kind, buffer, start, end, requests, responses):
+        if not exchange.answered:
+            exchange.answered = True
+            if self.breaker is not None:
+                self.breaker.record_success(exchange.link.ip)
+        function = buffer[start]
+        detail = buffer[start + 1] if end - start >= 2 else None  # İstisna kodu veya bayt sayısı
+        if kind in (_REVOKE, _KEY):
+            if kind == _REVOKE:
+                exchange.barrier = False
+            error = _reply_error(function, detail, FC_WRITE_SINGLE)
+            if error is None and end - start < 5:
+                error = "Eksik cevap"
+            if error is not None:
+                POOL_ERRORS.labels(exchange.link.ip, 'key').inc()
+                if exchange.key_error is None:
+                    exchange.key_error = f"Anahtar yazılamadı ({error})"
+                exchange.queue = []  # Erişim yenilenemedi; okumalar gönderilmez
+            elif kind == _KEY:
+                exchange.link.key_written_at = time.monotonic()
+            return
+        request = requests[kind]
+        error = _reply_error(function, detail, FC_READ_HOLDING)
+        if error is None and detail != 2 * request.count:
+            error = f"Hatalı bayt sayısı ({detail}, beklenen {2 * request.count})"
+        if error is None and start + 2 + detail > end:
+            error = "Eksik cevap"
+        if error is not None:
+            responses[kind] = ReadResponse(request, STATUS_READ_ERROR, message=error)
+            return
+        registers = list(struct.unpack_from(f'>{request.count}H', buffer, start + 2))
+        responses[kind] = ReadResponse(request, STATUS_OK, registers)
+
+    def _failed(self, exchange, requests, responses, selector, error):
+        link = exchange.link
+        connecting = exchange.connecting
+        self._close(exchange, selector)
+        if exchange.reused and not exchange.answered and not exchange.retried:
+            # Uzun süre boşta kalan soket karşı tarafça kapatılmış olabilir; bir kez yeniden kur
+            POOL_ERRORS.labels(link.ip, 'reconnect').inc()
+            exchange.retried = True
+            exchange.pending.clear()
+            exchange.outbox.clear()
+            exchange.inbox.clear()
+            self._start(exchange, requests, responses, selector)
+            return
+        POOL_ERRORS.labels(link.ip, 'connect' if connecting else 'network').inc()
+        if self.breaker is not None:
+            self.breaker.record_failure(link.ip)
+        self._finish(exchange, requests, responses, STATUS_OFFLINE if connecting else STATUS_NETWORK_ERROR,
+                     str(error))
+
+    def _close(self, exchange, selector):
+        sock = exchange.link.sock
+        if sock is not None and sock in selector.get_map():
+            selector.unregister(sock)
+        exchange.link.close()
+        exchange.connecting = False
+
+    def _watch(self, exchange, selector):
+        sock = exchange.link.sock
+        if sock is None:
+            return
+        if exchange.done:
+            selector.unregister(sock)  # Bağlantı açık kalır, sonraki çağrıda yeniden kullanılır
+            return
+        events = selectors.EVENT_WRITE if exchange.connecting else selectors.EVENT_READ
+        if exchange.outbox:
+            events |= selectors.EVENT_WRITE
+        selector.modify(sock, events, exchange)
+
+    def _finish(self, exchange, requests, responses, status=None, message=''):
+        """İşlemi bitirir: cevapsız istekler `status` ile, anahtar hatasında tüm istekler KEY_ERROR ile döner."""
+        exchange.done = True
+        if exchange.key_error is not None:
+            self._resolve(requests, responses, exchange.indices, STATUS_KEY_ERROR, exchange.key_error, force=True)
+        elif status is not None:
+            self._resolve(requests, responses, exchange.indices, status, message)
+
+    @staticmethod
+    def _resolve(requests, responses, indices, status, message, force=False):
+        for index in indices:
+            if force or responses[index] is None:
+                responses[index] = ReadResponse(requests[index], status, message=message)
+
+
+def _reply_error(function, detail, expected):
+    """Cevabın fonksiyon kodunu denetler; sorun varsa açıklamasını, yoksa None döndürür."""
+    if function == expected | 0x80:
+        return f"Modbus istisnası {detail}"
+    if function != expected:
+        return f"Beklenmeyen fonksiyon kodu {function:#04x}"
+    if detail is None:
+        return "Eksik cevap"
+    return None
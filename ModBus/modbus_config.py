@@ -0,0 +1,96 @@
+import configparser
+from dataclasses import dataclass, field
+
+from poll_scheduler import AdaptiveSchedule
+from register_map import build_devices, load_device_types
+
+DEFAULT_SLAVE_IPS = ['192.168.220.179']  # Varsayılan olarak sadece bir IP
+
+
+@dataclass
+class ModbusSettings:
+    """config.ini'den okunan ayarlar (hem arayüz hem servis tarafından kullanılır)."""
+    slave_ips: list = field(default_factory=lambda: list(DEFAULT_SLAVE_IPS))
+    modbus_port: int = 502
+    polling_interval_ms: int = 2000
+    secret_key: int = 12345
+    slave_types: list = field(default_factory=list)
+    register_map: str = 'devices.ini'
+    devices: list = field(default_factory=list)
+    adaptive_polling: bool = False  # Cihaz başına değişen aralıklarla sorgulama (isteğe bağlı)
+    min_interval_ms: int = None   # Varsayılan: polling_interval_ms / 4
+    max_interval_ms: int = None   # Varsayılan: polling_interval_ms * 10
+    backoff_max_ms: int = 300000
+    alarm_rules: str = 'alarms.ini'
+    change_threshold: float = 1.0  # Bu kadar değişim gürültü sayılır (DHT11 ±1 birim oynar)
+    pipelining: bool = False       # Anahtar yazma ve okumalar tek bağlantıda art arda gönderilir
+    parser: configparser.ConfigParser = None
+
+
+def load_settings(path='config.ini'):
+    """config.ini'yi okur; eksik/hatalı dosyada varsayılan ayarlarla devam eder."""
+    config = configparser.ConfigParser(interpolation=None)
+    settings = ModbusSettings(parser=config)
+    try:
+        config.read(path, encoding='utf-8')
+
+        # Modbus Ayarları
+        settings.slave_ips = [ip.strip() for ip in config['Modbus']['slave_ips'].split(',')]
+        settings.modbus_port = int(config['Modbus']['modbus_port'])
+        settings.polling_interval_ms = int(config['Modbus']['polling_interval_ms'])
+
+        # Güvenlik Ayarları
+        settings.secret_key = int(config['Security']['secret_key'])
+
+    except KeyError as ke:
+        print(f"Hata: config.ini dosyasında eksik veya hatalı bölüm/anahtar: {ke}")
+        print("Lütfen config.ini dosyasının doğru formatta olduğundan ve tüm gerekli anahtarları içerdiğinden emin olun.")
+        settings = ModbusSettings(parser=config)
+        print("Varsayılan ayarlar kullanılıyor. Lütfen config.ini dosyanızı kontrol edin.")
+    except Exception as ex:
+        print(f"config.ini dosyasını okurken beklenmeyen bir hata oluştu: {ex}")
+        settings = ModbusSettings(parser=config)
+        print("Varsayılan ayarlar kullanılıyor. Lütfen config.ini dosyanızı kontrol edin.")
+
+    # --- Cihaz Tipleri ve Register Haritası ---
+    # [Modbus] slave_types = dht11, ds18b20, ...  (slave_ips ile aynı sırada, isteğe bağlı)
+    # [Modbus] register_map = devices.ini         (tip tanımlarının bulunduğu dosya)
+    slave_types = config.get('Modbus', 'slave_types', fallback='')
+    settings.slave_types = [t.strip() for t in slave_types.split(',')] if slave_types.strip() else []
+    settings.register_map = config.get('Modbus', 'register_map', fallback='devices.ini')
+    settings.alarm_rules = config.get('Modbus', 'alarm_rules', fallback='alarms.ini')
+    settings.devices = build_devices(settings.slave_ips, settings.slave_types,
+                                     load_device_types(settings.register_map))
+
+    # --- Uyarlamalı Sorgulama (isteğe bağlı) ---
+    # [Modbus] adaptive_polling = yes       (varsayılan no: tüm cihazlar polling_interval_ms ile birlikte sorgulanır)
+    # [Modbus] min_interval_ms / max_interval_ms / backoff_max_ms / change_threshold
+    try:
+        settings.adaptive_polling = config.getboolean('Modbus', 'adaptive_polling', fallback=False)
+        settings.min_interval_ms = config.getint('Modbus', 'min_interval_ms', fallback=None)
+        settings.max_interval_ms = config.getint('Modbus', 'max_interval_ms', fallback=None)
+        settings.backoff_max_ms = config.getint('Modbus', 'backoff_max_ms', fallback=settings.backoff_max_ms)
+        settings.change_threshold = config.getfloat('Modbus', 'change_threshold', fallback=settings.change_threshold)
+    except ValueError as ve:
+        print(f"Hata: config.ini'deki uyarlamalı sorgulama ayarları geçersiz, varsayılanlar kullanılıyor: {ve}")
+
+    # --- İstek Boru Hattı (isteğe bağlı) ---
+    # [Modbus] pipelining = yes   (anahtar yazma ve tüm register blokları cevap beklenmeden gönderilir)
+    try:
+        settings.pipelining = config.getboolean('Modbus', 'pipelining', fallback=False)
+    except ValueError as ve:
+        print(f"Hata: config.ini'deki pipelining ayarı geçersiz, kapalı kabul ediliyor: {ve}")
+    return settings
+
+
+def build_schedule(settings, interval_ms=None):
+    """Ayarlara göre cihaz başına zamanlayıcı oluşturur; uyarlamalı sorgulama kapalıysa None döner."""
+    if not settings.adaptive_polling:
+        return None
+    base = (interval_ms or settings.polling_interval_ms) / 1000.0
+    return AdaptiveSchedule(
+        len(settings.devices), base,
+        min_interval=settings.min_interval_ms / 1000.0 if settings.min_interval_ms else None,
+        max_interval=settings.max_interval_ms / 1000.0 if settings.max_interval_ms else None,
+        backoff_max=settings.backoff_max_ms / 1000.0,
+        change_threshold=settings.change_threshold)
@@ -0,0 +1,280 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+
+from common.capture import DIRECTION_RX, DIRECTION_TX, SOURCE_MODBUS
+from common.metrics import REGISTRY
+from circuit_breaker import CircuitBreaker
+from modbus_batch import BatchReader, ReadRequest
+from modbus_pool import (SlaveConnectionPool, SlaveUnavailable, STATUS_OK, STATUS_READ_ERROR,
+                         STATUS_NETWORK_ERROR)
+
+# --- Ölçümler ---
+READ_SECONDS = REGISTRY.histogram('modbus_read_seconds', "Tek bir register bloğunu okuma süresi", ('ip',))
+POLL_SECONDS = REGISTRY.histogram('modbus_poll_seconds', "Bir slave sorgusunun toplam süresi (bağlantı dahil)", ('ip',))
+POLL_RESULTS = REGISTRY.counter('modbus_poll_results_total', "Sorgu sonuçları, duruma göre", ('ip', 'status'))
+IN_FLIGHT = REGISTRY.gauge('modbus_in_flight', "Cevabı beklenen slave sayısı")
+RESULT_QUEUE_DEPTH = REGISTRY.gauge('modbus_result_queue_depth', "Tüketilmeyi bekleyen sorgu sonucu sayısı")
+POLL_INTERVAL = REGISTRY.gauge('modbus_poll_interval_seconds', "Slave'in bir sonraki sorgusuna kadar beklenen süre", ('ip',))
+
+
+@dataclass
+class SlaveResult:
+    """Bir slave'in tek bir sorgusunun sonucu."""
+    index: int
+    ip: str
+    status: str
+    values: dict = field(default_factory=dict)
+    message: str = ''
+    duration: float = 0.0
+    timestamp: float = field(default_factory=time.time)
+    last_good: dict = field(default_factory=dict)  # Başarısız sorguda: son başarılı okumanın değerleri
+    last_good_at: float = None                     # ... ve zamanı (time.time())
+
+    @property
+    def ok(self):
+        return self.status == STATUS_OK
+
+    def last_good_age(self, now=None):
+        """Son başarılı okumanın yaşı (sn); hiç okunamamışsa None."""
+        if self.last_good_at is None:
+            return None
+        return (time.time() if now is None else now) - self.last_good_at
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+
+
+class LastGoodCache:
+    """Her slave'in son başarılı okumasını ve zamanını tutar.
+
+    Slave cevap vermediğinde gösterge ve akış tüketicileri boş değer yerine bu
+    değerleri yaşlarıyla birlikte sunabilir.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def update(self, ip, values, timestamp):
+        with self._lock:
+            self._entries[ip] = (dict(values), timestamp)
+
+    def get(self, ip):
+        """`(değerler, zaman)`; slave hiç okunamamışsa `({}, None)`."""
+        with self._lock:
+            values, timestamp = self._entries.get(ip, ({}, None))
+            return dict(values), timestamp
+
+    def fill(self, result):
+        """Başarılı sonucu önbelleğe yazar, başarısız sonuca son iyi değerleri ekler."""
+        if result.ok:
+            self.update(result.ip, result.values, result.timestamp)
+        else:
+            result.last_good, result.last_good_at = self.get(result.ip)
+        return result
+
+
+def read_slave(index, device, pool, deadline):
+    """Havuzdaki bağlantıyı kullanarak bir cihazın register bloklarını okur.
+
+    `deadline` time.monotonic() cinsinden mutlak son andır; yeni bağlantı kurulurken
+    soket zaman aşımı bu süreyi aşmaz.
+    """
+    start = time.monotonic()
+    ip = device.ip
+
+    def result(status, values=None, message=''):
+        return _finish_result(index, ip, start, status, values, message)
+
+    try:
+        with pool.connection(ip, deadline) as (client, _reused):
+            values = {}
+            read_seconds = READ_SECONDS.labels(ip)
+            for block in device.blocks:
+                started = time.perf_counter()
+                read_result = client.read_holding_registers(address=block.address, count=block.count)
+                read_seconds.observe(time.perf_counter() - started)
+                if read_result.isError():
+                    return result(STATUS_READ_ERROR, message=str(read_result))
+                values.update(block.decode(read_result.registers))
+            return result(STATUS_OK, values)
+
+    except SlaveUnavailable as su:
+        return result(su.status, message=str(su))
+    except Exception as ex:
+        return result(STATUS_NETWORK_ERROR, message=str(ex))
+
+
+def read_slave_pipelined(index, device, batch, deadline):
+    """read_slave'in boru hatlı sürümü: anahtar yazma ve tüm bloklar tek gidiş-dönüşte istenir."""
+    start = time.monotonic()
+    try:
+        responses = batch.read([ReadRequest(device.ip, block.address, block.count) for block in device.blocks],
+                               deadline)
+        failed = next((response for response in responses if not response.ok), None)
+        if failed is not None:
+            return _finish_result(index, device.ip, start, failed.status, message=failed.message)
+        values = {}
+        for block, response in zip(device.blocks, responses):
+            values.update(block.decode(response.registers))
+        return _finish_result(index, device.ip, start, STATUS_OK, values)
+    except Exception as ex:
+        return _finish_result(index, device.ip, start, STATUS_NETWORK_ERROR, message=str(ex))
+
+
+def _finish_result(index, ip, start, status, values=None, message=''):
+    duration = time.monotonic() - start
+    POLL_SECONDS.labels(ip).observe(duration)
+    POLL_RESULTS.labels(ip, status).inc()
+    return SlaveResult(index, ip, status, values or {}, message, duration)
+
+
+class ModbusPoller:
+    """Tüm slave'leri sınırlı bir thread havuzunda paralel sorgulayan motor.
+
+    Her sonuç, hazır olduğu anda `results` kuyruğuna konur. Hâlâ cevap bekleyen
+    (ör. kapalı) bir slave bir sonraki döngüde tekrar kuyruğa alınmaz; böylece döngü
+    süresi zaman aşımlarının toplamına değil, en yavaş canlı slave'e bağlı kalır.
+    Bağlantılar `SlaveConnectionPool` üzerinden döngüler arasında açık tutulur.
+
+    Art arda bağlanılamayan slave'in devresi açılır (`CircuitBreaker`): sorgusu ağa
+    çıkmadan KESİNTİ döner, yoklama slave'i canlı bulunca hemen tekrar sorgulanır.
+    Başarısız sonuçlar `last_good` önbelleğindeki son iyi değerlerle birlikte gelir.
+
+    `capture` (CaptureWriter) verilirse her sorgunun istediği register blokları ve
+    sonucu kayda geçer; kayıt `ReplaySource` ile tekrar oynatılabilir.
+
+    `schedule` (AdaptiveSchedule) verilirse her slave kendi aralığında sorgulanır;
+    verilmezse tüm slave'ler `interval_ms` aralığıyla birlikte sorgulanır.
+
+    `pipelined` True ise slave'ler pymodbus yerine `BatchReader` ile okunur: anahtar
+    yazma ve cihazın tüm register blokları aynı bağlantıda cevap beklenmeden gönderilir.
+    """
+
+    def __init__(self, devices, port, secret_key, interval_ms, slave_timeout=10, max_workers=32, schedule=None,
+                 capture=None, pipelined=False):
+        self.devices = list(devices)
+        self.port = port
+        self.secret_key = secret_key
+        self.interval = interval_ms / 1000.0
+        self.slave_timeout = slave_timeout
+        self.schedule = schedule
+        self.capture = capture
+        self.results = queue.Queue()
+        self.breaker = CircuitBreaker(port, on_recovered=self._on_recovered)
+        self.pool = SlaveConnectionPool(port, secret_key, timeout=min(5, slave_timeout), breaker=self.breaker)
+        self.batch = (BatchReader(port, secret_key, timeout=min(5, slave_timeout), breaker=self.breaker)
+                      if pipelined else None)
+        self.last_good = LastGoodCache()
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.devices))),
+                                            thread_name_prefix='modbus-poll')
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()  # Zamanlayıcıya yeni son tarih eklendi
+        self._thread = None
+        IN_FLIGHT.set_function(lambda: len(self._in_flight))
+        RESULT_QUEUE_DEPTH.set_function(self.results.qsize)
+
+    def start(self):
+        """Arka plan sorgulama döngüsünü başlatır."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='modbus-poller', daemon=True)
+        self._thread.start()
+        self.breaker.start()
+
+    def stop(self):
+        """Döngüyü durdurur; bekleyen işler iptal edilir."""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.breaker.stop()
+        self.pool.close_all()
+        if self.batch is not None:
+            self.batch.close_all()
+
+    def poll_cycle(self):
+        """Meşgul olmayan tüm slave'ler için birer sorgu başlatır ve future'ları döndürür."""
+        return self._submit(range(len(self.devices)))
+
+    def poll_due(self):
+        """Yalnızca zamanlayıcıda sırası gelmiş slave'ler için sorgu başlatır."""
+        return self._submit(self.schedule.pop_due())
+
+    def _submit(self, indices):
+        deadline = time.monotonic() + self.slave_timeout
+        futures = []
+        for i in indices:
+            device = self.devices[i]
+            with self._lock:
+                if i in self._in_flight:
+                    continue
+                self._in_flight.add(i)
+            if self.capture:
+                self.capture.record(SOURCE_MODBUS, device.ip, DIRECTION_TX,
+                                    {'index': i, 'blocks': [[block.address, block.count] for block in device.blocks]})
+            if self.batch is not None:
+                future = self._executor.submit(read_slave_pipelined, i, device, self.batch, deadline)
+            else:
+                future = self._executor.submit(read_slave, i, device, self.pool, deadline)
+            future.add_done_callback(lambda f, i=i: self._on_done(i, f))
+            futures.append(future)
+        return futures
+
+    def poll_once(self):
+        """Tek bir döngü çalıştırır ve bitmesini bekleyip sonuçları döndürür."""
+        futures = self.poll_cycle()
+        wait(futures, timeout=self.slave_timeout + 5)
+        return [f.result() for f in futures if f.done() and not f.cancelled()]
+
+    def _on_done(self, index, future):
+        with self._lock:
+            self._in_flight.discard(index)
+        if future.cancelled():
+            return
+        result = future.result()
+        if self.capture:
+            data = result.to_dict()
+            del data['last_good'], data['last_good_at']  # Oynatmada kayıttan yeniden hesaplanır
+            data['duration'] = round(result.duration, 6)
+            self.capture.record(SOURCE_MODBUS, result.ip, DIRECTION_RX, data, result.timestamp)
+        result = self.last_good.fill(result)
+        if self.schedule is not None:
+            interval = self.schedule.record(index, result.ok, result.values)
+            POLL_INTERVAL.labels(result.ip).set(interval)
+            self._wakeup.set()
+        self.results.put(result)
+
+    def _on_recovered(self, ip):
+        """Devre yoklaması slave'i canlı buldu: geri çekilme beklenmeden sorguya alınır."""
+        if self.schedule is None:
+            return
+        for index, device in enumerate(self.devices):
+            if device.ip == ip:
+                self.schedule.wake(index)
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self.schedule is None:
+                cycle_start = time.monotonic()
+                self.poll_cycle()
+                self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - cycle_start)))
+                continue
+            # Uyandırma bayrağı sorgulardan önce temizlenir; bu sırada gelen sonuç döngüyü tekrar uyandırır
+            self._wakeup.clear()
+            self.poll_due()
+            next_due = self.schedule.next_due()
+            self._wakeup.wait(None if next_due is None else max(0.0, next_due - time.monotonic()))
@@ -0,0 +1,200 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from common.metrics import REGISTRY
+
+SECRET_KEY_REGISTER = 99  # Slave'in gizli anahtarı beklediği register (40100)
+ACCESS_TIMEOUT_S = 20     # ESP32 tarafı erişim iznini bu süre sonra kaldırıyor (ACCESS_TIMEOUT_MS)
+
+# --- Okuma Sonucu Durum Kodları ---
+STATUS_OK = 'ok'
+STATUS_OFFLINE = 'offline'              # Bağlantı kurulamadı, backoff süresi dolmadı veya devre açık (KESİNTİ)
+STATUS_KEY_ERROR = 'key_error'          # Register 99'a anahtar yazılamadı
+STATUS_READ_ERROR = 'read_error'        # read_holding_registers hata döndü
+STATUS_NETWORK_ERROR = 'network_error'  # Bağlantı sırasında istisna oluştu (AĞ HATASI)
+
+# --- Ölçümler ---
+CONNECT_SECONDS = REGISTRY.histogram('modbus_connect_seconds', "Slave'e yeni TCP bağlantısı kurma süresi", ('ip',))
+KEY_WRITE_SECONDS = REGISTRY.histogram('modbus_key_write_seconds', "Register 99'a anahtar yazma süresi", ('ip',))
+POOL_ERRORS = REGISTRY.counter('modbus_pool_errors_total',
+                               "Bağlantı havuzu hataları (connect, backoff, breaker, key, reconnect)",
+                               ('ip', 'kind'))
+
+
+class SlaveUnavailable(Exception):
+    """Slave'e şu an kullanılabilir bir bağlantı açılamadığında fırlatılır."""
+
+    def __init__(self, status, message=''):
+        super().__init__(message)
+        self.status = status
+
+
+class _Slot:
+    """Tek bir slave'e ait bağlantı ve yeniden bağlanma durumu."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.client = None
+        self.key_written_at = 0.0
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class SlaveConnectionPool:
+    """Her slave için tek bir açık, anahtarı yazılmış Modbus TCP bağlantısı tutar.
+
+    Bağlantılar döngüler arasında yeniden kullanılır. Kopan bir bağlantı üstel
+    bekleme (backoff) ile yeniden kurulur. Erişim yeni bağlantıda ve slave'in
+    erişim süresi dolmadan önce (`key_refresh_s`) yenilenir; bkz. `_renew_access`.
+
+    `breaker` (CircuitBreaker) verilirse yeniden deneme kararını o verir: devresi
+    açık slave için bağlantı hiç denenmez, hemen KESİNTİ döner.
+    """
+
+    def __init__(self, port, secret_key, timeout=5, key_refresh_s=15, backoff_base=0.5, backoff_max=60,
+                 breaker=None):
+        self.port = port
+        self.secret_key = secret_key
+        self.timeout = timeout
+        # Yenileme ACCESS_TIMEOUT_S dolmadan yapılmalı; aksi halde aradaki sürede register'lar donar
+        self.key_refresh_s = key_refresh_s
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, ip):
+        with self._lock:
+            slot = self._slots.get(ip)
+            if slot is None:
+                slot = self._slots[ip] = _Slot()
+            return slot
+
+    @contextmanager
+    def connection(self, ip, deadline):
+        """Slave için kullanıma hazır istemciyi verir: `(client, reused)`.
+
+        Blok içinde bir istisna oluşursa bağlantı kapatılır ve bir sonraki
+        kullanımda yeniden kurulur.
+        """
+        if self.breaker is not None and not self.breaker.allow(ip):
+            POOL_ERRORS.labels(ip, 'breaker').inc()
+            raise SlaveUnavailable(STATUS_OFFLINE, "Devre açık, slave yoklamada bekleniyor")
+        slot = self._slot(ip)
+        with slot.lock:
+            reused = self._ensure_connected(ip, slot, deadline)
+            try:
+                yield slot.client, reused
+            except Exception:
+                self._drop(slot)
+                raise
+
+    def invalidate(self, ip):
+        """Slave'in bağlantısını kapatır; bir sonraki kullanımda yeniden açılır."""
+        slot = self._slot(ip)
+        with slot.lock:
+            self._drop(slot)
+
+    def close_all(self):
+        """Tüm açık bağlantıları kapatır."""
+        with self._lock:
+            slots = list(self._slots.values())
+        for slot in slots:
+            with slot.lock:
+                self._drop(slot)
+
+    def _ensure_connected(self, ip, slot, deadline):
+        now = time.monotonic()
+        # Sağlık kontrolü: soket kapanmışsa bağlantıyı at ve yeniden kur
+        if slot.client is not None and not slot.client.connected:
+            self._drop(slot)
+
+        reused = slot.client is not None
+        if not reused:
+            if now < slot.retry_at:
+                POOL_ERRORS.labels(ip, 'backoff').inc()
+                raise SlaveUnavailable(STATUS_OFFLINE, f"Yeniden deneme {slot.retry_at - now:.1f} sn sonra")
+
+            # pymodbus ilk bağlantıda yüklenir; arayüz penceresi bu import'u beklemez
+            from pymodbus.client import ModbusTcpClient
+            client = ModbusTcpClient(ip, port=self.port, timeout=max(0.1, min(self.timeout, deadline - now)))
+            started = time.perf_counter()
+            try:
+                connected = client.connect()
+            except Exception as e:
+                connected = False
+                error = str(e)
+            else:
+                error = ''
+            CONNECT_SECONDS.labels(ip).observe(time.perf_counter() - started)
+            if not connected:
+                POOL_ERRORS.labels(ip, 'connect').inc()
+                client.close()
+                self._record_failure(ip, slot)
+                raise SlaveUnavailable(STATUS_OFFLINE, error)
+
+            slot.client = client
+            slot.key_written_at = 0.0
+
+        if time.monotonic() - slot.key_written_at >= self.key_refresh_s:
+            started = time.perf_counter()
+            try:
+                write_result = self._renew_access(slot.client)
+            except Exception as e:
+                self._drop(slot)
+                if reused:
+                    POOL_ERRORS.labels(ip, 'reconnect').inc()
+                    # Uzun süre boşta kalan soket karşı tarafça kapatılmış olabilir; bir kez yeniden kur
+                    self._ensure_connected(ip, slot, deadline)
+                    return False
+                self._record_failure(ip, slot)
+                raise SlaveUnavailable(STATUS_NETWORK_ERROR, str(e))
+            KEY_WRITE_SECONDS.labels(ip).observe(time.perf_counter() - started)
+            if write_result.isError():
+                POOL_ERRORS.labels(ip, 'key').inc()
+                self._drop(slot)
+                raise SlaveUnavailable(STATUS_KEY_ERROR, str(write_result))
+            slot.key_written_at = time.monotonic()
+
+        slot.failures = 0
+        slot.retry_at = 0.0
+        if self.breaker is not None:
+            self.breaker.record_success(ip)
+        return reused
+
+    def _renew_access(self, client):
+        """Register 99'a önce 0, sonra anahtarı yazar; ilk hatalı cevabı veya son cevabı döndürür.
+
+        Firmware erişim süresini yalnızca izin yokken doğru anahtarı görünce başlatır;
+        aynı anahtarı tekrar yazmak süreyi uzatmaz ve 20 sn sonunda register'lar donar.
+        Araya yazılan 0 izni kaldırır (cevabı beklendiği için loop() bunu anahtardan önce
+        görür), ardından yazılan anahtar yeni bir 20 sn'lik süre başlatır.
+        """
+        result = client.write_register(address=SECRET_KEY_REGISTER, value=0)
+        if result.isError():
+            return result
+        return client.write_register(address=SECRET_KEY_REGISTER, value=self.secret_key)
+
+    def _record_failure(self, ip, slot):
+        if self.breaker is not None:
+            self.breaker.record_failure(ip)
+        else:
+            self._schedule_retry(slot)
+
+    def _schedule_retry(self, slot):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** slot.failures))
+        slot.failures += 1
+        slot.retry_at = time.monotonic() + delay * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def _drop(slot):
+        if slot.client is not None:
+            try:
+                slot.client.close()
+            except Exception:
+                pass
+        slot.client = None
+        slot.key_written_at = 0.0
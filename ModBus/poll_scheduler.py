@@ -0,0 +1,119 @@
+import heapq
+import random
+import threading
+import time
+
+
+class _DeviceState:
+    """Bir cihazın sorgu aralığı ve son okunan değerleri."""
+
+    __slots__ = ('interval', 'due', 'failures', 'last_values')
+
+    def __init__(self, interval, due):
+        self.interval = interval
+        self.due = due
+        self.failures = 0
+        self.last_values = None
+
+
+class AdaptiveSchedule:
+    """Her cihaz için ayrı sorgu aralığı tutan, son tarihe göre sıralı zamanlayıcı.
+
+    - Bir kanalı `change_threshold`'dan fazla değişen cihazın aralığı yarıya iner (en az
+      `min_interval`); eşiğin 4 katını aşan bir sıçramada doğrudan `min_interval`'e düşer.
+    - Değerleri durağan olan cihazın aralığı `stable_factor` ile uzar (en çok `max_interval`).
+    - Hata veren cihaz üstel olarak geri çekilir (en çok `backoff_max`); ilk başarılı
+      okumada temel aralığa döner.
+
+    Son tarihler bir yığında (heap) tutulur; sıradaki cihazı bulmak ve yeniden
+    zamanlamak O(log n)'dir. Yerine yenisi eklenmiş eski kayıtlar yığından çıkarken atlanır.
+    """
+
+    def __init__(self, count, base_interval, min_interval=None, max_interval=None, backoff_max=300.0,
+                 change_threshold=1.0, stable_factor=1.25):
+        self.base_interval = base_interval
+        self.min_interval = min_interval if min_interval is not None else base_interval / 4
+        self.max_interval = max_interval if max_interval is not None else base_interval * 10
+        self.backoff_max = backoff_max
+        self.change_threshold = change_threshold
+        self.stable_factor = stable_factor
+
+        now = time.monotonic()
+        self._states = [_DeviceState(base_interval, now) for _ in range(count)]
+        self._heap = [(now, index) for index in range(count)]
+        self._lock = threading.Lock()
+
+    def pop_due(self, now=None):
+        """Son tarihi gelmiş cihazların indekslerini döndürür ve yığından çıkarır."""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                when, index = heapq.heappop(self._heap)
+                state = self._states[index]
+                if state.due != when:
+                    continue  # Eski kayıt
+                state.due = None  # Sonuç gelene kadar tekrar zamanlanmaz
+                due.append(index)
+        return due
+
+    def next_due(self):
+        """En yakın son tarih (time.monotonic() cinsinden); zamanlanmış cihaz yoksa None."""
+        with self._lock:
+            while self._heap and self._states[self._heap[0][1]].due != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def record(self, index, ok, values=None, now=None):
+        """Sorgu sonucuna göre cihazın yeni aralığını hesaplar ve tekrar zamanlar."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._states[index]
+            if not ok:
+                state.failures += 1
+                delay = min(self.backoff_max, self.base_interval * (2 ** state.failures))
+                state.interval = self.base_interval
+                self._push(index, state, now + delay * random.uniform(0.8, 1.2))
+                return delay
+            if state.failures:
+                state.failures = 0
+                state.interval = self.base_interval
+            else:
+                state.interval = self._adapt(state.interval, self._max_change(state.last_values, values))
+            state.last_values = dict(values or {})
+            self._push(index, state, now + state.interval)
+            return state.interval
+
+    def wake(self, index, now=None):
+        """Zamanlanmış (sorguda olmayan) cihazı hemen sıraya alır; ör. devre yoklaması canlı bulduğunda."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._states[index]
+            if state.due is None or state.due <= now:
+                return
+            state.failures = 0
+            state.interval = self.base_interval
+            self._push(index, state, now)
+
+    def interval(self, index):
+        return self._states[index].interval
+
+    def _push(self, index, state, due):
+        state.due = due
+        heapq.heappush(self._heap, (due, index))
+
+    def _max_change(self, previous, values):
+        if not previous or not values:
+            return None
+        changes = [abs(value - previous[key]) for key, value in values.items()
+                   if key in previous and isinstance(value, (int, float))]
+        return max(changes) if changes else None
+
+    def _adapt(self, interval, change):
+        if change is None:
+            return interval
+        if change > 4 * self.change_threshold:
+            return self.min_interval  # Ani sıçrama: hemen sık sorgula
+        if change > self.change_threshold:
+            return max(self.min_interval, interval / 2)
+        return min(self.max_interval, interval * self.stable_factor)
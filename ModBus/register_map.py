@@ -0,0 +1,150 @@
+import configparser
+import os
+import struct
+from dataclasses import dataclass, field
+
+# --- Veri Tipleri: (register sayısı, struct formatı) ---
+# 32 bitlik tiplerde yüksek word önce gelir (Modbus'taki yaygın sıra).
+DATA_TYPES = {
+    'uint16': (1, '>H'),
+    'int16': (1, '>h'),
+    'uint32': (2, '>I'),
+    'int32': (2, '>i'),
+    'float32': (2, '>f'),
+}
+
+MAX_REGISTERS_PER_READ = 125  # Modbus'ta tek read_holding_registers isteğinin üst sınırı
+
+# devices.ini bulunamazsa kullanılan, mevcut donanıma karşılık gelen tipler
+DEFAULT_DEVICE_TYPES = {
+    'dht11': {
+        'title': 'DHT11',
+        'humidity': '0, uint16, 1, %RH, Nem',
+        'temperature': '1, uint16, 1, °C, Sıcaklık',
+    },
+    'ds18b20': {
+        'title': 'DS18B20',
+        'ds18b20_temperature': '0, uint16, 1, °C, Sıcaklık (DS18B20)',
+    },
+}
+
+# slave_types verilmediğinde eski sıralama: 1. cihaz DHT11, 2. cihaz DS18B20
+LEGACY_SLAVE_TYPES = ['dht11', 'ds18b20']
+
+
+@dataclass
+class Channel:
+    """Bir cihazdaki tek bir ölçüm kanalı (ör. nem, sıcaklık)."""
+    key: str
+    address: int
+    dtype: str = 'uint16'
+    scale: float = 1
+    unit: str = ''
+    label: str = ''
+    decimals: int = 0
+
+    @property
+    def count(self):
+        return DATA_TYPES[self.dtype][0]
+
+    def decode(self, registers):
+        """Kanalın register'larını ölçeklenmiş değere çevirir."""
+        raw = struct.pack('>' + 'H' * self.count, *registers)
+        value = struct.unpack(DATA_TYPES[self.dtype][1], raw)[0] * self.scale
+        return round(value, self.decimals) if self.decimals else int(round(value))
+
+    def format(self, value):
+        return f"{value:.{self.decimals}f} {self.unit}".rstrip()
+
+
+@dataclass
+class ReadBlock:
+    """Tek bir read_holding_registers isteğiyle okunan bitişik register aralığı."""
+    address: int
+    count: int
+    channels: list = field(default_factory=list)
+
+    def decode(self, registers):
+        return {ch.key: ch.decode(registers[ch.address - self.address:ch.address - self.address + ch.count])
+                for ch in self.channels}
+
+
+@dataclass
+class DeviceSpec:
+    """Bir slave'in adresi, tipi ve okunacak kanalları."""
+    ip: str
+    type_name: str
+    title: str
+    channels: list = field(default_factory=list)
+    blocks: list = field(default_factory=list)
+
+
+def plan_blocks(channels, max_gap=0, max_count=MAX_REGISTERS_PER_READ):
+    """Kanalları mümkün olan en az sayıda okuma bloğunda birleştirir.
+
+    `max_gap` iki kanal arasında okunmasına izin verilen boş register sayısıdır.
+    ESP32 slave'leri tanımsız register okunduğunda hata döndürdüğü için varsayılan 0'dır.
+    """
+    blocks = []
+    for ch in sorted(channels, key=lambda c: c.address):
+        last = blocks[-1] if blocks else None
+        if last and ch.address <= last.address + last.count + max_gap \
+                and ch.address + ch.count - last.address <= max_count:
+            last.count = max(last.count, ch.address + ch.count - last.address)
+            last.channels.append(ch)
+        else:
+            blocks.append(ReadBlock(ch.address, ch.count, [ch]))
+    return blocks
+
+
+def parse_channel(key, spec):
+    """'adres, tip, ölçek, birim, etiket[, ondalık]' satırını Channel'a çevirir."""
+    parts = [p.strip() for p in spec.split(',')]
+    if len(parts) < 2:
+        raise ValueError(f"Kanal tanımı eksik: {key} = {spec}")
+    dtype = parts[1] or 'uint16'
+    if dtype not in DATA_TYPES:
+        raise ValueError(f"Bilinmeyen veri tipi '{dtype}' ({key})")
+    return Channel(
+        key=key,
+        address=int(parts[0]),
+        dtype=dtype,
+        scale=float(parts[2]) if len(parts) > 2 and parts[2] else 1,
+        unit=parts[3] if len(parts) > 3 else '',
+        label=parts[4] if len(parts) > 4 and parts[4] else key,
+        decimals=int(parts[5]) if len(parts) > 5 and parts[5] else 0,
+    )
+
+
+def load_device_types(path='devices.ini'):
+    """devices.ini'deki cihaz tiplerini okur; dosya yoksa varsayılan tipleri döndürür."""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str  # Kanal adlarının büyük/küçük harfi korunsun
+    if path and os.path.exists(path):
+        parser.read(path, encoding='utf-8')
+    else:
+        parser.read_dict(DEFAULT_DEVICE_TYPES)
+
+    types = {}
+    for name in parser.sections():
+        section = parser[name]
+        channels = [parse_channel(key, value) for key, value in section.items() if key != 'title']
+        types[name] = (section.get('title', name), channels)
+    return types
+
+
+def build_devices(slave_ips, slave_types=None, device_types=None, max_gap=0):
+    """Her slave IP'si için tip haritasından bir DeviceSpec oluşturur."""
+    device_types = device_types if device_types is not None else load_device_types()
+    slave_types = list(slave_types or [])
+    devices = []
+    for i, ip in enumerate(slave_ips):
+        if i < len(slave_types) and slave_types[i]:
+            type_name = slave_types[i]
+        else:
+            type_name = LEGACY_SLAVE_TYPES[i] if i < len(LEGACY_SLAVE_TYPES) else ''
+        if type_name and type_name not in device_types:
+            raise ValueError(f"{ip} için bilinmeyen cihaz tipi: {type_name}")
+        title, channels = device_types.get(type_name, (type_name, []))
+        devices.append(DeviceSpec(ip, type_name, title, channels, plan_blocks(channels, max_gap)))
+    return devices
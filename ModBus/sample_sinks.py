@@ -0,0 +1,229 @@
+import json
+import queue
+import socket
+import sys
+import threading
+from dataclasses import asdict
+
+from common.timeseries import TimeSeriesStore
+
+STREAM_HOST = '127.0.0.1'
+STREAM_PORT = 5020  # Yerel JSONL yayın portu (arayüz buradan okur)
+CLIENT_QUEUE_SIZE = 1000  # Abone başına gönderilmeyi bekleyen en fazla satır; dolarsa abone düşürülür
+
+
+def encode_sample(result):
+    """Bir SlaveResult'ı tek satırlık JSON'a çevirir."""
+    return json.dumps(result.to_dict(), ensure_ascii=False) + '\n'
+
+
+class JsonlSink:
+    """Her örneği bir JSON satırı olarak stdout'a veya bir dosyaya yazar."""
+
+    def __init__(self, path=None):
+        self._file = open(path, 'a', encoding='utf-8') if path else sys.stdout
+        self._owns_file = bool(path)
+
+    def publish(self, result):
+        self._file.write(encode_sample(result))
+        self._file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+
+class _StreamClient:
+    """Tek bir akış abonesi: sınırlı gönderim kuyruğu ve onu boşaltan yazma thread'i."""
+
+    def __init__(self, conn, address, on_error):
+        self.conn = conn
+        self.address = address
+        self._queue = queue.Queue(CLIENT_QUEUE_SIZE)
+        self._on_error = on_error
+        self._thread = threading.Thread(target=self._run, name='stream-client', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def offer(self, data):
+        """Veriyi beklemeden kuyruğa koyar; kuyruk doluysa (abone yetişemiyor) False döner."""
+        try:
+            self._queue.put_nowait(data)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)  # sendall'da bekleyen yazma thread'i hemen döner
+        except OSError:
+            pass
+        self.conn.close()
+        self.offer(None)
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                self._on_error(self)
+                return
+
+
+class TcpStreamSink:
+    """Örnekleri yerel bir TCP portundan bağlı tüm istemcilere JSONL olarak yayınlar.
+
+    Yeni bağlanan istemciye önce her cihazın son örneği gönderilir, böylece arayüz
+    bir sonraki döngüyü beklemeden dolar. Her istemcinin kendi gönderim kuyruğu ve
+    yazma thread'i vardır; `publish` ağ beklemez. Kuyruğu dolan (yavaş veya takılmış)
+    istemci düşürülür, diğerleri ve veri toplama döngüsü etkilenmez.
+    """
+
+    def __init__(self, host=STREAM_HOST, port=STREAM_PORT):
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()
+        self._clients = []
+        self._last = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._accept_loop, name='stream-accept', daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, addr = self._server.accept()
+            except OSError:
+                return  # Sunucu soketi kapatıldı
+            client = _StreamClient(conn, addr, self._drop)
+            with self._lock:
+                if self._last:
+                    client.offer(b''.join(self._last.values()))
+                self._clients.append(client)
+            client.start()
+
+    def publish(self, result):
+        line = encode_sample(result).encode('utf-8')
+        with self._lock:
+            self._last[result.index] = line
+            slow = [client for client in self._clients if not client.offer(line)]
+            for client in slow:
+                self._clients.remove(client)
+        for client in slow:
+            print(f"Akış abonesi yetişemiyor, bağlantısı kesildi: {client.address}")
+            client.close()
+
+    def _drop(self, client):
+        """Gönderimi başarısız olan (kopmuş) istemciyi yazma thread'inden çıkarır."""
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        client.close()
+
+    def close(self):
+        self._server.close()
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+
+
+class TimeSeriesSink:
+    """Başarılı okumaları zaman serisi deposuna (cihaz IP'si, kanal) olarak yazar."""
+
+    def __init__(self, path=None):
+        self.store = TimeSeriesStore(path)
+
+    def publish(self, result):
+        if result.status != 'ok':
+            return
+        for key, value in result.values.items():
+            self.store.append(result.ip, key, result.timestamp, value)
+
+    def close(self):
+        self.store.close()
+
+
+class MqttSink:
+    """Örnekleri MQTT broker'ına yayınlar (paho-mqtt gerekir).
+
+    Her kanal `<topic_prefix>/<ip>/<kanal>` konusuna yazılır. `legacy_topics` ile
+    ModBus/index.html'in dinlediği esp32/temperature ve esp32/humidity konuları da
+    beslenir.
+    """
+
+    def __init__(self, host, port=8883, username=None, password=None, tls=True, topic_prefix='trafo',
+                 legacy_device=0, legacy_topics=None):
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            raise RuntimeError("MQTT çıkışı için paho-mqtt kurulu olmalı: pip install paho-mqtt")
+
+        if hasattr(mqtt, 'CallbackAPIVersion'):  # paho-mqtt 2.x
+            self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id='trafo-acquisition')
+        else:
+            self._client = mqtt.Client(client_id='trafo-acquisition')
+        if username:
+            self._client.username_pw_set(username, password)
+        if tls:
+            self._client.tls_set()
+        self.topic_prefix = topic_prefix
+        self.legacy_device = legacy_device
+        self.legacy_topics = legacy_topics or {}
+        self._client.connect_async(host, port)
+        self._client.loop_start()
+
+    def publish(self, result):
+        base = f"{self.topic_prefix}/{result.ip}"
+        self._client.publish(f"{base}/status", result.status)
+        for key, value in result.values.items():
+            self._client.publish(f"{base}/{key}", str(value))
+            if result.index == self.legacy_device and key in self.legacy_topics:
+                self._client.publish(self.legacy_topics[key], str(value))
+
+    def publish_alarm(self, event):
+        """Alarm olayını `<topic_prefix>/<ip>/alarm` konusuna JSON olarak yazar."""
+        self._client.publish(f"{self.topic_prefix}/{event.device}/alarm", json.dumps(asdict(event)), qos=1)
+
+    def close(self):
+        self._client.loop_stop()
+        self._client.disconnect()
+
+
+def create_sink(spec, config=None):
+    """Komut satırı tanımından bir sink oluşturur.
+
+    jsonl | jsonl:<dosya> | tcp | tcp:<host>:<port> | store:<klasör> |
+    mqtt (ayarlar config.ini [MQTT] bölümünden)
+    """
+    kind, _, arg = spec.partition(':')
+    if kind == 'jsonl':
+        return JsonlSink(arg or None)
+    if kind == 'store':
+        return TimeSeriesSink(arg or 'history')
+    if kind == 'tcp':
+        host, _, port = arg.rpartition(':')
+        return TcpStreamSink(host or STREAM_HOST, int(port) if port else STREAM_PORT)
+    if kind == 'mqtt':
+        if config is None or not config.has_section('MQTT'):
+            raise ValueError("MQTT çıkışı için config.ini dosyasında [MQTT] bölümü gerekli")
+        mqtt_config = config['MQTT']
+        legacy = {}
+        for item in mqtt_config.get('legacy_topics', 'humidity:esp32/humidity, temperature:esp32/temperature').split(','):
+            key, _, topic = item.strip().partition(':')
+            if key and topic:
+                legacy[key] = topic
+        return MqttSink(
+            mqtt_config['host'],
+            port=mqtt_config.getint('port', 8883),
+            username=mqtt_config.get('username'),
+            password=mqtt_config.get('password'),
+            tls=mqtt_config.getboolean('tls', True),
+            topic_prefix=mqtt_config.get('topic_prefix', 'trafo'),
+            legacy_device=mqtt_config.getint('legacy_device', 0),
+            legacy_topics=legacy,
+        )
+    raise ValueError(f"Bilinmeyen çıkış tipi: {spec}")
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import random
+import signal
+import struct
+import time
+
+# ModBus/ModBus2 slave'lerinin davranışı (SlaveESP2.ino)
+SECRET_KEY_REGISTER = 99
+ACCESS_TIMEOUT_S = 20  # ACCESS_TIMEOUT_MS
+REGISTER_COUNT = 100   # 0..99 arası holding register (yalnızca 0, 1 ve 99 tanımlı)
+DEFINED_REGISTERS = {0, 1, SECRET_KEY_REGISTER}
+
+# Modbus fonksiyon ve istisna kodları
+FC_READ_HOLDING = 0x03
+FC_WRITE_SINGLE = 0x06
+FC_WRITE_MULTIPLE = 0x10
+EX_ILLEGAL_FUNCTION = 0x01
+EX_ILLEGAL_ADDRESS = 0x02
+
+_MBAP = struct.Struct('>HHHB')  # işlem no, protokol no, uzunluk, birim no
+
+
+def simulated_ip(index):
+    """index. simüle slave'in loopback adresi (127.0.1.1, 127.0.1.2, ...).
+
+    Tüm 127.0.0.0/8 bloğu yalnızca Linux'ta doğrudan kullanılabilir.
+    """
+    return f"127.0.{1 + index // 250}.{1 + index % 250}"
+
+
+class SimulatedSlave:
+    """Bir ESP32 Modbus TCP slave'inin süreç içi taklidi.
+
+    Register 0 (nem) ve 1 (sıcaklık) yalnızca geçerli anahtar yazılmışken güncellenir;
+    anahtar 20 sn sonra sıfırlanır. Firmware'deki gibi aynı anahtarı tekrar yazmak
+    süreyi uzatmaz; süre ancak izin kalkıp anahtar yeniden görülünce baştan başlar.
+    İzin yokken yapılan (donmuş değer dönen) okumalar `stale_reads` ile sayılır.
+    Gecikme, cevap düşürme ve kesinti ayarlanabilir.
+    """
+
+    def __init__(self, secret_key=12345, latency=0.0, jitter=0.0, drop_rate=0.0,
+                 outage_every=0.0, outage_duration=0.0, sensor_period=2.0, seed=None):
+        self.secret_key = secret_key
+        self.sensor_period = sensor_period  # STM32'den yeni ölçüm gelme aralığı
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.outage_every = outage_every
+        self.outage_duration = outage_duration
+        self.rng = random.Random(seed)
+        self.registers = [0] * REGISTER_COUNT
+        self.registers[0] = 50
+        self.registers[1] = 25
+        self.access_granted_at = None
+        self.last_sensor_update = 0.0
+        self.requests = 0
+        self.sensor_reads = 0  # Register 0/1'i kapsayan okuma istekleri
+        self.stale_reads = 0   # Bunlardan erişim izni yokken cevaplananlar
+        self._epoch = time.monotonic() + self.rng.uniform(0, outage_every or 0)
+
+    def in_outage(self):
+        if not self.outage_every or not self.outage_duration:
+            return False
+        return (time.monotonic() - self._epoch) % self.outage_every < self.outage_duration
+
+    def _tick(self):
+        """Firmware loop()'unun anahtar kontrolü ve sensör güncellemesi."""
+        now = time.monotonic()
+        if self.registers[SECRET_KEY_REGISTER] == self.secret_key:
+            if self.access_granted_at is None:
+                self.access_granted_at = now
+        elif self.access_granted_at is not None:
+            self.access_granted_at = None
+            self.registers[SECRET_KEY_REGISTER] = 0
+        if self.access_granted_at is not None and now - self.access_granted_at > ACCESS_TIMEOUT_S:
+            self.registers[SECRET_KEY_REGISTER] = 0
+            self.access_granted_at = None
+        if self.access_granted_at is not None and now - self.last_sensor_update >= self.sensor_period:
+            self.last_sensor_update = now
+            self.registers[0] = max(0, min(100, self.registers[0] + self.rng.choice((-1, 0, 0, 1))))
+            self.registers[1] = max(0, min(60, self.registers[1] + self.rng.choice((-1, 0, 0, 1))))
+
+    def handle(self, function, body):
+        """Bir Modbus PDU'sunu işler, cevap PDU'sunu döndürür."""
+        self.requests += 1
+        self._tick()
+        if function == FC_READ_HOLDING:
+            address, count = struct.unpack('>HH', body[:4])
+            if count < 1 or count > 125 or any(a not in DEFINED_REGISTERS for a in range(address, address + count)):
+                return bytes((function | 0x80, EX_ILLEGAL_ADDRESS))
+            if address <= 1:
+                self.sensor_reads += 1
+                if self.access_granted_at is None:
+                    self.stale_reads += 1
+            values = self.registers[address:address + count]
+            return bytes((function, 2 * count)) + struct.pack(f'>{count}H', *values)
+        if function == FC_WRITE_SINGLE:
+            address, value = struct.unpack('>HH', body[:4])
+            if address not in DEFINED_REGISTERS:
+                return bytes((function | 0x80, EX_ILLEGAL_ADDRESS))
+            self.registers[address] = value
+            self._tick()
+            return bytes((function,)) + body[:4]
+        if function == FC_WRITE_MULTIPLE:
+            address, count = struct.unpack('>HH', body[:4])
+            values = struct.unpack(f'>{count}H', body[5:5 + 2 * count])
+            if any(a not in DEFINED_REGISTERS for a in range(address, address + count)):
+                return bytes((function | 0x80, EX_ILLEGAL_ADDRESS))
+            self.registers[address:address + count] = values
+            self._tick()
+            return bytes((function,)) + body[:4]
+        return bytes((function | 0x80, EX_ILLEGAL_FUNCTION))
+
+    async def serve_connection(self, reader, writer):
+        """İstekler geliş sırasıyla işlenir; gecikme ağdaki yol süresi gibi her cevaba ayrı uygulanır.
+
+        Böylece işlem numarasıyla art arda gönderilen (pipelining) istekler gecikmeyi
+        paylaşır; `jitter` varsa cevaplar sıra dışı dönebilir.
+        """
+        delayed = set()
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction_id, protocol_id, length, unit_id = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                if self.in_outage():
+                    return  # Kesinti: bağlantıyı kapat
+                if self.drop_rate and self.rng.random() < self.drop_rate:
+                    continue  # Cevap kayboldu; istemci zaman aşımına düşer
+                response = self.handle(pdu[0], pdu[1:])
+                frame = _MBAP.pack(transaction_id, protocol_id, len(response) + 1, unit_id) + response
+                if self.latency or self.jitter:
+                    task = asyncio.ensure_future(self._respond_later(
+                        writer, frame, self.latency + self.rng.uniform(0, self.jitter)))
+                    delayed.add(task)
+                    task.add_done_callback(delayed.discard)
+                    continue
+                writer.write(frame)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in delayed:
+                task.cancel()
+            writer.close()
+
+    @staticmethod
+    async def _respond_later(writer, frame, delay):
+        await asyncio.sleep(delay)
+        if not writer.is_closing():
+            writer.write(frame)
+
+    async def accept(self, reader, writer):
+        if self.in_outage():
+            writer.close()
+            return
+        await self.serve_connection(reader, writer)
+
+
+async def start_slaves(count, port, **options):
+    """`count` adet slave'i simulated_ip(i):port adreslerinde başlatır."""
+    slaves, servers = [], []
+    seed = options.pop('seed', None)
+    for i in range(count):
+        slave = SimulatedSlave(seed=None if seed is None else seed + i, **options)
+        server = await asyncio.start_server(slave.accept, simulated_ip(i), port)
+        slaves.append(slave)
+        servers.append(server)
+    return slaves, servers
+
+
+async def _serve_forever(args, slaves):
+    started, servers = await start_slaves(
+        args.count, args.port, secret_key=args.secret_key, latency=args.latency, jitter=args.jitter,
+        drop_rate=args.drop_rate, outage_every=args.outage_every, outage_duration=args.outage_duration,
+        sensor_period=args.sensor_period, seed=args.seed)
+    slaves.extend(started)
+    stop = asyncio.Event()
+    try:
+        # Ölçüm aracı süreci terminate() ile durdurur; istatistik satırı yine de yazılsın
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    except NotImplementedError:
+        pass  # Windows
+    print(f"{len(slaves)} slave dinleniyor: {simulated_ip(0)} .. {simulated_ip(len(slaves) - 1)} port {args.port}",
+          flush=True)
+    await stop.wait()
+    for server in servers:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ModBus2 ESP32 slave simülatörü (Modbus TCP)")
+    parser.add_argument('--count', type=int, default=1, help="Simüle edilecek slave sayısı")
+    parser.add_argument('--port', type=int, default=1502)
+    parser.add_argument('--secret-key', type=int, default=12345)
+    parser.add_argument('--latency', type=float, default=0.0, help="Cevap başına sabit gecikme (sn)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Gecikmeye eklenen rastgele süre üst sınırı (sn)")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Cevabı düşürülen istek oranı (0-1)")
+    parser.add_argument('--outage-every', type=float, default=0.0, help="Kesinti periyodu (sn)")
+    parser.add_argument('--outage-duration', type=float, default=0.0, help="Her kesintinin süresi (sn)")
+    parser.add_argument('--sensor-period', type=float, default=2.0, help="Register 0/1'in güncellenme aralığı (sn)")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+    slaves = []
+    try:
+        asyncio.run(_serve_forever(args, slaves))
+    except KeyboardInterrupt:
+        pass
+    print(f"istatistik istek={sum(s.requests for s in slaves)} okuma={sum(s.sensor_reads for s in slaves)} "
+          f"erisimsiz={sum(s.stale_reads for s in slaves)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
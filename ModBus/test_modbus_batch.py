@@ -0,0 +1,123 @@
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+
+from modbus_batch import BatchReader, ReadRequest
+from modbus_pool import STATUS_OK, STATUS_READ_ERROR, STATUS_NETWORK_ERROR
+
+_MBAP = struct.Struct('>HHHB')
+
+
+class FakeSlave:
+    """Her isteğe `reply(işlem no, birim no, PDU)` ile cevap veren tek bağlantılı sahte Modbus TCP slave'i."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.requests = []
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def close(self):
+        self._server.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            buffer = b''
+            while True:
+                try:
+                    data = conn.recv(4096)
+                except OSError:
+                    return
+                if not data:
+                    return
+                buffer += data
+                while len(buffer) >= _MBAP.size:
+                    tid, _protocol, length, unit = _MBAP.unpack_from(buffer)
+                    if len(buffer) < 6 + length:
+                        break
+                    pdu, buffer = buffer[_MBAP.size:6 + length], buffer[6 + length:]
+                    self.requests.append(pdu)
+                    conn.sendall(self.reply(tid, unit, pdu))
+
+
+def frame(tid, unit, pdu, protocol=0, length=None):
+    return _MBAP.pack(tid, protocol, len(pdu) + 1 if length is None else length, unit) + pdu
+
+
+def answer(tid, unit, pdu):
+    """Geçerli cevap: yazmalar yankılanır, okumalarda register değeri adresine eşittir."""
+    function, address, count = struct.unpack('>BHH', pdu[:5])
+    if function == 0x06:
+        return frame(tid, unit, pdu)
+    return frame(tid, unit, bytes((function, 2 * count)) + struct.pack(f'>{count}H', *range(address, address + count)))
+
+
+class BatchReaderTest(unittest.TestCase):
+    def read(self, reply, requests=((0, 2),)):
+        slave = FakeSlave(reply)
+        reader = BatchReader(slave.port, 12345, timeout=2)
+        try:
+            started = time.monotonic()
+            responses = reader.read([ReadRequest('127.0.0.1', address, count) for address, count in requests])
+            return responses, time.monotonic() - started, slave
+        finally:
+            reader.close_all()
+            slave.close()
+
+    def test_pipelined_reads_and_access_renewal(self):
+        responses, _, slave = self.read(answer, requests=((0, 2), (10, 3)))
+        self.assertEqual([r.status for r in responses], [STATUS_OK, STATUS_OK])
+        self.assertEqual(responses[1].registers, [10, 11, 12])
+        # Erişim önce 0, sonra anahtar yazılarak yenilenir
+        self.assertEqual(slave.requests[:2], [struct.pack('>BHH', 0x06, 99, 0), struct.pack('>BHH', 0x06, 99, 12345)])
+
+    def test_short_mbap_length_closes_link(self):
+        def reply(tid, unit, pdu):
+            if pdu[0] == 0x03:
+                return frame(tid, unit, b'', length=0) + answer(tid, unit, pdu)
+            return answer(tid, unit, pdu)
+
+        responses, elapsed, _ = self.read(reply)
+        self.assertEqual(responses[0].status, STATUS_NETWORK_ERROR)
+        self.assertIn("MBAP", responses[0].message)
+        self.assertLess(elapsed, 1.0)  # Zaman aşımı beklenmeden
+
+    def test_nonzero_protocol_id_closes_link(self):
+        def reply(tid, unit, pdu):
+            response = answer(tid, unit, pdu)
+            return response if pdu[0] == 0x06 else response[:2] + b'\x00\x01' + response[4:]
+
+        responses, elapsed, _ = self.read(reply)
+        self.assertEqual(responses[0].status, STATUS_NETWORK_ERROR)
+        self.assertLess(elapsed, 1.0)
+
+    def test_wrong_byte_count_is_read_error(self):
+        def reply(tid, unit, pdu):
+            if pdu[0] == 0x03:
+                return frame(tid, unit, bytes((0x03, 2)) + b'\x00\x01')
+            return answer(tid, unit, pdu)
+
+        responses, _, _ = self.read(reply)
+        self.assertEqual(responses[0].status, STATUS_READ_ERROR)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import queue
+import socket
+import sys
+import time
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Ortak modüller (common/)
+
+from acquisition_service import StreamSubscriber
+from modbus_poller import SlaveResult
+from sample_sinks import TcpStreamSink
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TcpStreamSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.sink = TcpStreamSink('127.0.0.1', 0)
+
+    def tearDown(self):
+        self.sink.close()
+
+    def connect(self):
+        conn = socket.create_connection(self.sink.address)
+        self.addCleanup(conn.close)
+        self.assertTrue(wait_for(lambda: len(self.sink._clients) >= 1))
+        return conn
+
+    def test_stalled_subscriber_does_not_block_publish(self):
+        stalled = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled.connect(self.sink.address)
+        self.addCleanup(stalled.close)
+        self.assertTrue(wait_for(lambda: len(self.sink._clients) == 1))
+
+        # Soket tamponlarını ve istemci kuyruğunu dolduracak kadar büyük örnekler; abone hiç okumuyor
+        result = SlaveResult(0, '10.0.0.1', 'ok', {f'r{i}': i for i in range(200)})
+        slowest = 0.0
+        for _ in range(3000):
+            started = time.monotonic()
+            self.sink.publish(result)
+            slowest = max(slowest, time.monotonic() - started)
+        self.assertLess(slowest, 0.2)  # Eskiden abone başına sendall zaman aşımı (1 sn) kadar bekliyordu
+        self.assertTrue(wait_for(lambda: not self.sink._clients))
+
+    def test_new_subscriber_receives_last_samples(self):
+        self.sink.publish(SlaveResult(0, '10.0.0.1', 'ok', {'temperature': 21}))
+        self.sink.publish(SlaveResult(1, '10.0.0.2', 'ok', {'temperature': 22}))
+        conn = self.connect()
+        stream = conn.makefile('r', encoding='utf-8')
+        self.assertIn('10.0.0.1', stream.readline())
+        self.assertIn('10.0.0.2', stream.readline())
+        self.sink.publish(SlaveResult(1, '10.0.0.2', 'ok', {'temperature': 23}))
+        self.assertIn('23', stream.readline())
+
+
+class StreamSubscriberTest(unittest.TestCase):
+    def test_results_are_mapped_to_local_devices_by_ip(self):
+        sink = TcpStreamSink('127.0.0.1', 0)
+        self.addCleanup(sink.close)
+        # Servis sırası: .1, .2, .3; arayüzün config.ini'si farklı sırada ve .3'ü bilmiyor
+        sink.publish(SlaveResult(0, '10.0.0.1', 'ok', {'temperature': 21}))
+        sink.publish(SlaveResult(1, '10.0.0.2', 'ok', {'temperature': 22}))
+        sink.publish(SlaveResult(2, '10.0.0.3', 'ok', {'temperature': 23}))
+        devices = [SimpleNamespace(ip='10.0.0.2'), SimpleNamespace(ip='10.0.0.1')]
+        subscriber = StreamSubscriber(*sink.address, devices=devices)
+        subscriber.start()
+        self.addCleanup(subscriber.stop)
+
+        results = []
+        deadline = time.monotonic() + 3.0
+        while time.monotonic() < deadline:
+            try:
+                results.append(subscriber.results.get(timeout=0.2))
+            except queue.Empty:
+                if len(results) >= 2:
+                    break
+        self.assertEqual(sorted((r.ip, r.index) for r in results), [('10.0.0.1', 1), ('10.0.0.2', 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
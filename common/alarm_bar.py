@@ -0,0 +1,76 @@
+import tkinter as tk
+
+from common.alarms import ALARM_DEVICE_ERROR
+
+COLORS = {
+    'ok': ('#dfeedd', '#2e6b2e'),
+    'warning': ('#fff0c2', '#7a5a00'),
+    'alarm': ('#f8d0d0', '#a00000'),
+}
+TRANSIENT_MS = 10000   # Tek seferlik cihaz hatalarının gösterilme süresi
+MAX_SHOWN = 3          # Şeritte yazılan en fazla alarm sayısı
+
+
+class AlarmBar:
+    """Etkin alarmları pencerenin içinde gösteren, modal olmayan bildirim şeridi.
+
+    messagebox gibi Tk döngüsünü bloklamaz; yeni bir alarm başladığında yalnızca
+    zil çalar. Her olay ayrıca varsa `log` fonksiyonuna yazılır.
+    """
+
+    def __init__(self, parent, log=None):
+        self.master = parent.winfo_toplevel()
+        self.log = log
+        self.active = {}
+        self.transient = None
+        self._transient_job = None
+        self.frame = tk.Frame(parent)
+        self.label = tk.Label(self.frame, anchor='w', justify='left', font=('Helvetica', 10, 'bold'))
+        self.label.pack(fill='x', padx=8, pady=3)
+        self._render()
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def handle(self, events):
+        """AlarmEngine'den gelen olayları işler (Tk thread'inden çağrılmalıdır)."""
+        if not events:
+            return
+        started = False
+        for event in events:
+            if self.log:
+                self.log(f"ALARM: {event.describe()}")
+            if event.kind == ALARM_DEVICE_ERROR:
+                self.transient = event
+                if self._transient_job is not None:
+                    self.master.after_cancel(self._transient_job)
+                self._transient_job = self.master.after(TRANSIENT_MS, self._clear_transient)
+                started = True
+            elif event.active:
+                started = started or event.key not in self.active
+                self.active[event.key] = event
+            else:
+                self.active.pop(event.key, None)
+        if started:
+            self.master.bell()
+        self._render()
+
+    def _clear_transient(self):
+        self._transient_job = None
+        self.transient = None
+        self._render()
+
+    def _render(self):
+        if self.active:
+            latest = sorted(self.active.values(), key=lambda e: e.timestamp, reverse=True)
+            text = f"⚠ {len(latest)} aktif alarm: " + "; ".join(e.describe() for e in latest[:MAX_SHOWN])
+            if len(latest) > MAX_SHOWN:
+                text += " ..."
+            level = 'alarm'
+        elif self.transient is not None:
+            text, level = f"⚠ {self.transient.describe()}", 'warning'
+        else:
+            text, level = "Alarm yok", 'ok'
+        background, foreground = COLORS[level]
+        self.frame.config(background=background)
+        self.label.config(text=text, background=background, foreground=foreground)
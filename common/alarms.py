@@ -0,0 +1,223 @@
+import configparser
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+# --- Alarm Türleri ---
+ALARM_HIGH = 'high'                  # Üst eşik aşıldı
+ALARM_LOW = 'low'                    # Alt eşiğin altına inildi
+ALARM_RATE = 'rate'                  # Değişim hızı (birim/sn) sınırı aşıldı
+ALARM_STALE = 'stale'                # Kanal stale_s süresince veri almadı
+ALARM_OFFLINE = 'offline'            # Cihaz art arda offline_cycles sorguda cevap vermedi
+ALARM_DEVICE_ERROR = 'device_error'  # Cihazın bildirdiği tek seferlik hata (ör. STM32 "ERROR" satırı)
+
+DEVICE_CHANNEL = '*'  # Cihaz düzeyindeki alarmların kanal adı
+
+KIND_TEXT = {
+    ALARM_HIGH: "üst sınır aşıldı",
+    ALARM_LOW: "alt sınırın altında",
+    ALARM_RATE: "çok hızlı değişiyor",
+    ALARM_STALE: "veri gelmiyor",
+    ALARM_OFFLINE: "cihaz cevap vermiyor",
+    ALARM_DEVICE_ERROR: "cihaz hatası",
+}
+
+
+@dataclass(frozen=True)
+class AlarmRule:
+    """Bir kanalın alarm eşikleri. Tanımsız (None) eşikler değerlendirilmez."""
+    high: float = None
+    low: float = None
+    rate: float = None        # birim/sn
+    hysteresis: float = 0.0   # Alarm, değer eşiğin bu kadar gerisine dönünce temizlenir
+    debounce: int = 1         # Durum değişikliği için gereken ardışık örnek sayısı
+    stale_s: float = None
+
+
+@dataclass(frozen=True)
+class AlarmEvent:
+    """Bir alarmın başlaması (`active=True`) veya temizlenmesi."""
+    device: str
+    channel: str
+    kind: str
+    active: bool
+    value: float = None
+    message: str = ''
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def key(self):
+        return self.device, self.channel, self.kind
+
+    def describe(self):
+        where = self.device if self.channel == DEVICE_CHANNEL else f"{self.device} / {self.channel}"
+        text = f"{where}: {KIND_TEXT.get(self.kind, self.kind)}"
+        if self.value is not None:
+            text += f" ({self.value:g})"
+        if self.message:
+            text += f" - {self.message}"
+        return text if self.active else f"{where}: {KIND_TEXT.get(self.kind, self.kind)} - düzeldi"
+
+
+class _Condition:
+    __slots__ = ('active', 'count')
+
+    def __init__(self):
+        self.active = False
+        self.count = 0
+
+
+class _ChannelState:
+    __slots__ = ('rule', 'last_ts', 'last_value', 'conditions')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.last_ts = None
+        self.last_value = None
+        self.conditions = {}
+
+
+class AlarmEngine:
+    """Gelen her örneği kanal kurallarına göre değerlendirip alarm olayları üretir.
+
+    Eşik alarmları histerezisli ve `debounce` örnek gecikmelidir; böylece eşik
+    etrafında salınan bir değer sürekli alarm açıp kapatmaz. Kural araması kanal
+    başına bir kez yapılır, her örnek birkaç karşılaştırmaya mal olur.
+
+    Kurallar `{kanal: AlarmRule}` veya cihaza özel `{"cihaz/kanal": AlarmRule}`
+    biçimindedir; cihaza özel kural genel kuralın yerine geçer.
+    """
+
+    def __init__(self, rules=None, offline_cycles=5):
+        self.rules = dict(rules or {})
+        self.offline_cycles = offline_cycles
+        self.active = {}  # (cihaz, kanal, tür) -> başlatan AlarmEvent
+        self._channels = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def observe(self, device, ok, values=None, ts=None, message=''):
+        """Bir cihaz sorgusunun sonucunu işler; oluşan olayları döndürür."""
+        ts = time.time() if ts is None else ts
+        events = []
+        with self._lock:
+            failures = 0 if ok else self._failures.get(device, 0) + 1
+            self._failures[device] = failures
+            key = (device, DEVICE_CHANNEL, ALARM_OFFLINE)
+            if failures >= self.offline_cycles and key not in self.active:
+                self._set(events, key, True, None, message or f"{failures} sorgu başarısız", ts)
+            elif ok and key in self.active:
+                self._set(events, key, False, None, '', ts)
+            if ok:
+                for channel, value in (values or {}).items():
+                    self._evaluate(events, device, channel, ts, value)
+        return events
+
+    def evaluate(self, device, channel, ts, value):
+        """Tek bir kanal örneğini değerlendirir; oluşan olayları döndürür."""
+        events = []
+        with self._lock:
+            self._evaluate(events, device, channel, ts, value)
+        return events
+
+    @staticmethod
+    def device_error(device, message):
+        """Cihazın bildirdiği tek seferlik bir hatayı alarm olayına çevirir (etkin listeye girmez)."""
+        return AlarmEvent(device, DEVICE_CHANNEL, ALARM_DEVICE_ERROR, True, message=message)
+
+    def check_stale(self, now=None):
+        """stale_s süresince örnek gelmeyen kanallar için alarm üretir; periyodik çağrılmalıdır."""
+        now = time.time() if now is None else now
+        events = []
+        with self._lock:
+            for (device, channel), state in self._channels.items():
+                if state.rule is None or state.rule.stale_s is None or state.last_ts is None:
+                    continue
+                key = (device, channel, ALARM_STALE)
+                age = now - state.last_ts
+                if age > state.rule.stale_s and key not in self.active:
+                    self._set(events, key, True, state.last_value, f"son veri {age:.0f} sn önce", now)
+        return events
+
+    def forget(self, device):
+        """Bağlantısı kapatılan cihazın durumunu siler; açık alarmları için temizleme olayları döndürür."""
+        events = []
+        with self._lock:
+            for key in [key for key in self.active if key[0] == device]:
+                self._set(events, key, False, None, "bağlantı kapatıldı", time.time())
+            for key in [key for key in self._channels if key[0] == device]:
+                del self._channels[key]
+            self._failures.pop(device, None)
+        return events
+
+    def rule_for(self, device, channel):
+        return self.rules.get(f"{device}/{channel}") or self.rules.get(channel)
+
+    def _evaluate(self, events, device, channel, ts, value):
+        state = self._channels.get((device, channel))
+        if state is None:
+            state = self._channels[(device, channel)] = _ChannelState(self.rule_for(device, channel))
+        rule = state.rule
+        if rule is None or not isinstance(value, (int, float)):
+            return
+
+        if (device, channel, ALARM_STALE) in self.active:
+            self._set(events, (device, channel, ALARM_STALE), False, value, '', ts)
+        if rule.high is not None:
+            self._update(events, state, (device, channel, ALARM_HIGH), value > rule.high,
+                         value < rule.high - rule.hysteresis, value, ts)
+        if rule.low is not None:
+            self._update(events, state, (device, channel, ALARM_LOW), value < rule.low,
+                         value > rule.low + rule.hysteresis, value, ts)
+        if rule.rate is not None and state.last_ts is not None and ts > state.last_ts:
+            rate = abs(value - state.last_value) / (ts - state.last_ts)
+            self._update(events, state, (device, channel, ALARM_RATE), rate > rule.rate, rate <= rule.rate, value, ts)
+        state.last_ts, state.last_value = ts, value
+
+    def _update(self, events, state, key, triggered, cleared, value, ts):
+        condition = state.conditions.get(key[2])
+        if condition is None:
+            condition = state.conditions[key[2]] = _Condition()
+        # Aktif değilken tetiklenme, aktifken temizlenme koşulu art arda `debounce` kez sağlanmalı
+        wanted = cleared if condition.active else triggered
+        condition.count = condition.count + 1 if wanted else 0
+        if condition.count >= state.rule.debounce:
+            condition.active = not condition.active
+            condition.count = 0
+            self._set(events, key, condition.active, value, '', ts)
+
+    def _set(self, events, key, active, value, message, ts):
+        event = AlarmEvent(*key, active, value, message, ts)
+        if active:
+            self.active[key] = event
+        else:
+            self.active.pop(key, None)
+        events.append(event)
+
+
+def load_alarm_rules(path):
+    """Alarm kurallarını INI dosyasından okur: `(kurallar, offline_cycles)`.
+
+    Dosya yoksa kural tanımlanmaz; yalnızca cihaz kesintisi alarmı çalışır.
+    Biçim için ModBus/alarms.ini dosyasına bakınız.
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str
+    if path and os.path.exists(path):
+        parser.read(path, encoding='utf-8')
+
+    offline_cycles = parser.getint('device', 'offline_cycles', fallback=5)
+    rules = {}
+    for name in parser.sections():
+        if name == 'device':
+            continue
+        section = parser[name]
+
+        def number(key):
+            return section.getfloat(key) if key in section else None
+
+        rules[name] = AlarmRule(high=number('high'), low=number('low'), rate=number('rate'),
+                                hysteresis=section.getfloat('hysteresis', fallback=0.0),
+                                debounce=section.getint('debounce', fallback=1), stale_s=number('stale_s'))
+    return rules, offline_cycles
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+
+# --- Kayıt Kaynakları ve Yönleri ---
+SOURCE_SERIAL = 'serial'  # STM32 seri port satırları (dev: port adı)
+SOURCE_MODBUS = 'modbus'  # Modbus sorguları (dev: slave IP'si)
+DIRECTION_TX = 'tx'       # Cihaza giden: seri komut veya Modbus isteği
+DIRECTION_RX = 'rx'       # Cihazdan gelen: seri satır veya Modbus sorgu sonucu
+
+FLUSH_INTERVAL_S = 1.0  # Dosya en geç bu aralıkla diske yazılır
+
+
+@dataclass(frozen=True)
+class CaptureRecord:
+    """Kayıttaki tek bir trafik olayı."""
+    ts: float
+    source: str
+    device: str
+    direction: str
+    data: object
+
+
+class CaptureWriter:
+    """Cihaz trafiğini yalnızca sona ekleyen, satır başına bir JSON kaydı olan dosyaya yazar.
+
+    Satır biçimi kısa anahtarlıdır: `{"t":..,"s":"serial","d":"COM3","r":"rx","x":"STATUS: ..."}`.
+    Birden fazla thread'den çağrılabilir; yarıda kesilen son satır okurken atlanır.
+    Yazılanlar arka plan thread'inde FLUSH_INTERVAL_S aralıkla diske aktarılır; trafik
+    kesilse de son kayıtlar en geç bu süre sonra dosyada olur.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._dirty = False  # Son flush'tan sonra yazılmış kayıt var mı
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='capture-flush', daemon=True)
+        self._thread.start()
+
+    def record(self, source, device, direction, data, ts=None):
+        line = json.dumps({'t': round(time.time() if ts is None else ts, 6), 's': source, 'd': device,
+                           'r': direction, 'x': data}, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + '\n')
+            self._dirty = True
+
+    def flush(self):
+        with self._lock:
+            if self._dirty and not self._file.closed:
+                self._file.flush()
+                self._dirty = False
+
+    def close(self):
+        self._stop_event.set()
+        with self._lock:
+            self._file.close()
+
+    def _run(self):
+        while not self._stop_event.wait(FLUSH_INTERVAL_S):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Kayıt dosyası {self.path} diske yazılamadı: {e}")
+
+
+def read_capture(path, source=None, device=None):
+    """Kayıt dosyasındaki olayları sırayla döndürür; `source`/`device` verilirse süzer."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+                record = CaptureRecord(item['t'], item['s'], item['d'], item['r'], item.get('x'))
+            except (ValueError, KeyError, TypeError):
+                continue  # Yarım kalmış veya bozuk satır
+            if (source is None or record.source == source) and (device is None or record.device == device):
+                yield record
+
+
+class CaptureReplayer:
+    """Kaydı özgün zamanlamasıyla (veya `speed` kat hızlı) `deliver(record)` fonksiyonuna verir.
+
+    `speed=0` kayıtları beklemeden, olabildiğince hızlı verir (ayrıştırma ve çizim
+    ölçümleri için). Oynatma ayrı bir thread'de yapılır; `deliver` bu thread'den
+    çağrılır. Bitince varsa `on_finished(adet, süre)` çağrılır.
+    """
+
+    def __init__(self, records, deliver, speed=1.0, on_finished=None):
+        self.records = records
+        self.deliver = deliver
+        self.speed = speed
+        self.on_finished = on_finished
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='capture-replay', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        started = time.monotonic()
+        first_ts = None
+        count = 0
+        for record in self.records:
+            if self._stop_event.is_set():
+                return
+            if first_ts is None:
+                first_ts = record.ts
+            if self.speed > 0:
+                delay = (record.ts - first_ts) / self.speed - (time.monotonic() - started)
+                if delay > 0 and self._stop_event.wait(delay):
+                    return
+            self.deliver(record)
+            count += 1
+        if self.on_finished:
+            self.on_finished(count, time.monotonic() - started)
\ No newline at end of file
@@ -0,0 +1,289 @@
+import os
+import threading
+from bisect import bisect_left
+
+# --- Varsayılan Gecikme Kovaları (saniye) ---
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_HOST = '127.0.0.1'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _label_text(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Değer her okumada `function()` çağrılarak alınır (ör. kuyruk derinliği)."""
+        self.function = function
+
+    def get(self):
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            return float('nan')
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', 'buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Son eleman: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Etiket değerlerine ait alt ölçümü döndürür (ilk kullanımda oluşturulur)."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def remove(self, *values):
+        """Artık var olmayan bir cihaza ait alt ölçümü siler."""
+        with self._lock:
+            self._children.pop(values, None)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        yield f"{self.name}{_label_text(self.label_names, values)} {_number(child.value)}"
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def set_function(self, function):
+        self.labels().set_function(function)
+
+    def _render_child(self, values, child):
+        yield f"{self.name}{_label_text(self.label_names, values)} {_number(child.get())}"
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = f'le="{_number(bound)}"'
+            yield f"{self.name}_bucket{_label_text(self.label_names, values, le)} {cumulative}"
+        labels = _label_text(self.label_names, values)
+        yield f"{self.name}_sum{labels} {_number(total)}"
+        yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Süreçteki tüm ölçümler. Aynı adla tekrar istenen ölçüm mevcut nesneyi döndürür."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} ölçümü farklı bir türle zaten tanımlı")
+            return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name, help_text, label_names=()):
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def render(self):
+        """Tüm ölçümleri Prometheus metin biçiminde döndürür."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# --- Arayüz Ölçümleri (her iki araç da kullanır) ---
+UI_UPDATE_SECONDS = REGISTRY.histogram('ui_update_seconds', "Bir arayüz güncelleme turunun süresi", ('app',))
+UI_QUEUE_DEPTH = REGISTRY.gauge('ui_queue_depth', "Arayüzün işlemesini bekleyen mesaj sayısı", ('app',))
+
+
+def start_http_server(port, host=METRICS_HOST, registry=REGISTRY):
+    """Ölçümleri http://host:port/metrics adresinden sunan arka plan sunucusunu başlatır."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Yalnızca istenirse yüklenir
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # Her istek için konsola satır basma
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+class MetricsDumper:
+    """Ölçümleri `interval` saniyede bir dosyaya yazar (node_exporter textfile biçimi)."""
+
+    def __init__(self, path, interval=30, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-dump', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        self._stop_event.set()
+        self.dump()
+
+    def dump(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)  # Okuyan taraf yarım dosya görmez
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"Ölçümler {self.path} dosyasına yazılamadı: {e}")
+
+
+def add_arguments(parser):
+    """Komut satırına ölçüm çıkışı seçeneklerini ekler."""
+    parser.add_argument('--metrics-port', type=int,
+                        help=f"Ölçümleri http://{METRICS_HOST}:PORT/metrics adresinden sun")
+    parser.add_argument('--metrics-file', help="Ölçümleri periyodik olarak bu dosyaya yaz")
+    parser.add_argument('--metrics-interval', type=float, default=30, help="Dosyaya yazma aralığı (sn)")
+
+
+def start_exporters(args):
+    """add_arguments ile eklenen seçeneklere göre ölçüm çıkışlarını başlatır; kapatılacak nesneleri döndürür."""
+    exporters = []
+    if args.metrics_port:
+        exporters.append(start_http_server(args.metrics_port))
+    if args.metrics_file:
+        exporters.append(MetricsDumper(args.metrics_file, args.metrics_interval).start())
+    return exporters
\ No newline at end of file
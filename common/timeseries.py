@@ -0,0 +1,403 @@
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+# --- Özet (rollup) Çözünürlükleri: (saniye, tutulacak kova sayısı) ---
+# 1 sn -> son 1 saat, 1 dk -> son 7 gün, 1 sa -> son ~5 yıl
+DEFAULT_ROLLUPS = ((1, 3600), (60, 7 * 24 * 60), (3600, 5 * 365 * 24))
+
+DEFAULT_RAW_CAPACITY = 24 * 3600  # Dosyasız modda bellekte tutulan ham örnek sayısı (1 Hz'de 1 gün)
+
+_RECORD = struct.Struct('<dd')  # Dosyadaki tek kayıt: (zaman damgası, değer)
+
+# --- Özet Anlık Görüntüsü (<seri>.rollup) ---
+# Açılışta ham dosyanın tamamı yeniden işlenmesin diye özetler periyodik olarak ve
+# kapanışta kaydedilir; açılışta yalnızca anlık görüntüden sonra eklenen kayıtlar işlenir.
+SNAPSHOT_INTERVAL_S = 600
+_SNAPSHOT = struct.Struct('<4sQI')  # işaret, kapsanan ham kayıt sayısı, özet sayısı
+_SNAPSHOT_MAGIC = b'TSR1'
+_ROLLUP_HEADER = struct.Struct('<dIq')  # çözünürlük, kapasite, en yeni kova (-1: boş)
+
+
+def _bisect(count, key_at, x):
+    """key_at(0..count-1) artan sıralıyken x'ten küçük olmayan ilk indeksi döndürür."""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key_at(mid) < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(name))
+
+
+class Rollup:
+    """Sabit çözünürlüklü min/max/ortalama kovalarından oluşan halka tampon.
+
+    Kovaların başlangıç zamanı saklanmaz; en yeni kova numarasından hesaplanır.
+    Kova başına 20 bayt yer tutar.
+    """
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.mins = array('f', bytes(4 * capacity))
+        self.maxs = array('f', bytes(4 * capacity))
+        self.sums = array('d', bytes(8 * capacity))
+        self.counts = array('I', bytes(4 * capacity))
+        self.head = None  # En yeni kovanın numarası (zaman // çözünürlük)
+
+    def add(self, ts, value):
+        self._merge(int(ts // self.resolution), value, value, value, 1)
+
+    def add_many(self, times, values, newest):
+        """Zamana göre sıralı örnek dizilerini kova kova ekler.
+
+        Her kovanın min/max/toplamı dizi dilimi üzerinden tek seferde hesaplanır.
+        `newest` (serideki en yeni zaman) için halka tamponun dışında kalacak eski
+        örnekler hiç dolaşılmaz.
+        """
+        resolution = self.resolution
+        n = len(times)
+        i = bisect_left(times, (int(newest // resolution) - self.capacity + 1) * resolution)
+        while i < n:
+            bucket = int(times[i] // resolution)
+            j = max(i + 1, bisect_left(times, (bucket + 1) * resolution, i))
+            chunk = values[i:j]
+            self._merge(bucket, min(chunk), max(chunk), sum(chunk), j - i)
+            i = j
+
+    def _merge(self, bucket, low, high, total, count):
+        if self.head is None:
+            self.head = bucket
+        elif bucket > self.head:
+            # Aradaki boş kovaları (veri gelmeyen süreleri) temizle
+            for b in range(max(self.head + 1, bucket - self.capacity + 1), bucket + 1):
+                self.counts[b % self.capacity] = 0
+            self.head = bucket
+        elif bucket <= self.head - self.capacity:
+            return  # Halka tamponun dışında kalan çok eski örnek
+
+        i = bucket % self.capacity
+        if self.counts[i] == 0:
+            self.mins[i] = low
+            self.maxs[i] = high
+            self.sums[i] = total
+            self.counts[i] = count
+        else:
+            if low < self.mins[i]:
+                self.mins[i] = low
+            if high > self.maxs[i]:
+                self.maxs[i] = high
+            self.sums[i] += total
+            self.counts[i] += count
+
+    def query(self, start, end):
+        """[start, end] aralığındaki dolu kovaları (başlangıç, min, max, ortalama) olarak döndürür."""
+        if self.head is None:
+            return []
+        first = max(int(start // self.resolution), self.head - self.capacity + 1)
+        last = min(int(end // self.resolution), self.head)
+        rows = []
+        for b in range(first, last + 1):
+            i = b % self.capacity
+            if self.counts[i]:
+                rows.append((b * self.resolution, self.mins[i], self.maxs[i], self.sums[i] / self.counts[i]))
+        return rows
+
+    def dump(self, f):
+        f.write(_ROLLUP_HEADER.pack(self.resolution, self.capacity, -1 if self.head is None else self.head))
+        for data in (self.mins, self.maxs, self.sums, self.counts):
+            data.tofile(f)
+
+    def load(self, f):
+        """dump() ile yazılmış kovaları okur; çözünürlük veya kapasite farklıysa ValueError."""
+        resolution, capacity, head = _ROLLUP_HEADER.unpack(f.read(_ROLLUP_HEADER.size))
+        if resolution != self.resolution or capacity != self.capacity:
+            raise ValueError("Özet ayarları değişmiş")
+        arrays = []
+        for data in (self.mins, self.maxs, self.sums, self.counts):
+            loaded = array(data.typecode)
+            loaded.fromfile(f, capacity)
+            arrays.append(loaded)
+        self.mins, self.maxs, self.sums, self.counts = arrays
+        self.head = None if head < 0 else head
+
+
+class _MemoryLog:
+    """Ham örnekler için bellekte sabit kapasiteli halka tampon."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.count = 0
+        self.start = 0  # En eski örneğin indeksi
+
+    def append(self, ts, value):
+        if self.count < self.capacity:
+            i = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            i = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[i] = ts
+        self.values[i] = value
+
+    def query(self, start, end):
+        cap, base = self.capacity, self.start
+        lo = _bisect(self.count, lambda k: self.times[(base + k) % cap], start)
+        hi = _bisect(self.count, lambda k: self.times[(base + k) % cap], end + 1e-9)
+        return [(self.times[(base + k) % cap], self.values[(base + k) % cap]) for k in range(lo, hi)]
+
+    def close(self):
+        pass
+
+
+class _FileLog:
+    """Ham örnekler için yalnızca sona ekleme yapılan, mmap ile okunan dosya."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+        self._dirty = False
+
+    def append(self, ts, value):
+        self._file.write(_RECORD.pack(ts, value))
+        self._dirty = True
+
+    @property
+    def records(self):
+        self.flush()
+        return os.path.getsize(self.path) // _RECORD.size
+
+    def last(self):
+        """Dosyadaki son (zaman, değer) kaydı; dosya boşsa None."""
+        count = self.records
+        if not count:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek((count - 1) * _RECORD.size)
+            return _RECORD.unpack(f.read(_RECORD.size))
+
+    def iter_chunks(self, start=0, chunk_records=65536):
+        """`start`. kayıttan itibaren kayıtları (zamanlar, değerler) dizi parçaları halinde okur."""
+        self.flush()
+        with open(self.path, 'rb') as f:
+            f.seek(start * _RECORD.size)
+            while True:
+                data = f.read(chunk_records * _RECORD.size)
+                if len(data) < _RECORD.size:
+                    return
+                flat = array('d')
+                flat.frombytes(data[:len(data) - len(data) % _RECORD.size])
+                yield flat[0::2], flat[1::2]
+
+    def query(self, start, end):
+        self.flush()
+        size = os.path.getsize(self.path)
+        if size < _RECORD.size:
+            return []
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), size - size % _RECORD.size,
+                                                   access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm).cast('d')
+            try:
+                n = len(view) // 2
+                lo = _bisect(n, lambda k: view[2 * k], start)
+                hi = _bisect(n, lambda k: view[2 * k], end + 1e-9)
+                return [(view[2 * k], view[2 * k + 1]) for k in range(lo, hi)]
+            finally:
+                view.release()
+
+    def flush(self):
+        if self._dirty:
+            self._file.flush()
+            self._dirty = False
+
+    def close(self):
+        self._file.close()
+
+
+class Series:
+    """Tek bir (cihaz, kanal) çiftinin ham örnekleri ve özetleri."""
+
+    def __init__(self, log, rollups=DEFAULT_ROLLUPS):
+        self.log = log
+        self.rollups = {resolution: Rollup(resolution, capacity) for resolution, capacity in rollups}
+        self.last_ts = None
+        self.last_value = None
+        self.dropped = 0  # Zaman sırası bozuk olduğu için atılan örnek sayısı
+        self.records = 0  # Ham kayıttaki örnek sayısı
+        self.saved_records = 0  # Son anlık görüntünün kapsadığı örnek sayısı
+
+    def append(self, ts, value):
+        if self.last_ts is not None and ts < self.last_ts:
+            self.dropped += 1
+            return
+        self.log.append(ts, value)
+        for rollup in self.rollups.values():
+            rollup.add(ts, value)
+        self.records += 1
+        self.last_ts = ts
+        self.last_value = value
+
+    def load(self, snapshot_path):
+        """Özetleri anlık görüntüden yükler; dosyaya sonradan eklenen kayıtları toplu işler."""
+        newest = self.log.last()
+        if newest is None:
+            return
+        stored = self.log.records
+        start = self._read_snapshot(snapshot_path, stored)
+        self.saved_records = start
+        if start < stored:
+            for times, values in self.log.iter_chunks(start):
+                for rollup in self.rollups.values():
+                    rollup.add_many(times, values, newest[0])
+        self.records = stored
+        self.last_ts, self.last_value = newest
+
+    def _read_snapshot(self, path, stored):
+        """Anlık görüntüyü okur ve kapsadığı kayıt sayısını döndürür; geçersizse özetler boş kalır, 0 döner."""
+        try:
+            with open(path, 'rb') as f:
+                magic, records, count = _SNAPSHOT.unpack(f.read(_SNAPSHOT.size))
+                if magic != _SNAPSHOT_MAGIC or records > stored or count != len(self.rollups):
+                    raise ValueError("Anlık görüntü ham kayıtla uyuşmuyor")
+                for rollup in self.rollups.values():
+                    rollup.load(f)
+            return records
+        except (OSError, EOFError, ValueError, struct.error):
+            self.rollups = {r.resolution: Rollup(r.resolution, r.capacity) for r in self.rollups.values()}
+            return 0
+
+    def save(self, snapshot_path):
+        """Özetleri anlık görüntü dosyasına yazar (önce geçici dosyaya, sonra yerine taşınarak)."""
+        if self.last_ts is None or self.records == self.saved_records:
+            return
+        self.log.flush()
+        temp_path = snapshot_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_SNAPSHOT.pack(_SNAPSHOT_MAGIC, self.records, len(self.rollups)))
+            for rollup in self.rollups.values():
+                rollup.dump(f)
+        os.replace(temp_path, snapshot_path)
+        self.saved_records = self.records
+
+
+class TimeSeriesStore:
+    """Sensör örnekleri için gömülü, yalnızca eklemeli zaman serisi deposu.
+
+    `path` verilirse her seri `<path>/<cihaz>__<kanal>.bin` dosyasına 16 baytlık
+    kayıtlar olarak yazılır ve okumalar mmap ile yapılır; bellekte yalnızca sabit
+    boyutlu özetler kalır. Özetler `<cihaz>__<kanal>.rollup` dosyasına periyodik olarak
+    kaydedilir. `path` verilmezse ham örnekler `raw_capacity` boyutlu bir halka
+    tamponda tutulur.
+    """
+
+    def __init__(self, path=None, raw_capacity=DEFAULT_RAW_CAPACITY, rollups=DEFAULT_ROLLUPS):
+        self.path = path
+        self.raw_capacity = raw_capacity
+        self.rollup_spec = tuple(rollups)
+        self._series = {}
+        self._lock = threading.Lock()
+        self._saved_at = time.monotonic()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load_existing()
+
+    @staticmethod
+    def _file_name(device, channel):
+        return f"{_safe_name(device)}__{_safe_name(channel)}.bin"
+
+    def _load_existing(self):
+        """Önceki çalışmalardan kalan serileri açar; özetler anlık görüntüden ve sonraki kayıtlardan kurulur."""
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith('.bin') or '__' not in name:
+                continue
+            device, channel = name[:-4].split('__', 1)
+            series = self._series[(device, channel)] = Series(_FileLog(os.path.join(self.path, name)),
+                                                              self.rollup_spec)
+            series.load(self._snapshot_path(device, channel))
+
+    def _snapshot_path(self, device, channel):
+        return os.path.join(self.path, self._file_name(device, channel)[:-4] + '.rollup')
+
+    def _save_snapshots(self):
+        for (device, channel), series in self._series.items():
+            series.save(self._snapshot_path(device, channel))
+        self._saved_at = time.monotonic()
+
+    def _get(self, device, channel, create=False):
+        key = (str(device), str(channel))
+        series = self._series.get(key)
+        if series is None and create:
+            if self.path:
+                log = _FileLog(os.path.join(self.path, self._file_name(*key)))
+            else:
+                log = _MemoryLog(self.raw_capacity)
+            series = self._series[key] = Series(log, self.rollup_spec)
+        return series
+
+    def append(self, device, channel, ts, value):
+        """Bir örnek ekler; aynı seride geriye giden zaman damgaları atılır."""
+        with self._lock:
+            self._get(device, channel, create=True).append(float(ts), float(value))
+            if self.path and time.monotonic() - self._saved_at >= SNAPSHOT_INTERVAL_S:
+                self._save_snapshots()
+
+    def query(self, device, channel, start, end, resolution=None, max_points=None):
+        """[start, end] aralığındaki örnekleri döndürür.
+
+        resolution=None ve max_points=None ise ham (zaman, değer) listesi döner.
+        Aksi halde (kova başlangıcı, min, max, ortalama) satırları döner; max_points
+        verilirse bu sayıyı aşmayan en ince çözünürlük seçilir.
+        """
+        with self._lock:
+            series = self._get(device, channel)
+            if series is None:
+                return []
+            if resolution is None and max_points is not None:
+                span = max(end - start, 0)
+                for res in sorted(series.rollups):
+                    resolution = res
+                    if span / res <= max_points:
+                        break
+            if resolution is None:
+                return series.log.query(start, end)
+            if resolution not in series.rollups:
+                raise ValueError(f"Desteklenmeyen çözünürlük: {resolution} sn")
+            return series.rollups[resolution].query(start, end)
+
+    def latest(self, device, channel):
+        """Serinin son (zaman, değer) çiftini döndürür; seri yoksa None."""
+        with self._lock:
+            series = self._get(device, channel)
+            if series is None or series.last_ts is None:
+                return None
+            return series.last_ts, series.last_value
+
+    def series(self):
+        with self._lock:
+            return list(self._series)
+
+    def flush(self):
+        with self._lock:
+            for series in self._series.values():
+                if isinstance(series.log, _FileLog):
+                    series.log.flush()
+
+    def close(self):
+        with self._lock:
+            if self.path:
+                self._save_snapshots()
+            for series in self._series.values():
+                series.log.close()
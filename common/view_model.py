@@ -0,0 +1,89 @@
+import time
+
+from common.metrics import REGISTRY
+
+RENDER_SECONDS = REGISTRY.histogram('ui_render_seconds', "Bir karede biriken widget değişikliklerini uygulama süresi",
+                                    ('app',))
+WIDGET_UPDATES = REGISTRY.counter('ui_widget_updates_total', "Sonuçlanan widget güncellemeleri (applied, skipped)",
+                                  ('app', 'result'))
+
+
+class ViewModel:
+    """Tk widget'larına en son çizilen durumu tutar ve yalnızca farkları uygular.
+
+    `set`, `set_item` ve `bind` çağrıları hemen çizilmez; aynı karedeki tüm
+    değişiklikler birleştirilir ve en fazla `frame_ms` aralıkla tek seferde
+    uygulanır. Önceki çizimle aynı olan seçenekler için Tk'ye hiç gidilmez.
+
+    Bu sınıfın yönettiği widget seçenekleri başka yerden doğrudan değiştirilmemelidir;
+    aksi halde son çizilen durum bilgisi eskir.
+    """
+
+    def __init__(self, master, name='ui', frame_ms=16):
+        self.master = master
+        self.frame_ms = frame_ms
+        self._rendered = {}  # anahtar -> son uygulanan seçenekler
+        self._pending = {}   # anahtar -> (uygulama fonksiyonu, bekleyen seçenekler)
+        self._scheduled = None
+        self._render_seconds = RENDER_SECONDS.labels(name)
+        self._applied = WIDGET_UPDATES.labels(name, 'applied')
+        self._skipped = WIDGET_UPDATES.labels(name, 'skipped')
+
+    def set(self, widget, **options):
+        """Widget seçeneklerini (text, foreground, style, state, value...) ister."""
+        self._request(widget, widget.configure, options)
+
+    def set_item(self, tree, iid, **options):
+        """Treeview satırının seçeneklerini (values, text, tags) ister."""
+        def apply(**changed):
+            if tree.exists(iid):  # Satır bu arada silinmiş olabilir
+                tree.item(iid, **changed)
+        self._request((tree, iid), apply, options)
+
+    def bind(self, widget, sequence, callback):
+        """Olay bağlamasını ister; `callback` None ise bağlama kaldırılır."""
+        def apply(callback):
+            if callback is None:
+                widget.unbind(sequence)
+            else:
+                widget.bind(sequence, callback)
+        self._request((widget, sequence), apply, {'callback': callback})
+
+    def forget(self, key):
+        """Silinen widget/satır için tutulan durumu atar (ör. `(tree, iid)`)."""
+        self._rendered.pop(key, None)
+        self._pending.pop(key, None)
+
+    def _request(self, key, apply, options):
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = (apply, dict(options))
+        else:
+            entry[1].update(options)
+        if self._scheduled is None:
+            self._scheduled = self.master.after(self.frame_ms, self.render)
+
+    def render(self):
+        """Bekleyen değişikliklerden önceki çizimden farklı olanları uygular."""
+        self._scheduled = None
+        if not self._pending:
+            return
+        started = time.perf_counter()
+        pending, self._pending = self._pending, {}
+        for key, (apply, options) in pending.items():
+            rendered = self._rendered.setdefault(key, {})
+            changed = {name: value for name, value in options.items()
+                       if name not in rendered or rendered[name] != value}
+            if not changed:
+                self._skipped.inc()
+                continue
+            apply(**changed)
+            rendered.update(changed)
+            self._applied.inc()
+        self._render_seconds.observe(time.perf_counter() - started)
+
+    def cancel(self):
+        """Pencere kapatılırken zamanlanmış çizimi iptal eder."""
+        if self._scheduled is not None:
+            self.master.after_cancel(self._scheduled)
+            self._scheduled = None
\ No newline at end of file